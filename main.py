@@ -1,42 +1,111 @@
 #!/usr/bin/env python3
 """
 Главный скрипт проекта ML с DVC и CI/CD.
-Демонстрирует полный workflow: валидация данных -> обучение -> оценка.
+Запускает полный workflow в одном процессе: валидация данных -> обучение ->
+компактный экспорт -> оценка -> график диагностики.
+
+Этапы выполняются так же, как в `dvc.yaml`, и пишут те же артефакты
+(отчеты, модель, метрики, perf-метрики), но данные загружаются один
+раз, а обученная модель передается в экспорт и оценку в памяти — без
+повторного запуска интерпретатора и загрузки модели с диска. График
+диагностики строится по гистограммам, сохраненным при оценке. Флаги
+командной строки передаются этапу обучения (`--sweep`, `--warm-start`,
+`--early-stopping`, `--out-of-core`). При потоковом обучении данные
+не загружаются в память целиком и на этапах экспорта и оценки читаются
+блоками.
 """
 
 import sys
-from pathlib import Path
 
-def main():
-    """Главная функция для запуска полного pipeline."""
+from scripts import perf
+from scripts.dataset import Schema, dataset_md5, load_data
+from scripts.diagnostics import DEFAULT_DIAGNOSTICS, DiagnosticsHistogram, render
+from scripts.evaluate_model import run_evaluation
+from scripts.export_model import export_model, print_report, write_report
+from scripts.train_model import load_config, parse_args, run_training, training_mode
+from scripts.validate_data import critical_checks_passed, validate_data
+
+DATA_PATH = "data/housing.csv"
+CONFIG_PATH = "config/model_config.yaml"
+MODEL_PATH = "models/model"
+VALIDATION_REPORT_PATH = "reports/data_validation_report.json"
+
+
+def run_pipeline(argv=None) -> int:
+    """
+    Полный pipeline в одном процессе.
+
+    Returns:
+        Код выхода: 0 — все этапы успешны, 1 — этап завершился ошибкой
+    """
+    args = parse_args(argv)
+
     print("=" * 60)
-    print("ML Project Pipeline: Data Validation -> Training -> Evaluation")
+    print("ML Project Pipeline: Data Validation -> Training -> Export -> Evaluation -> Diagnostics")
     print("=" * 60)
-    
-    # Проверяем наличие необходимых скриптов
-    scripts_dir = Path("scripts")
-    required_scripts = [
-        "validate_data.py",
-        "train_model.py",
-        "evaluate_model.py"
-    ]
-    
-    for script in required_scripts:
-        script_path = scripts_dir / script
-        if not script_path.exists():
-            print(f"❌ Ошибка: скрипт {script_path} не найден")
-            sys.exit(1)
-    
-    print("\n✅ Все необходимые скрипты найдены")
-    
+
+    print("\n[1/5] Валидация данных")
+    with perf.stage("validate_data"):
+        results = validate_data(DATA_PATH, VALIDATION_REPORT_PATH, incremental=True)
+    if not critical_checks_passed(results):
+        return 1
+
+    print("\n[2/5] Обучение модели")
+    with perf.stage("train_model"):
+        print("Загрузка конфигурации...")
+        config = load_config(CONFIG_PATH)
+        X = y = None
+        with perf.phase("load"):
+            if training_mode(args, config) != 'out_of_core':
+                X, y = load_data(DATA_PATH, schema=Schema.from_config(config))
+            data_md5 = dataset_md5(DATA_PATH)
+        model, report = run_training(args, config, X, y, data_md5, DATA_PATH)
+    if not report['quality_check']['passed']:
+        print("\n❌ Модель не прошла проверку качества, экспорт и оценка не выполняются")
+        return 1
+
+    print("\n[3/5] Компактный экспорт модели")
+    with perf.stage("export_model"):
+        export_report = export_model(
+            model, MODEL_PATH, X, y, config, report,
+            data_path=DATA_PATH, schema=Schema.from_config(config)
+        )
+        with perf.phase("write_report"):
+            write_report(export_report)
+    print_report(export_report)
+    if not export_report['published'] and not export_report['skipped']:
+        return 1
+
+    print("\n[4/5] Оценка модели")
+    with perf.stage("evaluate_model"):
+        run_evaluation(
+            model, X, y, MODEL_PATH, config.get('inference') or {},
+            data_path=DATA_PATH, schema=Schema.from_config(config),
+            importance_config=config.get('permutation_importance'),
+            registry_config=config.get('registry'),
+            diagnostics_config=config.get('diagnostics')
+        )
+
+    diagnostics = dict(DEFAULT_DIAGNOSTICS, **(config.get('diagnostics') or {}))
+    if diagnostics['enabled']:
+        print("\n[5/5] График диагностики")
+        with perf.stage("plot_diagnostics"):
+            with perf.phase("load"):
+                hist = DiagnosticsHistogram.load(diagnostics['output'])
+            with perf.phase("render"):
+                render(hist, diagnostics['plot'])
+
     print("\n" + "=" * 60)
-    print("Для запуска полного pipeline используйте:")
-    print("  dvc repro")
-    print("\nИли запустите этапы по отдельности:")
-    print("  1. python scripts/validate_data.py")
-    print("  2. python scripts/train_model.py")
-    print("  3. python scripts/evaluate_model.py")
+    print("✅ Pipeline завершен. Чтобы записать результаты в dvc.lock:")
+    print("  dvc commit")
     print("=" * 60)
+    return 0
+
+
+def main():
+    """Главная функция для запуска полного pipeline."""
+    sys.exit(run_pipeline())
+
 
 if __name__ == '__main__':
     main()
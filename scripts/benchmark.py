@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк этапов pipeline на синтетических данных разного размера.
+
+Для каждого размера из `benchmark.sizes` генерируется (или берется из
+`benchmark.data_dir`) синтетический датасет, и замеряются время и
+пиковый RSS процесса (вместе с памятью C-расширений, например буферами
+деревьев scikit-learn) этапов: загрузка, validate_data, обучение,
+оценка, построение графика, диагностика остатков (гистограммы готовых
+предсказаний и график по ним) и метрики оценки по блокам (сливаемые
+аккумуляторы `streaming_metrics` против тех же метрик через `np.sum`).
+Этапы после обучения повторяются для каждой модели из
+`benchmark.backends`; для них дополнительно записываются пропускная
+способность (строк в секунду) и RMSE на тестовой выборке, чтобы модель
+можно было выбрать и по скорости, и по качеству. Результаты сохраняются
+в JSON. С `--baseline` каждый замер сравнивается с сохраненным базовым
+файлом, и рост времени или памяти больше допуска считается регрессией
+(код выхода 1).
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts import perf
+from scripts.dataset import Schema, load_data
+from scripts.synthetic_data import ensure_dataset
+
+STAGES = ('load', 'load_cached', 'validate', 'metrics', 'train', 'evaluate', 'plot', 'diagnostics')
+
+DEFAULT_BENCHMARK = {
+    'sizes': [10000, 1000000, 10000000],
+    'stages': list(STAGES),
+    'backends': None,
+    'seed': 0,
+    'repeats': 1,
+    'data_dir': '.cache/benchmark',
+    'output': 'reports/benchmark.json',
+    'validate_chunksize': None,
+    'time_tolerance': 0.25,
+    'memory_tolerance': 0.25,
+    'min_time_delta': 0.05
+}
+
+
+def measure(func, repeats: int = 1) -> tuple:
+    """
+    Время (лучшее из `repeats`) и пиковый RSS процесса во время вызова.
+
+    В отличие от tracemalloc, RSS учитывает память, выделенную в C (буферы
+    деревьев scikit-learn, массивы расширений). Пик сбрасывается перед
+    каждым повтором, как в фазах `perf` (Linux, /proc/self/clear_refs);
+    где сброс недоступен, это пик процесса с момента запуска.
+
+    Returns:
+        (результат последнего вызова, секунды, пик RSS в МБ)
+    """
+    best_seconds = float('inf')
+    peak = 0.0
+    for _ in range(max(1, repeats)):
+        gc.collect()
+        perf.reset_peak_rss()
+        start = time.perf_counter()
+        result = func()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+        peak = max(peak, perf.read_peak_rss())
+    return result, best_seconds, peak
+
+
+def backend_configs(config: dict, backends=None) -> list:
+    """
+    Конфигурации моделей для бенчмарка.
+
+    Элемент `backends` — {name, params}; без `params` используются
+    `model.params`. Без списка замеряется только модель из `model.name`.
+    """
+    backends = backends or [{'name': config['model']['name']}]
+    configs = []
+    for backend in backends:
+        params = backend.get('params')
+        configs.append(dict(config, model={
+            'name': backend['name'],
+            'n_jobs': config['model'].get('n_jobs'),
+            'params': config['model']['params'] if params is None else params
+        }))
+    return configs
+
+
+def benchmark_size(data_path: Path, config: dict, bench: dict, workdir: Path) -> list:
+    """Замеры всех выбранных этапов на одном датасете."""
+    from sklearn.model_selection import train_test_split
+    from scripts import evaluate_model, train_model
+    from scripts.validate_data import validate_data
+
+    stages = bench['stages']
+    repeats = int(bench['repeats'])
+    results = []
+
+    def record(stage, func, **extra):
+        if stage not in stages:
+            return None
+        print(f"  {stage}{' ' + extra['backend'] if 'backend' in extra else ''}...")
+        result, seconds, peak_mb = measure(func, repeats)
+        results.append(dict(
+            {'stage': stage, 'seconds': round(seconds, 6), 'peak_memory_mb': round(peak_mb, 3)}, **extra
+        ))
+        return result
+
+    schema = Schema.from_config(config)
+    record('load', lambda: load_data(data_path, use_cache=False, schema=schema))
+    X, y = load_data(data_path, schema=schema)
+    record('load_cached', lambda: load_data(data_path, schema=schema))
+    record('validate', lambda: validate_data(
+        str(data_path), str(workdir / "validation_report.json"), chunksize=bench['validate_chunksize']
+    ))
+    if 'metrics' in stages:
+        # Предсказания с шумом порядка разброса цели: скорость сумм от
+        # модели не зависит
+        y_true = y.to_numpy(dtype=np.float64)
+        noise = np.random.default_rng(int(bench['seed'])).normal(size=len(y_true))
+        y_pred = y_true + noise * float(y_true.std())
+        record('metrics', lambda: accumulate_metrics(y_true, y_pred))
+        entry = results[-1]
+        entry['rows_per_second'] = round(len(y_true) / max(entry['seconds'], 1e-9), 1)
+        _, numpy_seconds, _ = measure(lambda: numpy_metrics(y_true, y_pred), repeats)
+        entry['numpy_seconds'] = round(numpy_seconds, 6)
+
+    if not {'train', 'evaluate', 'plot', 'diagnostics'} & set(stages):
+        return results
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=config['data']['test_size'], random_state=config['data']['random_state']
+    )
+    for backend_config in backend_configs(config, bench['backends']):
+        backend = backend_config['model']['name']
+        model = record('train', lambda: train_model.train_model(X_train, y_train, backend_config),
+                       backend=backend)
+        if model is None:
+            model = train_model.train_model(X_train, y_train, backend_config)
+        else:
+            entry = results[-1]
+            entry['rows_per_second'] = round(len(X_train) / max(entry['seconds'], 1e-9), 1)
+            entry['test_rmse'] = train_model.evaluate_model(model, X_test, y_test)['rmse']
+        record('evaluate', lambda: evaluate_model.evaluate_model(model, X, y), backend=backend)
+        if 'evaluate' in stages:
+            entry = results[-1]
+            entry['rows_per_second'] = round(len(X) / max(entry['seconds'], 1e-9), 1)
+        record('plot', lambda: evaluate_model.plot_feature_importance(
+            model, X.columns, str(workdir / "feature_importance.png")
+        ), backend=backend)
+        if 'diagnostics' in stages:
+            predictions = model.predict(X)
+            record('diagnostics', lambda: plot_diagnostics(
+                X, y, predictions, str(workdir / "diagnostics.png")
+            ), backend=backend)
+            entry = results[-1]
+            entry['rows_per_second'] = round(len(X) / max(entry['seconds'], 1e-9), 1)
+    return results
+
+
+def accumulate_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    """Метрики оценки блоками со слиянием аккумуляторов, как в evaluate_model."""
+    from scripts.evaluate_model import EVAL_CHUNK_ROWS
+    from scripts.streaming_metrics import RegressionAccumulator
+
+    accumulator = RegressionAccumulator()
+    for start in range(0, len(y_true), EVAL_CHUNK_ROWS):
+        chunk = RegressionAccumulator()
+        chunk.update(y_true[start:start + EVAL_CHUNK_ROWS], y_pred[start:start + EVAL_CHUNK_ROWS])
+        accumulator.merge(chunk)
+    return accumulator.evaluation_metrics()
+
+
+def numpy_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    """Те же метрики по полным массивам через `np.sum` (без точных сумм)."""
+    residuals = y_true - y_pred
+    sse = np.sum(residuals ** 2)
+    return {
+        'rmse': float(np.sqrt(sse / len(y_true))),
+        'mae': float(np.mean(np.abs(residuals))),
+        'r2': float(1 - sse / np.sum((y_true - y_true.mean()) ** 2)),
+        'mean_absolute_percentage_error': float(np.mean(np.abs(residuals / y_true)) * 100),
+        'residuals': {
+            'mean': float(residuals.mean()), 'std': float(residuals.std()),
+            'min': float(residuals.min()), 'max': float(residuals.max())
+        }
+    }
+
+
+def plot_diagnostics(X, y, predictions, output_path: str):
+    """Гистограммы остатков готовых предсказаний и график по ним."""
+    from scripts.diagnostics import axis_ranges, build_histogram, render
+
+    columns = list(X.columns) + [y.name]
+    ranges = axis_ranges(columns, chunks=[X.assign(**{y.name: y})])
+    hist = build_histogram(list(X.columns), y.name, ranges, {})
+    hist.update(X, y, predictions)
+    render(hist, output_path)
+
+
+def run_benchmark(config: dict, data_path: str, sizes=None, stages=None) -> dict:
+    """Бенчмарк по всем размерам из конфигурации."""
+    import sklearn
+
+    bench = dict(DEFAULT_BENCHMARK, **(config.get('benchmark') or {}))
+    if sizes:
+        bench['sizes'] = sizes
+    if stages:
+        bench['stages'] = stages
+    unknown = set(bench['stages']) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Неизвестные этапы бенчмарка: {sorted(unknown)}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n_rows in bench['sizes']:
+            n_rows = int(n_rows)
+            synthetic_path = ensure_dataset(data_path, bench['data_dir'], n_rows, int(bench['seed']))
+            print(f"Бенчмарк на {n_rows} строках:")
+            for entry in benchmark_size(synthetic_path, config, bench, Path(tmpdir)):
+                results.append(dict(entry, rows=n_rows))
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scikit-learn': sklearn.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'peak_rss_per_run': perf.reset_peak_rss()
+        },
+        'seed': int(bench['seed']),
+        'repeats': int(bench['repeats']),
+        'results': results
+    }
+
+
+def compare_results(current: dict, baseline: dict, time_tolerance: float,
+                    memory_tolerance: float, min_time_delta: float = 0.0) -> list:
+    """
+    Сравнение с базовыми результатами.
+
+    Рост времени меньше `min_time_delta` секунд регрессией не считается:
+    короткие этапы на малых размерах слишком шумные.
+
+    Returns:
+        Список сравнений по (rows, stage, backend), присутствующим в обоих
+        файлах; у регрессий `regression=True`
+    """
+    def key(entry):
+        return entry['rows'], entry['stage'], entry.get('backend')
+
+    baseline_index = {key(entry): entry for entry in baseline['results']}
+    comparisons = []
+    for entry in current['results']:
+        base = baseline_index.get(key(entry))
+        if base is None:
+            continue
+        time_ratio = entry['seconds'] / base['seconds'] if base['seconds'] > 0 else 1.0
+        memory_ratio = entry['peak_memory_mb'] / base['peak_memory_mb'] \
+            if base['peak_memory_mb'] > 0 else 1.0
+        comparisons.append({
+            'rows': entry['rows'],
+            'stage': entry['stage'],
+            'backend': entry.get('backend'),
+            'time_ratio': round(time_ratio, 4),
+            'memory_ratio': round(memory_ratio, 4),
+            'regression': (
+                (time_ratio > 1 + time_tolerance and entry['seconds'] - base['seconds'] > min_time_delta)
+                or memory_ratio > 1 + memory_tolerance
+            )
+        })
+    return comparisons
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк этапов pipeline на синтетических данных")
+    parser.add_argument('--sizes', type=int, nargs='+', help="Размеры датасетов (строк)")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, help="Этапы для замера")
+    parser.add_argument('--output', help="Файл результатов (по умолчанию benchmark.output)")
+    parser.add_argument('--baseline', help="Базовые результаты для поиска регрессий")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config_path = "config/model_config.yaml"
+    data_path = "data/housing.csv"
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    bench = dict(DEFAULT_BENCHMARK, **(config.get('benchmark') or {}))
+    output_path = Path(args.output or bench['output'])
+
+    report = run_benchmark(config, data_path, args.sizes, args.stages)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['comparison'] = compare_results(
+            report, baseline, float(bench['time_tolerance']), float(bench['memory_tolerance']),
+            float(bench['min_time_delta'])
+        )
+        report['comparison_baseline'] = args.baseline
+        regressions = [c for c in report['comparison'] if c['regression']]
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("\nРезультаты:")
+    for entry in report['results']:
+        rmse = f" RMSE {entry['test_rmse']:.4f}" if 'test_rmse' in entry else ""
+        print(f"  {entry['rows']:>10} {entry['stage']:<12} {entry.get('backend', ''):<30} "
+              f"{entry['seconds']:>10.4f} с {entry['peak_memory_mb']:>10.2f} МБ{rmse}")
+    print(f"Результаты сохранены в {output_path}")
+
+    if regressions:
+        print("\n⚠️  Регрессии относительно базовых результатов:")
+        for c in regressions:
+            print(f"  {c['rows']} {c['stage']} {c['backend'] or ''}: время x{c['time_ratio']}, память x{c['memory_ratio']}")
+        sys.exit(1)
+    elif args.baseline:
+        print("\n✅ Регрессий не обнаружено")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Единая командная строка pipeline: python -m scripts.cli <команда> [аргументы].
+
+Команды validate, train, evaluate, export, predict и registry передают свои аргументы
+функции main соответствующего скрипта. Модуль команды (и вместе с ним
+pandas, sklearn, matplotlib) импортируется только при ее запуске; сам
+модуль cli использует только стандартную библиотеку, поэтому `--help` и
+разбор аргументов не платят за импорт тяжелых библиотек. Внутри скриптов
+sklearn и matplotlib тоже импортируются там, где нужны: `evaluate
+--no-plots` не загружает matplotlib вовсе.
+
+Команда startup-check замеряет холодный старт в новых интерпретаторах —
+медиану времени `python -m scripts.cli --help` и импорта модуля каждой
+команды — и завершается с ошибкой при превышении бюджета из секции `cli`
+конфигурации или если тяжелые библиотеки загружаются раньше, чем нужны.
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Команда -> (модуль, имя этапа для замеров scripts/perf.py или None)
+COMMANDS = {
+    'validate': ('scripts.validate_data', 'validate_data'),
+    'train': ('scripts.train_model', 'train_model'),
+    'evaluate': ('scripts.evaluate_model', 'evaluate_model'),
+    'export': ('scripts.export_model', 'export_model'),
+    'diagnostics': ('scripts.diagnostics', 'plot_diagnostics'),
+    'predict': ('scripts.predict', None),
+    'registry': ('scripts.model_registry', None)
+}
+
+DEFAULT_CLI = {
+    'runs': 5,
+    'startup_budget_ms': 300,
+    'import_budget_ms': 1200
+}
+
+# Библиотеки, которые не должны загружаться при импорте модулей
+HEAVY_MODULES = ('pandas', 'sklearn', 'scipy', 'matplotlib', 'seaborn')
+_DEFERRED = {
+    'scripts.cli': HEAVY_MODULES,
+    **{module: ('sklearn', 'scipy', 'matplotlib', 'seaborn') for module, _ in COMMANDS.values()}
+}
+
+_IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed * 1000)
+print(' '.join(name for name in {deferred!r} if name in sys.modules))
+"""
+
+
+def _run_python(args: list) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def _median(values: list) -> float:
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def measure_startup(runs: int) -> float:
+    """Медиана времени `python -m scripts.cli --help` в новом интерпретаторе, мс."""
+    import time
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _run_python(['-m', 'scripts.cli', '--help'])
+        timings.append((time.perf_counter() - start) * 1000)
+    return _median(timings)
+
+
+def measure_import(module: str, runs: int) -> tuple:
+    """
+    Время импорта модуля в новом интерпретаторе.
+
+    Returns:
+        (медиана времени импорта в мс, загруженные раньше времени библиотеки)
+    """
+    timings, loaded = [], set()
+    for _ in range(runs):
+        probe = _IMPORT_PROBE.format(module=module, deferred=_DEFERRED[module])
+        lines = _run_python(['-c', probe]).stdout.splitlines()
+        timings.append(float(lines[0]))
+        loaded.update(lines[1].split() if len(lines) > 1 else [])
+    return _median(timings), sorted(loaded)
+
+
+def startup_check(settings: dict = None) -> dict:
+    """
+    Проверка бюджета холодного старта.
+
+    Args:
+        settings: Секция `cli` конфигурации
+
+    Returns:
+        Отчет: замеры, бюджеты и флаг `passed`
+    """
+    settings = dict(DEFAULT_CLI, **(settings or {}))
+    runs = int(settings['runs'])
+    startup_ms = measure_startup(runs)
+    cli_import_ms, cli_loaded = measure_import('scripts.cli', runs)
+    report = {
+        'runs': runs,
+        'startup_ms': startup_ms,
+        'startup_budget_ms': float(settings['startup_budget_ms']),
+        'import_budget_ms': float(settings['import_budget_ms']),
+        'imports': {'scripts.cli': {'import_ms': cli_import_ms, 'loaded': cli_loaded}}
+    }
+    for module, _ in COMMANDS.values():
+        import_ms, loaded = measure_import(module, runs)
+        report['imports'][module] = {'import_ms': import_ms, 'loaded': loaded}
+
+    report['passed'] = (
+        startup_ms <= report['startup_budget_ms']
+        and all(not entry['loaded'] for entry in report['imports'].values())
+        and all(
+            entry['import_ms'] <= report['import_budget_ms']
+            for module, entry in report['imports'].items() if module != 'scripts.cli'
+        )
+    )
+    return report
+
+
+def _print_startup_report(report: dict):
+    status = "✅" if report['startup_ms'] <= report['startup_budget_ms'] else "❌"
+    print(f"{status} Холодный старт cli --help: {report['startup_ms']:.0f} мс "
+          f"(бюджет {report['startup_budget_ms']:.0f} мс, медиана {report['runs']} запусков)")
+    for module, entry in report['imports'].items():
+        budget = None if module == 'scripts.cli' else report['import_budget_ms']
+        passed = not entry['loaded'] and (budget is None or entry['import_ms'] <= budget)
+        line = f"{'✅' if passed else '❌'} import {module}: {entry['import_ms']:.0f} мс"
+        if budget is not None:
+            line += f" (бюджет {budget:.0f} мс)"
+        if entry['loaded']:
+            line += f", загружены раньше времени: {', '.join(entry['loaded'])}"
+        print(line)
+
+
+def _startup_check(args) -> int:
+    import yaml
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        settings = dict((yaml.safe_load(f) or {}).get('cli') or {})
+    if args.runs is not None:
+        settings['runs'] = args.runs
+    report = startup_check(settings)
+    _print_startup_report(report)
+    return 0 if report['passed'] else 1
+
+
+def run_command(command: str, argv: list):
+    """Запуск main модуля команды с замерами этапа (если он есть в pipeline)."""
+    import importlib
+
+    module_name, stage_name = COMMANDS[command]
+    if stage_name is None:
+        return importlib.import_module(module_name).main(argv)
+
+    from scripts import perf
+    with perf.stage(stage_name):
+        return importlib.import_module(module_name).main(argv)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m scripts.cli",
+        description="ML pipeline Boston Housing"
+    )
+    commands = parser.add_subparsers(dest="command", required=True, metavar="команда")
+    helps = {
+        'validate': "валидация данных (scripts/validate_data.py)",
+        'train': "обучение модели (scripts/train_model.py)",
+        'evaluate': "оценка модели, --no-plots — без графиков (scripts/evaluate_model.py)",
+        'export': "компактный экспорт модели с проверкой (scripts/export_model.py)",
+        'diagnostics': "график диагностики остатков по гистограммам оценки (scripts/diagnostics.py)",
+        'predict': "предсказания для файла (scripts/predict.py)",
+        'registry': "запросы к реестру моделей (scripts/model_registry.py)"
+    }
+    for command, help_text in helps.items():
+        # Аргументы команды разбирает сам скрипт, поэтому `--help` после
+        # имени команды тоже передается ему
+        commands.add_parser(command, help=help_text, add_help=False)
+
+    check = commands.add_parser("startup-check", help="проверка бюджета холодного старта")
+    check.add_argument("--config", default="config/model_config.yaml", help="Путь к конфигурации")
+    check.add_argument("--runs", type=int, default=None, help="Число запусков для медианы")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    if args.command == 'startup-check':
+        if rest:
+            parser.error(f"unrecognized arguments: {' '.join(rest)}")
+        sys.exit(_startup_check(args))
+    run_command(args.command, rest)
+
+
+if __name__ == "__main__":
+    main()
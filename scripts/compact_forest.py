@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Компактный формат леса для инференса.
+
+Лес деревьев сжимается в директорию:
+
+    meta.json      - признаки, число деревьев, глубина, параметры сжатия,
+                     md5 исходного артефакта
+    feature.npy    - признак узла (uint8 при числе признаков до 256)
+    threshold.npy  - порог узла в float32, округленный вниз
+    children.npy   - пара потомков узла (int32; лист ссылается сам на себя)
+    value.npy      - значение листа в float32
+
+Узел занимает 17 байт вместо 72 в формате scikit-learn: статистики
+обучения (impurity, число строк) не сохраняются. Дополнительно значения
+листьев округляются до `leaf_decimals` знаков, деревья можно обрезать до
+глубины `max_depth` (узел на этой глубине становится листом со средним
+своих строк), а узлы, оба потомка которых — листья с одинаковым
+значением, сворачиваются в лист; свертка идет снизу вверх, поэтому
+поддерево с одним значением во всех листьях сворачивается целиком и
+предсказаний не меняет. Узлы упорядочены по уровням, корни деревьев —
+первые `n_trees` узлов. Загрузка дает `PackedForest` над отображенными в
+память массивами.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from scripts.packed_forest import PackedForest, float32_floor
+
+FORMAT = 'compact_forest'
+FORMAT_VERSION = 1
+ARRAYS = ('feature', 'threshold', 'children', 'value')
+MISSING_FILE = "missing_go_to_left.npy"
+
+_LEAF = -1
+
+
+def _levels(left: np.ndarray, right: np.ndarray, roots: np.ndarray) -> list:
+    """Узлы леса по уровням глубины (индексы во всех деревьях сразу)."""
+    levels = [roots]
+    while True:
+        current = levels[-1]
+        internal = current[left[current] != _LEAF]
+        if not len(internal):
+            return levels
+        levels.append(np.concatenate([left[internal], right[internal]]))
+
+
+def compact_forest(model, leaf_decimals: int = None, max_depth: int = None) -> tuple:
+    """
+    Сжатие обученного леса scikit-learn.
+
+    Args:
+        model: RandomForestRegressor или ExtraTreesRegressor
+        leaf_decimals: Знаков после запятой в значениях листьев (None — без округления)
+        max_depth: Глубина обрезки деревьев (None — без обрезки)
+
+    Returns:
+        (массивы компактного формата, статистика сжатия)
+    """
+    states = [est.tree_.__getstate__() for est in model.estimators_]
+    nodes = np.concatenate([state['nodes'] for state in states])
+    values = np.concatenate([state['values'] for state in states])
+    if values.shape[1:] != (1, 1):
+        raise ValueError("Поддерживаются только регрессоры с одним выходом")
+
+    sizes = np.array([state['node_count'] for state in states], dtype=np.int64)
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    offsets = np.repeat(roots, sizes)
+    is_leaf = nodes['left_child'] == _LEAF
+    left = np.where(is_leaf, _LEAF, nodes['left_child'] + offsets)
+    right = np.where(is_leaf, _LEAF, nodes['right_child'] + offsets)
+
+    # Обрезка: внутренние узлы на глубине max_depth становятся листьями
+    levels = _levels(left, right, roots)
+    n_truncated = 0
+    if max_depth is not None and len(levels) > max_depth + 1:
+        cut = levels[max_depth]
+        cut = cut[left[cut] != _LEAF]
+        left[cut] = right[cut] = _LEAF
+        n_truncated = len(cut)
+        levels = levels[:max_depth + 1]
+
+    value = values[:, 0, 0]
+    if leaf_decimals is not None:
+        value = np.round(value, int(leaf_decimals))
+    value = value.astype(np.float32)
+
+    # Свертка снизу вверх: потомки-листья с одинаковым значением
+    n_collapsed = 0
+    for level in reversed(levels[:-1]):
+        internal = level[left[level] != _LEAF]
+        left_child, right_child = left[internal], right[internal]
+        mergeable = (
+            (left[left_child] == _LEAF) & (left[right_child] == _LEAF)
+            & (value[left_child] == value[right_child])
+        )
+        merged = internal[mergeable]
+        value[merged] = value[left[merged]]
+        left[merged] = right[merged] = _LEAF
+        n_collapsed += len(merged)
+
+    # Оставшиеся узлы по уровням с новой нумерацией
+    levels = _levels(left, right, roots)
+    order = np.concatenate(levels)
+    index = np.full(len(nodes), _LEAF, dtype=np.int64)
+    index[order] = np.arange(len(order))
+    leaf = left[order] == _LEAF
+    own = np.arange(len(order), dtype=np.int64)
+
+    children = np.empty((len(order), 2), dtype=np.int32)
+    children[:, 0] = np.where(leaf, own, index[left[order]])
+    children[:, 1] = np.where(leaf, own, index[right[order]])
+    feature_dtype = np.uint8 if model.n_features_in_ <= 256 else np.int32
+    arrays = {
+        'feature': np.where(leaf, 0, nodes['feature'][order]).astype(feature_dtype),
+        'threshold': float32_floor(np.where(leaf, np.inf, nodes['threshold'][order])),
+        'children': children,
+        'value': np.where(leaf, value[order], np.float32(0))
+    }
+    if 'missing_go_to_left' in nodes.dtype.names and nodes['missing_go_to_left'][order].any():
+        arrays['missing_go_to_left'] = nodes['missing_go_to_left'][order].astype(bool)
+
+    stats = {
+        'n_trees': len(states),
+        'nodes_before': int(len(nodes)),
+        'nodes_after': int(len(order)),
+        'leaves_after': int(leaf.sum()),
+        'truncated_nodes': int(n_truncated),
+        'collapsed_nodes': int(n_collapsed),
+        'max_depth': len(levels) - 1
+    }
+    return arrays, stats
+
+
+def write_compact(directory: Path, arrays: dict, stats: dict, model, source_md5: str = None,
+                  leaf_decimals: int = None, max_depth: int = None):
+    """Запись массивов и метаданных компактного формата в директорию."""
+    directory = Path(directory)
+    for name in ARRAYS:
+        np.save(directory / f"{name}.npy", arrays[name])
+    if 'missing_go_to_left' in arrays:
+        np.save(directory / MISSING_FILE, arrays['missing_go_to_left'])
+
+    feature_names = getattr(model, 'feature_names_in_', None)
+    meta = {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'source_class': f"{type(model).__module__}.{type(model).__name__}",
+        'source_md5': source_md5,
+        'n_features_in_': int(model.n_features_in_),
+        'feature_names_in_': None if feature_names is None else [str(f) for f in feature_names],
+        'n_trees': stats['n_trees'],
+        'n_nodes': stats['nodes_after'],
+        'max_depth': stats['max_depth'],
+        'leaf_decimals': leaf_decimals,
+        'truncate_depth': max_depth
+    }
+    with open(directory / "meta.json", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+
+def load_compact(path: str, source_path: str = None) -> PackedForest:
+    """
+    Загрузка компактного леса как `PackedForest`.
+
+    Args:
+        path: Директория компактного формата
+        source_path: Артефакт полной модели; если задан, компактная модель
+            должна быть экспортирована именно из него
+    """
+    from scripts.model_artifact import artifact_md5, read_meta
+
+    path = Path(path)
+    meta = read_meta(path)
+    if meta.get('format') != FORMAT:
+        raise ValueError(f"{path} не содержит компактный лес (format={meta.get('format')})")
+    if source_path is not None and meta.get('source_md5') != artifact_md5(source_path):
+        raise ValueError(f"Компактная модель {path} экспортирована не из {source_path}, "
+                         f"запустите scripts/export_model.py")
+
+    arrays = {name: np.load(path / f"{name}.npy", mmap_mode='r') for name in ARRAYS}
+    missing = None
+    if (path / MISSING_FILE).exists():
+        missing = np.load(path / MISSING_FILE, mmap_mode='r')
+    return PackedForest(
+        arrays['feature'], arrays['threshold'], arrays['children'],
+        np.asarray(arrays['value'], dtype=np.float64),
+        np.arange(meta['n_trees'], dtype=np.int32), meta['max_depth'],
+        feature_names=meta.get('feature_names_in_'), missing_go_to_left=missing
+    )
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Повторная k-блочная кросс-валидация для проверки качества в train_model.
+
+Номера блоков для всех повторов (`RepeatedKFold`) считаются один раз и
+вместе с данными копируются в общую память; воркеры пула процессов
+только читают их и обучают модель на своих задачах (повтор, блок).
+Отчет содержит метрики каждого блока и их среднее, стандартное
+отклонение и доверительный интервал. Блоки повторной кросс-валидации
+пересекаются по обучающим строкам, поэтому дисперсия среднего
+поправляется по Nadeau–Bengio: (1/J + n_test/n_train) * s², где J — число
+блоков. Порог качества (`gate`) проверяется по метрикам отложенной
+выборки (`holdout`, как без кросс-валидации), по средним блоков (`mean`)
+или по пессимистичной границе интервала — нижней для R², верхней для
+RMSE (`lower_bound`).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scripts.shared_arrays import SharedArrays, attach
+from scripts.sweep import plan_workers
+
+DEFAULT_CROSS_VALIDATION = {
+    'k': 5,
+    'repeats': 2,
+    'random_state': 42,
+    'n_workers': None,
+    'confidence': 0.95,
+    'gate': 'lower_bound'
+}
+
+GATES = ('holdout', 'mean', 'lower_bound')
+
+# Метрики, для которых большее значение лучше
+_MAXIMIZE = {'r2'}
+
+_WORKER = {}
+
+
+def fold_assignments(n_samples: int, k: int, repeats: int, random_state: int) -> np.ndarray:
+    """Номер тестового блока каждой строки для каждого повтора (repeats x n_samples)."""
+    from sklearn.model_selection import RepeatedKFold
+
+    folds = np.empty((repeats, n_samples), dtype=np.int16)
+    splitter = RepeatedKFold(n_splits=k, n_repeats=repeats, random_state=random_state)
+    for index, (_, test_index) in enumerate(splitter.split(np.empty((n_samples, 1)))):
+        folds[index // k, test_index] = index % k
+    return folds
+
+
+def _init_worker(spec: dict, feature_names: list):
+    import pandas as pd
+
+    arrays = attach(spec)
+    _WORKER['X'] = pd.DataFrame(arrays['X'], columns=feature_names, copy=False)
+    _WORKER['y'] = arrays['y']
+    _WORKER['folds'] = arrays['folds']
+
+
+def _fit_fold(task: tuple) -> dict:
+    from scripts.estimators import thread_budget
+    from scripts.train_model import build_model, evaluate_model
+
+    repeat, fold, config, params = task
+    test = _WORKER['folds'][repeat] == fold
+    X, y = _WORKER['X'], _WORKER['y']
+    model = build_model(config, params)
+    with thread_budget(model, 1):
+        model.fit(X[~test], y[~test])
+    return {
+        'repeat': repeat,
+        'fold': fold,
+        'test_size': int(test.sum()),
+        'metrics': evaluate_model(model, X[test], y[test])
+    }
+
+
+def aggregate(folds: list, k: int, confidence: float) -> dict:
+    """Среднее, стандартное отклонение и интервал с поправкой Nadeau–Bengio."""
+    from scipy import stats
+
+    n_folds = len(folds)
+    test_fraction = 1 / k
+    correction = 1 / n_folds + test_fraction / (1 - test_fraction)
+    quantile = stats.t.ppf((1 + confidence) / 2, n_folds - 1) if n_folds > 1 else 0.0
+    result = {}
+    for name in folds[0]['metrics']:
+        values = np.array([entry['metrics'][name] for entry in folds])
+        mean = float(np.mean(values))
+        std = float(np.std(values, ddof=1)) if n_folds > 1 else 0.0
+        half_width = float(quantile * np.sqrt(correction) * std)
+        result[name] = {
+            'mean': mean,
+            'std': std,
+            'ci_low': mean - half_width,
+            'ci_high': mean + half_width
+        }
+    return result
+
+
+def gate_metrics(summary: dict, gate: str):
+    """
+    Метрики для проверки порогов.
+
+    Returns:
+        None для `holdout` (проверяются метрики отложенной выборки),
+        средние по блокам для `mean`, пессимистичные границы интервалов
+        для `lower_bound`
+    """
+    if gate not in GATES:
+        raise ValueError(f"Неизвестный режим проверки {gate!r}, доступны: {list(GATES)}")
+    if gate == 'holdout':
+        return None
+    if gate == 'mean':
+        return {name: stats['mean'] for name, stats in summary.items()}
+    return {
+        name: stats['ci_low'] if name in _MAXIMIZE else stats['ci_high']
+        for name, stats in summary.items()
+    }
+
+
+def cross_validate(X, y, config: dict, params: dict = None) -> dict:
+    """
+    Повторная k-блочная кросс-валидация параметров модели в пуле процессов.
+
+    Args:
+        X, y: Все данные
+        config: Конфигурация модели (секция `cross_validation`)
+        params: Параметры модели (по умолчанию `model.params`)
+
+    Returns:
+        Секция `cross_validation` отчета об обучении
+    """
+    settings = dict(DEFAULT_CROSS_VALIDATION, **(config.get('cross_validation') or {}))
+    if settings['gate'] not in GATES:
+        raise ValueError(f"Неизвестный режим проверки {settings['gate']!r}, доступны: {list(GATES)}")
+    k, repeats = int(settings['k']), int(settings['repeats'])
+    confidence = float(settings['confidence'])
+    params = dict(config['model']['params'] if params is None else params)
+
+    folds = fold_assignments(len(X), k, repeats, int(settings['random_state']))
+    tasks = [(repeat, fold, config, params) for repeat in range(repeats) for fold in range(k)]
+    n_workers = plan_workers(len(tasks), 1, settings['n_workers'])
+    print(f"Кросс-валидация: {k} блоков x {repeats} повторов, {n_workers} процессов")
+
+    arrays = {
+        'X': X.to_numpy(dtype=np.float32),
+        'y': np.asarray(y, dtype=np.float64),
+        'folds': folds
+    }
+    with SharedArrays(arrays) as shared:
+        del arrays
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(shared.spec, list(X.columns))
+        ) as pool:
+            results = list(pool.map(_fit_fold, tasks))
+
+    summary = aggregate(results, k, confidence)
+    return {
+        'k': k,
+        'repeats': repeats,
+        'random_state': int(settings['random_state']),
+        'confidence': confidence,
+        'gate': settings['gate'],
+        'folds': results,
+        'aggregate': summary,
+        'gate_metrics': gate_metrics(summary, settings['gate'])
+    }
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Общий модуль доступа к данным Boston Housing.
+
+Колонки, их типы в памяти, допустимые диапазоны и роли (признак или
+целевая переменная) описаны в секции `schema` конфигурации
+`config/model_config.yaml`. Загрузчик приводит каждую колонку к типу
+из схемы (например, float32 для непрерывных признаков и int8 для CHAS
+и RAD) и сразу завершается ошибкой `SchemaError`, если значения не
+представимы в этом типе.
+
+Текстовый файл с разделителями-пробелами разбирается один раз и
+сохраняется в бинарный колоночный кеш (по файлу на колонку). Кеш
+адресуется md5 содержимого файла — тем же значением, что DVC записывает
+в `data/housing.csv.dvc`, — поэтому все этапы pipeline читают данные
+через memory-map вместо повторного разбора текста.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+SCHEMA_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "model_config.yaml"
+SCHEMA_DTYPES = ('float32', 'float64', 'int8', 'int16', 'int32', 'int64')
+SCHEMA_ROLES = ('feature', 'target')
+
+CACHE_DIR = Path(".cache") / "datasets"
+CHUNK_SIZE = 1_000_000
+_HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+class SchemaError(ValueError):
+    """Данные не соответствуют схеме (или сама схема некорректна)."""
+
+
+class Schema:
+    """
+    Схема датасета: порядок колонок файла, типы, диапазоны и роли.
+
+    Args:
+        columns: Список {name, dtype, role, min, max} в порядке колонок файла
+    """
+
+    def __init__(self, columns: list):
+        if not columns:
+            raise SchemaError("Схема не содержит колонок")
+        self.specs = {}
+        for spec in columns:
+            name = spec['name']
+            if name in self.specs:
+                raise SchemaError(f"Колонка {name} описана в схеме дважды")
+            dtype = spec.get('dtype', 'float64')
+            role = spec.get('role', 'feature')
+            if dtype not in SCHEMA_DTYPES:
+                raise SchemaError(f"Колонка {name}: неподдерживаемый тип {dtype} (допустимы {SCHEMA_DTYPES})")
+            if role not in SCHEMA_ROLES:
+                raise SchemaError(f"Колонка {name}: неизвестная роль {role}")
+            self.specs[name] = {'dtype': dtype, 'role': role, 'min': spec.get('min'), 'max': spec.get('max')}
+
+        targets = [name for name, spec in self.specs.items() if spec['role'] == 'target']
+        if len(targets) != 1:
+            raise SchemaError(f"В схеме должна быть ровно одна целевая колонка, найдено {len(targets)}")
+        self.columns = list(self.specs)
+        self.target = targets[0]
+        self.features = [name for name in self.columns if name != self.target]
+        self.dtypes = {name: np.dtype(spec['dtype']) for name, spec in self.specs.items()}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "Schema":
+        """Схема из секции `schema` конфигурации (без секции — схема по умолчанию)."""
+        section = (config or {}).get('schema')
+        if not section:
+            return default_schema()
+        return cls(section['columns'])
+
+    def ranges(self) -> dict:
+        """Объявленные диапазоны: {колонка: (min или None, max или None)}."""
+        return {
+            name: (spec['min'], spec['max'])
+            for name, spec in self.specs.items()
+            if spec['min'] is not None or spec['max'] is not None
+        }
+
+    def key(self) -> str:
+        """Короткий хеш схемы для ключа бинарного кеша."""
+        canonical = json.dumps(list(self.specs.items()), sort_keys=True)
+        return hashlib.md5(canonical.encode('utf-8')).hexdigest()[:12]
+
+    def apply(self, df: pd.DataFrame, features_only: bool = False) -> pd.DataFrame:
+        """
+        Именование колонок и приведение к типам схемы с проверкой значений.
+
+        С `features_only` ожидаются только колонки признаков (данные для
+        предсказания без целевой переменной).
+        """
+        columns = self.features if features_only else self.columns
+        if df.shape[1] != len(columns):
+            raise SchemaError(
+                f"Ожидалось {len(columns)} колонок, получено {df.shape[1]}"
+            )
+        return pd.DataFrame({
+            name: _convert_column(df.iloc[:, i], name, self.dtypes[name])
+            for i, name in enumerate(columns)
+        }, copy=False)
+
+
+def _convert_column(values: pd.Series, name: str, dtype: np.dtype) -> np.ndarray:
+    if not pd.api.types.is_numeric_dtype(values):
+        raise SchemaError(f"Колонка {name}: нечисловые значения ({values.dtype})")
+    array = values.to_numpy()
+    if dtype.kind == 'i' and array.dtype.kind == 'f':
+        if np.isnan(array).any():
+            raise SchemaError(f"Колонка {name}: пропуски в целочисленной колонке ({dtype})")
+        if (array != np.round(array)).any():
+            raise SchemaError(f"Колонка {name}: нецелые значения в колонке типа {dtype}")
+    if dtype.kind == 'i' and len(array):
+        bounds = np.iinfo(dtype)
+        if array.min() < bounds.min or array.max() > bounds.max:
+            raise SchemaError(f"Колонка {name}: значения вне диапазона типа {dtype}")
+    return array.astype(dtype, copy=False)
+
+
+@functools.lru_cache(maxsize=None)
+def default_schema() -> Schema:
+    """Схема из `config/model_config.yaml` репозитория."""
+    with open(SCHEMA_CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    return Schema(config['schema']['columns'])
+
+
+COLUMN_NAMES = default_schema().columns
+TARGET_COLUMN = default_schema().target
+FEATURE_COLUMNS = default_schema().features
+
+
+def read_csv_text(data_path, schema: Schema = None) -> pd.DataFrame:
+    """Разбор исходного текстового файла без кеша."""
+    schema = schema or default_schema()
+    return schema.apply(pd.read_csv(data_path, sep=r'\s+', header=None))
+
+
+def iter_csv_chunks(data_path, chunksize: int = CHUNK_SIZE, offset: int = 0, schema: Schema = None):
+    """
+    Потоковое чтение текстового файла блоками фиксированного размера.
+
+    `offset` — байтовое смещение начала чтения; должно указывать на
+    начало строки (используется для чтения дописанного хвоста файла).
+    """
+    schema = schema or default_schema()
+    with open(data_path, 'rb') as f:
+        f.seek(offset)
+        if not f.peek(1):
+            return
+        reader = pd.read_csv(f, sep=r'\s+', header=None, chunksize=chunksize)
+        with reader:
+            for chunk in reader:
+                yield schema.apply(chunk)
+
+
+def file_md5(path) -> str:
+    """md5 содержимого файла (совпадает с хешем в .dvc файле)."""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def block_hashes(path, size: int, known: list = None, known_size: int = 0) -> list:
+    """
+    md5 каждого блока по 8 МБ первых `size` байт файла (последний блок
+    может быть неполным).
+
+    Используется для проверки, что новая версия файла лишь дописана к уже
+    обработанной: сравниваются хеши всех блоков префикса, поэтому
+    изменение любого байта в нем обнаруживается. Хеширование дешевле
+    разбора текста, который оно позволяет пропустить.
+
+    Args:
+        path: Файл
+        size: Длина хешируемого префикса в байтах
+        known: Уже проверенные хеши блоков первых `known_size` байт; полные
+            блоки из них не перечитываются
+        known_size: Длина префикса, к которому относятся `known`
+    """
+    block = _HASH_BLOCK_SIZE
+    n_reused = min(len(known or []), known_size // block, size // block)
+    hashes = list(known or [])[:n_reused]
+    position = n_reused * block
+    with open(path, 'rb') as f:
+        f.seek(position)
+        while position < size:
+            data = f.read(min(block, size - position))
+            if not data:
+                raise ValueError(f"{path} короче {size} байт")
+            hashes.append(hashlib.md5(data).hexdigest())
+            position += len(data)
+    return hashes
+
+
+def dvc_recorded_md5(data_path):
+    """md5, записанный DVC в `<data_path>.dvc`, или None."""
+    dvc_path = Path(f"{data_path}.dvc")
+    if not dvc_path.exists():
+        return None
+
+    with open(dvc_path, 'r', encoding='utf-8') as f:
+        meta = yaml.safe_load(f) or {}
+    for out in meta.get('outs', []):
+        if out.get('path') == Path(data_path).name:
+            return out.get('md5')
+    return None
+
+
+def dataset_md5(data_path, cache_dir=None) -> str:
+    """
+    md5 файла данных.
+
+    Полное хеширование выполняется только при изменении размера или
+    mtime файла; результат запоминается в индексе кеша, как это делает
+    state-база DVC.
+    """
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    index_path = cache_dir / "index.json"
+    stat = os.stat(data_path)
+    key = str(Path(data_path).resolve())
+
+    index = {}
+    if index_path.exists():
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+
+    entry = index.get(key)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['md5']
+
+    md5 = file_md5(data_path)
+    recorded = dvc_recorded_md5(data_path)
+    if recorded and recorded != md5:
+        print(f"⚠️  {data_path} отличается от версии в {data_path}.dvc (dvc status)")
+
+    index[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'md5': md5}
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return md5
+
+
+def build_cache(data_path, cache_path, chunksize: int = CHUNK_SIZE, schema: Schema = None) -> dict:
+    """
+    Конвертация текстового файла в колоночный бинарный кеш.
+
+    Файл читается блоками, каждая колонка дописывается в свой `.bin`
+    файл в типе из схемы, поэтому пиковая память ограничена размером
+    блока.
+    """
+    schema = schema or default_schema()
+    cache_path = Path(cache_path)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    n_rows = 0
+    files = {}
+    try:
+        files = {col: open(tmp_path / f"{col}.bin", 'wb') for col in schema.columns}
+        for chunk in iter_csv_chunks(data_path, chunksize, schema=schema):
+            for col in schema.columns:
+                chunk[col].to_numpy().tofile(files[col])
+            n_rows += len(chunk)
+    except BaseException:
+        for f in files.values():
+            f.close()
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    for f in files.values():
+        f.close()
+
+    meta = {
+        'source': str(data_path),
+        'md5': cache_path.name.split('-')[0],
+        'rows': n_rows,
+        'columns': schema.columns,
+        'dtypes': {col: str(schema.dtypes[col]) for col in schema.columns}
+    }
+    with open(tmp_path / "meta.json", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    try:
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Кеш уже собран параллельным процессом
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return meta
+
+
+def _open_cache(cache_path: Path) -> pd.DataFrame:
+    with open(cache_path / "meta.json", 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+
+    columns = {}
+    for col in meta['columns']:
+        dtype = np.dtype(meta['dtypes'][col])
+        if meta['rows'] == 0:
+            columns[col] = np.empty(0, dtype=dtype)
+        else:
+            columns[col] = np.memmap(
+                cache_path / f"{col}.bin", dtype=dtype, mode='r', shape=(meta['rows'],)
+            )
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_dataframe(data_path: str, use_cache: bool = True, cache_dir=None,
+                   schema: Schema = None) -> pd.DataFrame:
+    """
+    Загрузка полного датасета с колонками и типами из схемы.
+
+    При первом обращении к версии файла строится бинарный кеш, далее
+    колонки отображаются в память напрямую из кеша. Ключ кеша — md5
+    файла и хеш схемы, поэтому изменение типов в схеме пересобирает кеш.
+    """
+    schema = schema or default_schema()
+    if not use_cache:
+        return read_csv_text(data_path, schema)
+
+    md5 = dataset_md5(data_path, cache_dir)
+    cache_path = Path(cache_dir or CACHE_DIR) / f"{md5}-{schema.key()}"
+    if not (cache_path / "meta.json").exists():
+        build_cache(data_path, cache_path, schema=schema)
+    return _open_cache(cache_path)
+
+
+def load_data(data_path: str, use_cache: bool = True, schema: Schema = None) -> tuple:
+    """Загрузка данных с разделением на признаки и целевую переменную."""
+    schema = schema or default_schema()
+    print(f"Загрузка данных из {data_path}...")
+    df = load_dataframe(data_path, use_cache=use_cache, schema=schema)
+
+    X = df[schema.features]
+    y = df[schema.target]
+
+    return X, y
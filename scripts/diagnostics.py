@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Диагностические графики остатков по агрегированным гистограммам.
+
+При оценке модели (scripts/evaluate_model.py) каждый блок предсказаний
+раскладывается по двумерным гистограммам фиксированного размера:
+
+    actual_predicted   - факт x прогноз (bins x bins)
+    residual_predicted - прогноз x остаток (bins x residual_bins)
+    residual_feature   - признак x значение x остаток
+                         (n_features x bins x residual_bins)
+
+Остаток — `y - прогноз`, как в метриках оценки. Номера ячеек считаются
+векторно для всего блока, счетчики набираются одним `np.bincount` на
+гистограмму; гистограммы блоков складываются, поэтому результат не
+зависит от размера блоков и числа потоков. Границы осей — min/max
+колонок из отчета валидации (или один проход по данным), остатки — в
+пределах ±размаха целевой переменной; значения за границами попадают в
+крайние ячейки и учитываются в `clipped`.
+
+Гистограммы сохраняются в npz (`diagnostics.output`), и график строится
+по ним без модели и предсказаний, поэтому время построения и размер PNG
+не зависят от числа строк. Запуск отдельно:
+
+    python scripts/diagnostics.py [--input reports/diagnostics.npz] [--output reports/diagnostics.png]
+"""
+
+import json
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts import perf
+
+DEFAULT_DIAGNOSTICS = {
+    'enabled': True,
+    'bins': 64,
+    'residual_bins': 256,
+    'residual_range': None,
+    'output': 'reports/diagnostics.npz',
+    'plot': 'reports/diagnostics.png'
+}
+
+VALIDATION_REPORT_PATH = "reports/data_validation_report.json"
+FORMAT_VERSION = 1
+
+# Доля строк на оси остатков, которая показывается на графиках
+DISPLAY_SHARE = 0.999
+PLOT_COLUMNS = 4
+PLOT_DPI = 100
+
+
+def _bin_index(values: np.ndarray, low, high, n_bins: int) -> tuple:
+    """
+    Номера равных ячеек на отрезке [low, high] и маска значений вне него.
+
+    Значения вне отрезка (и NaN) попадают в крайние ячейки. `low` и `high`
+    могут быть массивами по последней оси `values` (по признаку на колонку).
+    """
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    width = np.where(high > low, (high - low) / n_bins, 1.0)
+    scaled = np.floor((values - low) / width)
+    outside = ~((values >= low) & (values <= high))
+    index = np.clip(np.nan_to_num(scaled, nan=0.0), 0, n_bins - 1).astype(np.intp)
+    return index, outside
+
+
+def _edges(low: float, high: float, n_bins: int) -> np.ndarray:
+    if high <= low:
+        high = low + n_bins
+    return np.linspace(low, high, n_bins + 1)
+
+
+class DiagnosticsHistogram:
+    """
+    Сливаемые двумерные гистограммы прогнозов и остатков.
+
+    Args:
+        feature_names: Имена признаков (порядок колонок блоков)
+        target: Имя целевой переменной
+        feature_range: Массив (n_features, 2) границ признаков
+        target_range: Границы целевой переменной (и прогноза)
+        residual_range: Границы остатков
+        bins: Ячеек по осям значений
+        residual_bins: Ячеек по оси остатков
+    """
+
+    COUNTS = ('actual_predicted', 'residual_predicted', 'residual_feature')
+
+    def __init__(self, feature_names, target: str, feature_range, target_range, residual_range,
+                 bins: int = DEFAULT_DIAGNOSTICS['bins'],
+                 residual_bins: int = DEFAULT_DIAGNOSTICS['residual_bins']):
+        self.feature_names = [str(name) for name in feature_names]
+        self.target = str(target)
+        self.feature_range = np.asarray(feature_range, dtype=np.float64).reshape(-1, 2)
+        self.target_range = np.asarray(target_range, dtype=np.float64)
+        self.residual_range = np.asarray(residual_range, dtype=np.float64)
+        self.bins = int(bins)
+        self.residual_bins = int(residual_bins)
+        if len(self.feature_range) != len(self.feature_names):
+            raise ValueError("Число границ признаков не совпадает с числом признаков")
+
+        n_features = len(self.feature_names)
+        self.count = 0
+        self.actual_predicted = np.zeros((self.bins, self.bins), dtype=np.int64)
+        self.residual_predicted = np.zeros((self.bins, self.residual_bins), dtype=np.int64)
+        self.residual_feature = np.zeros((n_features, self.bins, self.residual_bins), dtype=np.int64)
+        self.clipped = {
+            'actual': 0,
+            'predicted': 0,
+            'residual': 0,
+            'features': np.zeros(n_features, dtype=np.int64)
+        }
+
+    def empty_like(self) -> 'DiagnosticsHistogram':
+        """Пустые гистограммы с теми же осями (для блока в потоке)."""
+        return DiagnosticsHistogram(
+            self.feature_names, self.target, self.feature_range, self.target_range,
+            self.residual_range, self.bins, self.residual_bins
+        )
+
+    def update(self, X, y_true, y_pred):
+        """Добавление блока: признаки, факт и прогноз."""
+        features = np.asarray(X, dtype=np.float64)
+        actual = np.asarray(y_true, dtype=np.float64)
+        predicted = np.asarray(y_pred, dtype=np.float64)
+        residual = actual - predicted
+        bins, residual_bins = self.bins, self.residual_bins
+
+        actual_bin, actual_out = _bin_index(actual, *self.target_range, bins)
+        predicted_bin, predicted_out = _bin_index(predicted, *self.target_range, bins)
+        residual_bin, residual_out = _bin_index(residual, *self.residual_range, residual_bins)
+        feature_bin, feature_out = _bin_index(
+            features, self.feature_range[:, 0], self.feature_range[:, 1], bins
+        )
+
+        self.actual_predicted += np.bincount(
+            actual_bin * bins + predicted_bin, minlength=bins * bins
+        ).reshape(bins, bins)
+        self.residual_predicted += np.bincount(
+            predicted_bin * residual_bins + residual_bin, minlength=bins * residual_bins
+        ).reshape(bins, residual_bins)
+        # Все признаки одним bincount: ячейка = (признак, значение, остаток)
+        offsets = np.arange(len(self.feature_names)) * bins
+        cells = (feature_bin + offsets) * residual_bins + residual_bin[:, None]
+        self.residual_feature += np.bincount(
+            cells.ravel(), minlength=self.residual_feature.size
+        ).reshape(self.residual_feature.shape)
+
+        self.count += len(actual)
+        self.clipped['actual'] += int(actual_out.sum())
+        self.clipped['predicted'] += int(predicted_out.sum())
+        self.clipped['residual'] += int(residual_out.sum())
+        self.clipped['features'] += feature_out.sum(axis=0)
+
+    def _axes(self) -> tuple:
+        return (
+            self.feature_names, self.target, self.feature_range.tolist(),
+            self.target_range.tolist(), self.residual_range.tolist(),
+            self.bins, self.residual_bins
+        )
+
+    def merge(self, other: 'DiagnosticsHistogram'):
+        """Слияние гистограмм с теми же осями."""
+        if self._axes() != other._axes():
+            raise ValueError("Гистограммы построены на разных осях и не сливаются")
+        self.count += other.count
+        for name in self.COUNTS:
+            getattr(self, name)[...] += getattr(other, name)
+        for name in ('actual', 'predicted', 'residual'):
+            self.clipped[name] += other.clipped[name]
+        self.clipped['features'] += other.clipped['features']
+
+    def residual_distribution(self) -> np.ndarray:
+        """Распределение остатков (сумма по оси прогноза)."""
+        return self.residual_predicted.sum(axis=0)
+
+    def edges(self) -> dict:
+        """Границы ячеек по осям целевой переменной, остатков и признаков."""
+        return {
+            'target': _edges(*self.target_range, self.bins),
+            'residual': _edges(*self.residual_range, self.residual_bins),
+            'features': [_edges(low, high, self.bins) for low, high in self.feature_range]
+        }
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'bins': self.bins,
+            'residual_bins': self.residual_bins,
+            'clipped': {
+                'actual': self.clipped['actual'],
+                'predicted': self.clipped['predicted'],
+                'residual': self.clipped['residual'],
+                'features': dict(zip(self.feature_names, self.clipped['features'].tolist()))
+            }
+        }
+
+    def save(self, path: str):
+        """Запись гистограмм и осей в npz."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                format_version=FORMAT_VERSION,
+                feature_names=np.array(self.feature_names),
+                target=np.array(self.target),
+                feature_range=self.feature_range,
+                target_range=self.target_range,
+                residual_range=self.residual_range,
+                count=self.count,
+                clipped=np.array([self.clipped[name] for name in ('actual', 'predicted', 'residual')]),
+                clipped_features=self.clipped['features'],
+                **{name: getattr(self, name) for name in self.COUNTS}
+            )
+
+    @classmethod
+    def load(cls, path: str) -> 'DiagnosticsHistogram':
+        """Загрузка гистограмм, сохраненных `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"{path}: неподдерживаемая версия формата {int(data['format_version'])}")
+            counts = data['residual_feature']
+            hist = cls(
+                data['feature_names'].tolist(), str(data['target']), data['feature_range'],
+                data['target_range'], data['residual_range'], counts.shape[1], counts.shape[2]
+            )
+            hist.count = int(data['count'])
+            for name in cls.COUNTS:
+                setattr(hist, name, data[name].astype(np.int64))
+            actual, predicted, residual = (int(value) for value in data['clipped'])
+            hist.clipped = {
+                'actual': actual,
+                'predicted': predicted,
+                'residual': residual,
+                'features': data['clipped_features'].astype(np.int64)
+            }
+        return hist
+
+
+def read_statistics(report_path: str = VALIDATION_REPORT_PATH) -> dict:
+    """Статистики колонок из отчета валидации (пустой словарь, если отчета нет)."""
+    if not Path(report_path).exists():
+        return {}
+    with open(report_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('summary', {}).get('statistics', {})
+
+
+def axis_ranges(columns, statistics: dict = None, chunks=None) -> dict:
+    """
+    Границы (min, max) колонок для осей гистограмм.
+
+    Берутся из статистик отчета валидации; если в них нет какой-то
+    колонки, границы всех колонок считаются одним проходом по блокам
+    `chunks` (итератор DataFrame с этими колонками).
+    """
+    statistics = statistics or {}
+    minimum, maximum = statistics.get('min') or {}, statistics.get('max') or {}
+    if all(column in minimum and column in maximum for column in columns):
+        return {column: (float(minimum[column]), float(maximum[column])) for column in columns}
+    if chunks is None:
+        raise ValueError("Нет статистик колонок для границ гистограмм")
+
+    low = np.full(len(columns), np.inf)
+    high = np.full(len(columns), -np.inf)
+    for chunk in chunks:
+        values = chunk[list(columns)].to_numpy(dtype=np.float64)
+        if len(values):
+            low = np.fmin(low, np.nanmin(values, axis=0))
+            high = np.fmax(high, np.nanmax(values, axis=0))
+    return {column: (float(lo), float(hi)) for column, lo, hi in zip(columns, low, high)}
+
+
+def build_histogram(feature_names, target: str, ranges: dict, settings: dict) -> DiagnosticsHistogram:
+    """Пустые гистограммы по границам колонок и секции `diagnostics` конфигурации."""
+    settings = dict(DEFAULT_DIAGNOSTICS, **(settings or {}))
+    target_low, target_high = ranges[target]
+    residual_range = settings['residual_range']
+    if residual_range is None:
+        residual_range = (target_high - target_low) or 1.0
+    return DiagnosticsHistogram(
+        feature_names, target, [ranges[name] for name in feature_names],
+        (target_low, target_high), (-float(residual_range), float(residual_range)),
+        settings['bins'], settings['residual_bins']
+    )
+
+
+def _display_range(counts: np.ndarray, share: float = DISPLAY_SHARE) -> tuple:
+    """Индексы первой и последней показываемых ячеек (центральная доля `share`)."""
+    total = counts.sum()
+    if not total:
+        return 0, len(counts) - 1
+    cumulative = np.cumsum(counts) / total
+    tail = (1 - share) / 2
+    first = int(np.searchsorted(cumulative, tail, side='right'))
+    last = int(np.searchsorted(cumulative, 1 - tail, side='left'))
+    return max(first - 1, 0), min(last + 1, len(counts) - 1)
+
+
+def render(hist: DiagnosticsHistogram, output_path: str, columns: int = PLOT_COLUMNS):
+    """
+    График диагностики по гистограммам: факт/прогноз, остаток/прогноз,
+    распределение остатков и остаток/признак для каждого признака.
+
+    Клетки — двумерные гистограммы в логарифмической шкале числа строк,
+    ось остатков обрезана до центральных DISPLAY_SHARE строк. Размер фигуры
+    зависит только от числа признаков.
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # Для работы без GUI
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    if not hist.count:
+        raise ValueError("Гистограммы пусты: нет оцененных строк")
+    edges = hist.edges()
+    distribution = hist.residual_distribution()
+    first, last = _display_range(distribution)
+    residual_limits = (edges['residual'][first], edges['residual'][last + 1])
+    norm = LogNorm(vmin=1, vmax=max(hist.actual_predicted.max(), hist.residual_predicted.max(),
+                                    hist.residual_feature.max(), 1))
+
+    def heatmap(ax, x_edges, y_edges, counts, xlabel, ylabel):
+        # Ячейки равные, поэтому гистограмма рисуется одним изображением
+        mesh = ax.imshow(np.ma.masked_equal(counts, 0).T, origin='lower', aspect='auto',
+                         interpolation='nearest', norm=norm, cmap='viridis',
+                         extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]))
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        return mesh
+
+    n_panels = 3 + len(hist.feature_names)
+    rows = math.ceil(n_panels / columns)
+    fig, axes = plt.subplots(rows, columns, figsize=(4 * columns, 3.4 * rows), squeeze=False)
+    # Поля задаются явно: автоматическая раскладка дольше самой отрисовки
+    fig.subplots_adjust(left=0.05, right=0.9, bottom=0.05, top=0.93, wspace=0.35, hspace=0.45)
+    axes = axes.ravel()
+
+    ax = axes[0]
+    mesh = heatmap(ax, edges['target'], edges['target'], hist.actual_predicted,
+                   f"Факт ({hist.target})", "Прогноз")
+    ax.plot(hist.target_range, hist.target_range, color='red', linewidth=1)
+    ax.set_title("Прогноз vs факт")
+
+    ax = axes[1]
+    heatmap(ax, edges['target'], edges['residual'], hist.residual_predicted, "Прогноз", "Остаток")
+    ax.axhline(0, color='red', linewidth=1)
+    ax.set_ylim(residual_limits)
+    ax.set_title("Остатки vs прогноз")
+
+    ax = axes[2]
+    ax.stairs(distribution, edges['residual'], fill=True)
+    ax.axvline(0, color='red', linewidth=1)
+    ax.set_xlim(residual_limits)
+    ax.set_xlabel("Остаток")
+    ax.set_ylabel("Строк")
+    ax.set_title("Распределение остатков")
+
+    for i, name in enumerate(hist.feature_names):
+        ax = axes[3 + i]
+        heatmap(ax, edges['features'][i], edges['residual'], hist.residual_feature[i], name, "Остаток")
+        ax.axhline(0, color='red', linewidth=0.8)
+        ax.set_ylim(residual_limits)
+        ax.set_title(f"Остатки vs {name}")
+    for ax in axes[n_panels:]:
+        ax.axis('off')
+
+    clipped = hist.clipped['residual']
+    fig.suptitle(f"Диагностика остатков: {hist.count} строк, остатков за границами оси: {clipped}")
+    fig.colorbar(mesh, cax=fig.add_axes((0.92, 0.3, 0.015, 0.4)), label="Строк в ячейке")
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(output_path, dpi=PLOT_DPI)
+    plt.close(fig)
+    print(f"График диагностики сохранен в {output_path}")
+
+
+def load_settings(config_path: str = "config/model_config.yaml") -> dict:
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    return dict(DEFAULT_DIAGNOSTICS, **(config.get('diagnostics') or {}))
+
+
+def main(argv=None):
+    import argparse
+
+    settings = load_settings()
+    parser = argparse.ArgumentParser(
+        description="График диагностики остатков по сохраненным гистограммам"
+    )
+    parser.add_argument("--input", default=settings['output'],
+                        help=f"Гистограммы этапа оценки (по умолчанию {settings['output']})")
+    parser.add_argument("--output", default=settings['plot'],
+                        help=f"PNG графика (по умолчанию {settings['plot']})")
+    args = parser.parse_args(argv)
+
+    if not Path(args.input).exists():
+        print(f"❌ Нет гистограмм {args.input}: сначала запустите scripts/evaluate_model.py")
+        sys.exit(1)
+    with perf.phase("load"):
+        hist = DiagnosticsHistogram.load(args.input)
+    with perf.phase("render"):
+        render(hist, args.output)
+
+
+if __name__ == "__main__":
+    with perf.stage("plot_diagnostics"):
+        main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Адаптивное обучение леса с ранней остановкой по out-of-bag ошибке.
+
+Деревья добавляются пачками (`warm_start`). После каждой пачки OOB
+предсказания обновляются инкрементально — только по новым деревьям —
+и по ним считаются RMSE/R². Обучение останавливается, когда улучшение
+OOB RMSE меньше `tol`, когда пороги `thresholds` выполнены с запасом и
+достигнут `comfortable_cap`, либо при `max_estimators` деревьях.
+"""
+
+import time
+
+import numpy as np
+
+
+def comfortably_met(rmse: float, r2: float, thresholds: dict, margin: float) -> bool:
+    """Выполнены ли пороги качества с относительным запасом `margin`."""
+    min_r2 = thresholds.get('min_r2', 0.0)
+    max_rmse = thresholds.get('max_rmse', float('inf'))
+    return rmse <= max_rmse * (1 - margin) and r2 >= min_r2 + margin * (1 - min_r2)
+
+
+def train_early_stopping(X_train, y_train, config: dict) -> tuple:
+    """
+    Обучение с ранней остановкой.
+
+    Returns:
+        (модель, отчет о ранней остановке с кривой OOB-ошибки)
+    """
+    from sklearn.ensemble._forest import _generate_unsampled_indices, _get_n_samples_bootstrap
+
+    from scripts.estimators import thread_budget
+    from scripts.train_model import build_model
+
+    es_config = config.get('early_stopping') or {}
+    batch_size = int(es_config.get('batch_size', 10))
+    min_estimators = int(es_config.get('min_estimators', batch_size))
+    max_estimators = int(es_config.get('max_estimators', 500))
+    comfortable_cap = int(es_config.get('comfortable_cap', max_estimators))
+    tol = float(es_config.get('tol', 1e-3))
+    patience = int(es_config.get('patience', 2))
+    margin = float(es_config.get('threshold_margin', 0.1))
+    thresholds = config.get('thresholds', {})
+
+    model = build_model(config)
+    if not getattr(model, 'bootstrap', False):
+        raise ValueError(
+            f"Ранняя остановка по OOB требует лес с bootstrap=True ({type(model).__name__})"
+        )
+
+    X = np.ascontiguousarray(X_train, dtype=np.float32)
+    y = np.asarray(y_train, dtype=np.float64)
+    n_samples = len(y)
+    n_bootstrap = _get_n_samples_bootstrap(n_samples, model.max_samples)
+    pred_sum = np.zeros(n_samples)
+    pred_count = np.zeros(n_samples, dtype=np.int64)
+
+    curve = []
+    stop_reason = 'max_estimators'
+    best_rmse = np.inf
+    stalled = 0
+    n_trees = 0
+    start = time.perf_counter()
+    model.set_params(warm_start=True)
+
+    with thread_budget(model, config['model'].get('n_jobs')):
+        while n_trees < max_estimators:
+            n_before = n_trees
+            model.set_params(n_estimators=min(n_before + batch_size, max_estimators))
+            model.fit(X_train, y_train)
+            n_trees = len(model.estimators_)
+
+            for tree in model.estimators_[n_before:]:
+                oob = _generate_unsampled_indices(tree.random_state, n_samples, n_bootstrap)
+                pred_sum[oob] += tree.predict(X[oob], check_input=False)
+                pred_count[oob] += 1
+
+            covered = pred_count > 0
+            residuals = y[covered] - pred_sum[covered] / pred_count[covered]
+            rmse = float(np.sqrt(np.mean(residuals ** 2)))
+            total = np.sum((y[covered] - y[covered].mean()) ** 2)
+            r2 = float(1 - np.sum(residuals ** 2) / total) if total > 0 else 0.0
+            curve.append({
+                'n_estimators': n_trees,
+                'oob_rmse': rmse,
+                'oob_r2': r2,
+                'oob_coverage': float(covered.mean()),
+                'elapsed_seconds': round(time.perf_counter() - start, 4)
+            })
+
+            improvement = (best_rmse - rmse) / best_rmse if np.isfinite(best_rmse) else np.inf
+            best_rmse = min(best_rmse, rmse)
+            stalled = stalled + 1 if improvement < tol else 0
+
+            if n_trees >= min_estimators and stalled >= patience:
+                stop_reason = 'tolerance'
+                break
+            if n_trees >= comfortable_cap and comfortably_met(rmse, r2, thresholds, margin):
+                stop_reason = 'thresholds_met'
+                break
+
+    model.set_params(warm_start=False)
+    print(f"Ранняя остановка ({stop_reason}): {n_trees} деревьев, OOB RMSE = {curve[-1]['oob_rmse']:.4f}")
+
+    return model, {
+        'stop_reason': stop_reason,
+        'n_estimators': n_trees,
+        'max_estimators': max_estimators,
+        'batch_size': batch_size,
+        'tol': tol,
+        'fit_time_seconds': round(time.perf_counter() - start, 4),
+        'curve': curve
+    }
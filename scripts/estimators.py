@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Реестр моделей, доступных через `model.name` конфигурации.
+
+Леса (RandomForestRegressor, ExtraTreesRegressor) строят деревья
+параллельно по `n_jobs`. HistGradientBoostingRegressor разбивает признаки
+на гистограммы (до 256 корзин), поэтому поиск разбиений не зависит от
+числа уникальных значений — на миллионах строк он обучается быстрее
+лесов с точными разбиениями; его потоки OpenMP ограничиваются тем же
+бюджетом `model.n_jobs` через threadpoolctl.
+"""
+
+import importlib
+import os
+from contextlib import contextmanager
+
+# Имя модели -> модуль с ее классом; scikit-learn импортируется только
+# при первом обращении к модели
+ESTIMATORS = {
+    'RandomForestRegressor': 'sklearn.ensemble',
+    'ExtraTreesRegressor': 'sklearn.ensemble',
+    'HistGradientBoostingRegressor': 'sklearn.ensemble'
+}
+
+
+def get_estimator_class(name: str):
+    """Класс модели по имени из реестра."""
+    if name not in ESTIMATORS:
+        raise ValueError(f"Неизвестная модель {name!r}, доступны: {sorted(ESTIMATORS)}")
+    return getattr(importlib.import_module(ESTIMATORS[name]), name)
+
+
+def build_estimator(name: str, params: dict = None):
+    """
+    Необученная модель из реестра.
+
+    `n_jobs` передается только моделям, у которых есть такой параметр;
+    для остальных потоки задаются бюджетом при обучении (`thread_budget`).
+    """
+    estimator_class = get_estimator_class(name)
+    params = dict(params or {})
+    if 'n_jobs' not in estimator_class().get_params():
+        params.pop('n_jobs', None)
+    return estimator_class(**params)
+
+
+def resolve_n_jobs(n_jobs=None) -> int:
+    """Число потоков по значению в стиле scikit-learn (None — 1, -1 — все ядра)."""
+    if n_jobs is None:
+        return 1
+    n_jobs = int(n_jobs)
+    cpu_count = os.cpu_count() or 1
+    if n_jobs < 0:
+        return max(1, cpu_count + 1 + n_jobs)
+    return max(1, n_jobs)
+
+
+@contextmanager
+def thread_budget(model, n_jobs=None):
+    """
+    Ограничение потоков на время обучения модели.
+
+    Лесам на время блока выставляется `n_jobs` (после блока
+    восстанавливается исходное значение, поэтому сохраненная модель не
+    зависит от бюджета), остальным моделям — лимит потоков OpenMP.
+    """
+    n_threads = resolve_n_jobs(n_jobs)
+    if 'n_jobs' in model.get_params():
+        saved = model.n_jobs
+        model.set_params(n_jobs=n_threads)
+        try:
+            yield n_threads
+        finally:
+            model.set_params(n_jobs=saved)
+    else:
+        from threadpoolctl import threadpool_limits
+        with threadpool_limits(limits=n_threads, user_api='openmp'):
+            yield n_threads
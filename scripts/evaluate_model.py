@@ -1,107 +1,275 @@
 #!/usr/bin/env python3
 """
 Скрипт для детальной оценки обученной модели.
+
+Данные предсказываются блоками по `inference.chunksize` строк в пуле из
+`inference.n_workers` потоков. Блоки берутся из колонок, которые
+`scripts/dataset.py` отображает в память из бинарного кеша; текст CSV
+разбирается блоками только после потокового обучения (out-of-core),
+когда данные не помещаются в память; каждый блок сворачивается в
+сливаемые аккумуляторы (`scripts/streaming_metrics.py`), поэтому память
+не растет с размером оцениваемой выборки. Если включена секция
+`diagnostics`, те же предсказания раскладываются по гистограммам
+остатков фиксированного размера (`scripts/diagnostics.py`), которые
+сохраняются для графика диагностики.
+
+С флагом `--permutation-importance` (или `permutation_importance.enabled`)
+дополнительно считается перестановочная важность признаков с
+доверительными интервалами (`scripts/permutation_importance.py`).
 """
 
-import pandas as pd
 import numpy as np
 import json
-import pickle
+import os
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-import matplotlib
-matplotlib.use('Agg')  # Для работы без GUI
-import matplotlib.pyplot as plt
-import seaborn as sns
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts import perf
+from scripts.dataset import Schema, default_schema, iter_csv_chunks, load_data
+from scripts.diagnostics import DEFAULT_DIAGNOSTICS, axis_ranges, build_histogram, read_statistics
+from scripts import model_artifact
+from scripts.model_registry import record_evaluation
+from scripts.packed_forest import inference_artifact, load_predictor
+from scripts.permutation_importance import permutation_importance
+from scripts.streaming_metrics import RegressionAccumulator
+
+# Строк в блоке оценки, если inference.chunksize не задан
+EVAL_CHUNK_ROWS = 65536
+
+TRAINING_REPORT_PATH = "reports/training_report.json"
 
 def load_model(model_path: str):
     """Загрузка обученной модели."""
     print(f"Загрузка модели из {model_path}...")
-    with open(model_path, 'rb') as f:
-        return pickle.load(f)
+    return model_artifact.load_model(model_path)
+
+def iter_frame_chunks(X, y, chunksize: int = EVAL_CHUNK_ROWS):
+    """Блоки (X, y) загруженных данных."""
+    for start in range(0, len(X), chunksize):
+        yield X.iloc[start:start + chunksize], y.iloc[start:start + chunksize]
+
+def iter_file_chunks(data_path: str, schema=None, chunksize: int = EVAL_CHUNK_ROWS):
+    """Блоки (X, y) файла данных без загрузки его целиком."""
+    schema = schema or default_schema()
+    for chunk in iter_csv_chunks(data_path, chunksize, schema=schema):
+        yield chunk[schema.features], chunk[schema.target]
+
+def _evaluate_chunk(predictor, X_chunk, y_chunk, diagnostics=None) -> tuple:
+    accumulator = RegressionAccumulator()
+    y_pred = predictor.predict(X_chunk)
+    accumulator.update(y_chunk, y_pred)
+    histogram = None
+    if diagnostics is not None:
+        histogram = diagnostics.empty_like()
+        histogram.update(X_chunk, y_chunk, y_pred)
+    return accumulator, histogram
 
-def load_data(data_path: str) -> tuple:
-    """Загрузка данных."""
-    print(f"Загрузка данных из {data_path}...")
+def evaluate_chunks(predictor, chunks, n_workers: int = None,
+                    diagnostics=None) -> RegressionAccumulator:
+    """
+    Предсказания по блокам в пуле потоков со сверткой в аккумулятор.
     
-    df = pd.read_csv(data_path, sep=r'\s+', header=None)
-    column_names = [
-        'CRIM', 'ZN', 'INDUS', 'CHAS', 'NOX', 'RM', 'AGE', 
-        'DIS', 'RAD', 'TAX', 'PTRATIO', 'B', 'LSTAT', 'MEDV'
-    ]
-    df.columns = column_names
+    Одновременно в работе не больше 2 * n_workers блоков, поэтому память
+    ограничена размером блока, а не выборки. Суммы аккумулятора точные,
+    так что результат не зависит от размера блоков и числа потоков.
     
-    X = df.drop('MEDV', axis=1)
-    y = df['MEDV']
+    Args:
+        predictor: Объект с методом predict (модель или упакованный лес)
+        chunks: Итератор блоков (X, y)
+        n_workers: Число потоков (None — по числу ядер, не больше 8)
+        diagnostics: Гистограммы остатков (`DiagnosticsHistogram`), в
+            которые сливаются гистограммы блоков, или None
+    """
+    n_workers = int(n_workers or min(os.cpu_count() or 1, 8))
+    accumulator = RegressionAccumulator()
     
-    return X, y
+    def collect(future):
+        chunk_accumulator, histogram = future.result()
+        accumulator.merge(chunk_accumulator)
+        if histogram is not None:
+            diagnostics.merge(histogram)
+    
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        pending = deque()
+        for X_chunk, y_chunk in chunks:
+            if len(pending) >= 2 * n_workers:
+                collect(pending.popleft())
+            pending.append(pool.submit(_evaluate_chunk, predictor, X_chunk, y_chunk, diagnostics))
+        while pending:
+            collect(pending.popleft())
+    return accumulator
 
-def evaluate_model(model, X, y) -> dict:
-    """Детальная оценка модели."""
+def evaluate_stream(model, chunks, feature_names, predictor=None, n_workers: int = None,
+                    diagnostics=None) -> tuple:
+    """
+    Детальная оценка модели по блокам данных.
+    
+    Returns:
+        (метрики, число оцененных строк)
+    """
     print("Выполнение предсказаний...")
-    y_pred = model.predict(X)
-    
-    # Базовые метрики
-    metrics = {
-        'rmse': float(np.sqrt(mean_squared_error(y, y_pred))),
-        'mae': float(mean_absolute_error(y, y_pred)),
-        'r2': float(r2_score(y, y_pred)),
-        'mean_absolute_percentage_error': float(np.mean(np.abs((y - y_pred) / y)) * 100)
-    }
+    accumulator = evaluate_chunks(predictor or model, chunks, n_workers, diagnostics)
     
-    # Дополнительная статистика
-    residuals = y - y_pred
-    metrics['residuals'] = {
-        'mean': float(np.mean(residuals)),
-        'std': float(np.std(residuals)),
-        'min': float(np.min(residuals)),
-        'max': float(np.max(residuals))
-    }
+    # Базовые метрики, MAPE и статистика остатков
+    metrics = accumulator.evaluation_metrics()
     
     # Важность признаков (если модель поддерживает)
     if hasattr(model, 'feature_importances_'):
         feature_importance = {
             feature: float(importance) 
-            for feature, importance in zip(X.columns, model.feature_importances_)
+            for feature, importance in zip(feature_names, model.feature_importances_)
         }
         metrics['feature_importance'] = feature_importance
     
-    return metrics, y_pred, residuals
+    return metrics, accumulator.count
 
-def plot_feature_importance(model, feature_names, output_path: str):
-    """Визуализация важности признаков."""
-    if not hasattr(model, 'feature_importances_'):
-        print("Модель не поддерживает feature_importances_")
-        return
-    
-    importances = model.feature_importances_
-    indices = np.argsort(importances)[::-1]
+def evaluate_model(model, X, y, predictor=None, chunksize: int = EVAL_CHUNK_ROWS,
+                   n_workers: int = None) -> dict:
+    """Детальная оценка модели на загруженных данных."""
+    metrics, _ = evaluate_stream(
+        model, iter_frame_chunks(X, y, chunksize), list(X.columns), predictor, n_workers
+    )
+    return metrics
+
+def _pyplot():
+    """matplotlib загружается только при построении графика."""
+    import matplotlib
+    matplotlib.use('Agg')  # Для работы без GUI
+    import matplotlib.pyplot as plt
+    return plt
+
+def _plot_impurity_importance(ax, model, feature_names):
+    ax.set_title("Важность признаков (по примесям)")
+    if hasattr(model, 'feature_importances_'):
+        importances = model.feature_importances_
+        indices = np.argsort(importances)[::-1]
+        ax.bar(range(len(importances)), importances[indices])
+        ax.set_xticks(range(len(importances)))
+        ax.set_xticklabels([feature_names[i] for i in indices], rotation=45, ha='right')
+        ax.set_ylabel("Важность")
+    else:
+        print(f"{type(model).__name__} не поддерживает feature_importances_, сохраняется заглушка")
+        ax.axis('off')
+        ax.text(0.5, 0.5, f"{type(model).__name__} не предоставляет feature_importances_",
+                ha='center', va='center', transform=ax.transAxes)
+
+def _plot_permutation_importance(ax, permutation: dict):
+    features = permutation['features']
+    names = sorted(features, key=lambda name: features[name]['mean'], reverse=True)
+    means = np.array([features[name]['mean'] for name in names])
+    errors = np.array([
+        [features[name]['mean'] - features[name]['ci_low'] for name in names],
+        [features[name]['ci_high'] - features[name]['mean'] for name in names]
+    ])
+    ax.set_title(f"Перестановочная важность ({permutation['confidence']:.0%} ДИ, "
+                 f"{permutation['n_repeats']} повторов)")
+    ax.bar(range(len(names)), means, yerr=errors, capsize=3)
+    ax.set_xticks(range(len(names)))
+    ax.set_xticklabels(names, rotation=45, ha='right')
+    ax.set_ylabel("Рост RMSE")
+
+def plot_feature_importance(model, feature_names, output_path: str, permutation: dict = None):
+    """
+    Визуализация важности признаков.
     
-    plt.figure(figsize=(10, 6))
-    plt.title("Важность признаков")
-    plt.bar(range(len(importances)), importances[indices])
-    plt.xticks(range(len(importances)), [feature_names[i] for i in indices], rotation=45, ha='right')
-    plt.ylabel("Важность")
-    plt.tight_layout()
+    Для моделей без `feature_importances_` (например,
+    HistGradientBoostingRegressor) сохраняется график-заглушка с
+    пояснением, чтобы выход этапа в dvc.yaml существовал всегда. Если
+    посчитана перестановочная важность, она рисуется рядом с
+    доверительными интервалами.
+    """
+    plt = _pyplot()
+    if permutation is None:
+        fig, ax = plt.subplots(figsize=(10, 6))
+        _plot_impurity_importance(ax, model, feature_names)
+    else:
+        fig, (ax, permutation_ax) = plt.subplots(1, 2, figsize=(18, 6))
+        _plot_impurity_importance(ax, model, feature_names)
+        _plot_permutation_importance(permutation_ax, permutation)
+    fig.tight_layout()
     
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig(output_path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
     print(f"График важности признаков сохранен в {output_path}")
 
-def main():
-    model_path = "models/model.pkl"
-    data_path = "data/housing.csv"
+def run_evaluation(model, X, y, model_path: str, inference_config: dict,
+                   data_path: str = None, schema=None, importance_config: dict = None,
+                   plots: bool = True, registry_config: dict = None,
+                   diagnostics_config: dict = None) -> dict:
+    """
+    Оценка модели на полном датасете и запись артефактов этапа.
+    
+    Args:
+        model: Обученная модель
+        X, y: Загруженные данные (колонки кеша, отображенные в память) или
+            None — тогда текст `data_path` разбирается блоками (после
+            потокового обучения)
+        model_path: Путь к артефакту модели (для упакованного движка)
+        inference_config: Секция `inference` конфигурации
+        data_path: Файл данных для оценки без загрузки в память
+        schema: Схема данных файла
+        importance_config: Секция `permutation_importance` конфигурации
+        plots: Строить график важности (False — без matplotlib)
+        registry_config: Секция `registry` конфигурации (None — без записи в реестр)
+        diagnostics_config: Секция `diagnostics` конфигурации (None — без
+            гистограмм остатков)
+        
+    Returns:
+        Отчет об оценке
+    """
     report_output_path = "reports/evaluation_report.json"
     feature_importance_path = "reports/feature_importance.png"
     
-    # Загрузка модели и данных
-    model = load_model(model_path)
-    X, y = load_data(data_path)
+    # inference.artifact — зависимость этапа в dvc.yaml: она должна
+    # указывать на артефакт, который действительно читает движок
+    declared = inference_config.get('artifact')
+    expected = inference_artifact(inference_config, model_path)
+    if declared is not None and Path(declared) != Path(expected):
+        raise ValueError(
+            f"inference.artifact ({declared}) не совпадает с артефактом движка "
+            f"{inference_config.get('engine', 'sklearn')} ({expected}): исправьте его в "
+            f"config/model_config.yaml и params.yaml, от него зависит этап evaluate_model"
+        )
     
-    # Оценка модели
-    metrics, y_pred, residuals = evaluate_model(model, X, y)
+    with perf.phase("load_predictor"):
+        predictor = load_predictor(model, model_path, inference_config)
+    
+    # Оценка модели по блокам
+    chunksize = int(inference_config.get('chunksize') or EVAL_CHUNK_ROWS)
+    if X is not None:
+        feature_names = list(X.columns)
+        target = y.name
+        chunks = iter_frame_chunks(X, y, chunksize)
+        range_chunks = iter_frame_chunks(X, y, chunksize)
+    else:
+        schema = schema or default_schema()
+        feature_names = schema.features
+        target = schema.target
+        chunks = iter_file_chunks(data_path, schema, chunksize)
+        range_chunks = iter_file_chunks(data_path, schema, chunksize)
+    
+    # Гистограммы остатков: границы осей из отчета валидации, данные
+    # проходятся еще раз, только если статистик в нем нет
+    diagnostics = None
+    diagnostics_settings = dict(DEFAULT_DIAGNOSTICS, **(diagnostics_config or {}))
+    if diagnostics_config is not None and diagnostics_settings['enabled']:
+        with perf.phase("diagnostics_ranges"):
+            ranges = axis_ranges(
+                feature_names + [target], read_statistics(),
+                (X_chunk.assign(**{target: y_chunk}) for X_chunk, y_chunk in range_chunks)
+            )
+            diagnostics = build_histogram(feature_names, target, ranges, diagnostics_settings)
+    
+    with perf.phase("predict"):
+        metrics, n_samples = evaluate_stream(
+            model, chunks, feature_names, predictor, inference_config.get('n_workers'), diagnostics
+        )
     
     print("\nМетрики модели на полном датасете:")
     for metric_name, metric_value in metrics.items():
@@ -112,26 +280,103 @@ def main():
         else:
             print(f"  {metric_name.upper()}: {metric_value:.4f}")
     
+    # Перестановочная важность признаков (данные нужны в памяти)
+    permutation = None
+    if (importance_config or {}).get('enabled', False):
+        if X is None:
+            with perf.phase("load_data"):
+                X, y = load_data(data_path, schema=schema)
+        with perf.phase("permutation_importance"):
+            permutation = permutation_importance(predictor, X, y, importance_config)
+        print("\nПерестановочная важность (рост RMSE):")
+        for name, stats in permutation['features'].items():
+            print(f"  {name}: {stats['mean']:.4f} [{stats['ci_low']:.4f}, {stats['ci_high']:.4f}]")
+    
+    if diagnostics is not None:
+        with perf.phase("write_diagnostics"):
+            diagnostics.save(diagnostics_settings['output'])
+        print(f"\nГистограммы остатков сохранены в {diagnostics_settings['output']}")
+        clipped = diagnostics.clipped['residual']
+        if clipped:
+            print(f"  Остатков за границами оси: {clipped} ({clipped / diagnostics.count:.2%})")
+    
     # Визуализация важности признаков
-    plot_feature_importance(model, X.columns, feature_importance_path)
+    if plots:
+        with perf.phase("plot"):
+            plot_feature_importance(model, feature_names, feature_importance_path, permutation)
     
     # Создание отчета
     report = {
         'metrics': metrics,
         'model_info': {
             'type': type(model).__name__,
-            'n_features': X.shape[1],
-            'n_samples': X.shape[0]
+            'n_features': len(feature_names),
+            'n_samples': n_samples
         }
     }
+    if predictor is not model:
+        report['model_info']['inference_engine'] = inference_config.get('engine')
+    if permutation is not None:
+        report['permutation_importance'] = permutation
     
     Path(report_output_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(report_output_path, 'w', encoding='utf-8') as f:
+    with perf.phase("write_report"), open(report_output_path, 'w', encoding='utf-8') as f:
         json.dump(report, f, indent=2, ensure_ascii=False)
     
     print(f"\nОтчет сохранен в {report_output_path}")
+    
+    with perf.phase("registry"):
+        record_evaluation(registry_config, report, model_path, data_path)
+    return report
+
+def parse_args(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Оценка модели Boston Housing")
+    parser.add_argument(
+        "--permutation-importance", action="store_true",
+        help="Посчитать перестановочную важность признаков с доверительными интервалами"
+    )
+    parser.add_argument(
+        "--no-plots", action="store_true",
+        help="Не строить графики (без загрузки matplotlib)"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    model_path = "models/model"
+    data_path = "data/housing.csv"
+    config_path = "config/model_config.yaml"
+    
+    # Загрузка модели; данные отображаются в память из кеша, а после
+    # потокового обучения читаются из файла блоками
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    training_report = {}
+    if Path(TRAINING_REPORT_PATH).exists():
+        with open(TRAINING_REPORT_PATH, 'r', encoding='utf-8') as f:
+            training_report = json.load(f)
+    inference_config = config.get('inference') or {}
+    importance_config = dict(config.get('permutation_importance') or {})
+    if args.permutation_importance:
+        importance_config['enabled'] = True
+    with perf.phase("load_model"):
+        model = load_model(model_path)
+    X = y = None
+    if 'out_of_core' not in training_report:
+        with perf.phase("load_data"):
+            X, y = load_data(data_path, schema=Schema.from_config(config))
+    
+    run_evaluation(
+        model, X, y, model_path, inference_config,
+        data_path=data_path, schema=Schema.from_config(config),
+        importance_config=importance_config, plots=not args.no_plots,
+        registry_config=config.get('registry'), diagnostics_config=config.get('diagnostics')
+    )
     print("✅ Оценка модели завершена!")
 
 if __name__ == "__main__":
-    main()
+    with perf.stage("evaluate_model"):
+        main()
 
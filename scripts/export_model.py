@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Компактный экспорт обученной модели с проверкой качества.
+
+Лес из models/model сжимается в компактный формат (scripts/compact_forest.py)
+во временной директории. Компактная модель заново проверяется по порогам
+`thresholds` на той же отложенной выборке, что и при обучении, а ее
+предсказания на всех данных сравниваются с предсказаниями полной модели
+(блоками, со сливаемыми суммами отклонений).
+Модель публикуется в `export.output`, только если пороги выполнены и
+отклонение не больше `max_abs_drift` в каждой строке и `mean_abs_drift` в
+среднем; иначе прежний экспорт не трогается, а этап завершается с ошибкой.
+Модели, не являющиеся лесом деревьев, не экспортируются: в `export.output`
+остается только meta.json с причиной, а отчет помечается `skipped`.
+"""
+
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts import perf
+from scripts.compact_forest import compact_forest, load_compact, write_compact
+from scripts.dataset import Schema, load_data
+from scripts.model_artifact import (
+    artifact_md5, artifact_size, is_tree_forest, load_model, publish_directory, staging_directory
+)
+from scripts.out_of_core import holdout_mask
+from scripts.streaming_metrics import ExactSum, RegressionAccumulator
+
+DEFAULT_EXPORT = {
+    'output': 'models/model_compact',
+    'leaf_decimals': 2,
+    'max_depth': None,
+    'max_abs_drift': 0.5,
+    'mean_abs_drift': 0.05
+}
+
+REPORT_PATH = "reports/export_report.json"
+TRAINING_REPORT_PATH = "reports/training_report.json"
+
+
+def holdout_split(X, y, config: dict, split: dict = None) -> tuple:
+    """
+    Отложенная выборка обучения в памяти (как `split_data` в train_model).
+
+    `split` — описание разбиения из отчета об обучении (`data_info.split`).
+    """
+    from scripts.train_model import split_data
+
+    random_rows = None if split is None else split.get('random_rows')
+    _, X_test, _, y_test = split_data(
+        X, y, config['data']['test_size'], config['data']['random_state'], random_rows
+    )
+    return X_test, y_test
+
+
+class DriftAccumulator:
+    """Сливаемые суммы отклонения предсказаний компактной модели от полной."""
+
+    def __init__(self):
+        self.n = 0
+        self.max_abs = 0.0
+        self.abs_sum = ExactSum()
+        self.squared_sum = ExactSum()
+
+    def update(self, reference: np.ndarray, predictions: np.ndarray):
+        diff = np.abs(np.asarray(predictions, dtype=np.float64) - reference)
+        if len(diff):
+            self.max_abs = max(self.max_abs, float(diff.max()))
+        self.n += len(diff)
+        self.abs_sum.add_array(diff)
+        self.squared_sum.add_array(diff ** 2)
+
+    def summary(self) -> dict:
+        return {
+            'max_abs': self.max_abs,
+            'mean_abs': self.abs_sum.value / self.n,
+            'rmse': float(np.sqrt(self.squared_sum.value / self.n))
+        }
+
+
+def compare_models(model, compact, chunks, config: dict, out_of_core: bool = False,
+                   X=None, y=None, split: dict = None) -> tuple:
+    """
+    Отклонение предсказаний на всех данных и метрики обеих моделей на
+    отложенной выборке обучения.
+
+    Данные проходятся блоками. При потоковом обучении отложенные строки
+    выбираются в каждом блоке по хешу, как в scripts/out_of_core.py; иначе
+    отложенная выборка строится по загруженным `X`, `y` и описанию
+    разбиения `split` из отчета об обучении.
+
+    Returns:
+        (отклонение, {'full': метрики, 'compact': метрики})
+    """
+    drift = DriftAccumulator()
+    full, reduced = RegressionAccumulator(), RegressionAccumulator()
+    for X_chunk, y_chunk in chunks:
+        full_predictions = model.predict(X_chunk)
+        compact_predictions = compact.predict(X_chunk)
+        drift.update(full_predictions, compact_predictions)
+        if out_of_core:
+            in_test = holdout_mask(
+                pd.concat([X_chunk, y_chunk], axis=1),
+                config['data']['test_size'], config['data']['random_state']
+            )
+            full.update(y_chunk[in_test], full_predictions[in_test])
+            reduced.update(y_chunk[in_test], compact_predictions[in_test])
+    if not out_of_core:
+        X_test, y_test = holdout_split(X, y, config, split)
+        full.update(y_test, model.predict(X_test))
+        reduced.update(y_test, compact.predict(X_test))
+    return drift.summary(), {'full': full.metrics(), 'compact': reduced.metrics()}
+
+
+def skip_export(model, model_path: str, output: str) -> dict:
+    """
+    Пропуск экспорта модели, которая не является лесом деревьев.
+
+    Прежний экспорт заменяется директорией с одним meta.json (формат
+    `unsupported`): выход этапа в dvc.yaml существует, а `load_compact`
+    отказывается загружать компактную модель от другого артефакта.
+    """
+    model_class = f"{type(model).__module__}.{type(model).__name__}"
+    reason = f"компактный экспорт поддерживает только леса деревьев, а не {type(model).__name__}"
+    staging = staging_directory(output)
+    with open(staging / "meta.json", 'w', encoding='utf-8') as f:
+        json.dump({'format': 'unsupported', 'source_class': model_class,
+                   'source_md5': artifact_md5(model_path), 'reason': reason},
+                  f, indent=2, ensure_ascii=False)
+    publish_directory(staging, output)
+    return {'output': output, 'published': False, 'skipped': True,
+            'model_class': model_class, 'reason': reason}
+
+
+def export_model(model, model_path: str, X, y, config: dict, training_report: dict = None,
+                 data_path: str = None, schema=None) -> dict:
+    """
+    Сжатие модели, проверка и публикация компактного артефакта.
+
+    Args:
+        model: Обученный лес
+        model_path: Путь к артефакту полной модели
+        X, y: Все данные или None — тогда `data_path` читается блоками
+            (только после потокового обучения)
+        config: Конфигурация модели (секции `export`, `thresholds`, `data`)
+        training_report: Отчет об обучении (для выбора отложенной выборки)
+        data_path: Файл данных
+        schema: Схема данных файла
+
+    Returns:
+        Отчет об экспорте; `published` — записана ли компактная модель,
+        `skipped` — экспорт не выполнялся, так как модель не лес деревьев
+    """
+    from scripts.evaluate_model import EVAL_CHUNK_ROWS, iter_file_chunks, iter_frame_chunks
+    from scripts.train_model import check_quality
+
+    settings = dict(DEFAULT_EXPORT, **(config.get('export') or {}))
+    if not is_tree_forest(model):
+        return skip_export(model, model_path, settings['output'])
+    out_of_core = training_report is not None and 'out_of_core' in training_report
+    if X is None and not out_of_core:
+        raise ValueError("Без загруженных данных экспорт возможен только после потокового обучения")
+    output = settings['output']
+
+    with perf.phase("compact"):
+        arrays, stats = compact_forest(model, settings['leaf_decimals'], settings['max_depth'])
+        staging = staging_directory(output)
+        write_compact(staging, arrays, stats, model, artifact_md5(model_path),
+                      settings['leaf_decimals'], settings['max_depth'])
+        del arrays
+    compact = load_compact(staging)
+
+    chunksize = int((config.get('inference') or {}).get('chunksize') or EVAL_CHUNK_ROWS)
+    if X is not None:
+        chunks = iter_frame_chunks(X, y, chunksize)
+    else:
+        chunks = iter_file_chunks(data_path, schema or Schema.from_config(config), chunksize)
+    with perf.phase("compare"):
+        split = (training_report or {}).get('data_info', {}).get('split')
+        drift, metrics = compare_models(model, compact, chunks, config, out_of_core, X, y, split)
+    drift['max_abs_tolerance'] = float(settings['max_abs_drift'])
+    drift['mean_abs_tolerance'] = float(settings['mean_abs_drift'])
+    drift['passed'] = (
+        drift['max_abs'] <= drift['max_abs_tolerance']
+        and drift['mean_abs'] <= drift['mean_abs_tolerance']
+    )
+    quality_check = check_quality(metrics['compact'], config.get('thresholds', {}))
+
+    full_bytes = artifact_size(model_path)
+    compact_bytes = artifact_size(staging)
+    published = drift['passed'] and quality_check['passed']
+    del compact
+    if published:
+        publish_directory(staging, output)
+    else:
+        shutil.rmtree(staging)
+
+    return {
+        'output': output,
+        'published': published,
+        'skipped': False,
+        'settings': {name: settings[name] for name in ('leaf_decimals', 'max_depth')},
+        'size': {
+            'full_bytes': full_bytes,
+            'compact_bytes': compact_bytes,
+            'ratio': compact_bytes / full_bytes
+        },
+        'nodes': stats,
+        'drift': drift,
+        'metrics': metrics,
+        'quality_check': quality_check
+    }
+
+
+def print_report(report: dict):
+    if report['skipped']:
+        print(f"⚠️ Компактный экспорт пропущен: {report['reason']}")
+        return
+    size, drift = report['size'], report['drift']
+    print(f"Размер: {size['full_bytes'] / 2 ** 20:.2f} МБ -> {size['compact_bytes'] / 2 ** 20:.2f} МБ "
+          f"({size['ratio']:.1%})")
+    print(f"Узлов: {report['nodes']['nodes_before']} -> {report['nodes']['nodes_after']} "
+          f"(обрезано {report['nodes']['truncated_nodes']}, свернуто {report['nodes']['collapsed_nodes']})")
+    print(f"Отклонение предсказаний: max {drift['max_abs']:.4f} (допуск {drift['max_abs_tolerance']}), "
+          f"mean {drift['mean_abs']:.4f} (допуск {drift['mean_abs_tolerance']})")
+    for name in ('rmse', 'r2'):
+        print(f"  {name.upper()}: {report['metrics']['full'][name]:.4f} -> "
+              f"{report['metrics']['compact'][name]:.4f}")
+    if report['published']:
+        print(f"✅ Компактная модель сохранена в {report['output']}")
+    else:
+        reasons = []
+        if not drift['passed']:
+            reasons.append("отклонение предсказаний больше допуска")
+        if not report['quality_check']['passed']:
+            reasons.append("не пройдены пороги качества")
+        print(f"❌ Компактная модель не опубликована: {', '.join(reasons)}")
+
+
+def write_report(report: dict, report_path: str = REPORT_PATH):
+    Path(report_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Компактный экспорт модели Boston Housing")
+    parser.add_argument("--leaf-decimals", type=int, default=None, help="Переопределить export.leaf_decimals")
+    parser.add_argument("--max-depth", type=int, default=None, help="Переопределить export.max_depth")
+    args = parser.parse_args(argv)
+
+    model_path = "models/model"
+    data_path = "data/housing.csv"
+    with open("config/model_config.yaml", 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    export_config = dict(config.get('export') or {})
+    if args.leaf_decimals is not None:
+        export_config['leaf_decimals'] = args.leaf_decimals
+    if args.max_depth is not None:
+        export_config['max_depth'] = args.max_depth
+    config['export'] = export_config
+
+    training_report = None
+    if Path(TRAINING_REPORT_PATH).exists():
+        with open(TRAINING_REPORT_PATH, 'r', encoding='utf-8') as f:
+            training_report = json.load(f)
+    # После потокового обучения данные читаются блоками
+    X = y = None
+    with perf.phase("load"):
+        model = load_model(model_path)
+        if training_report is None or 'out_of_core' not in training_report:
+            X, y = load_data(data_path, schema=Schema.from_config(config))
+
+    report = export_model(model, model_path, X, y, config, training_report,
+                          data_path=data_path, schema=Schema.from_config(config))
+    with perf.phase("write_report"):
+        write_report(report)
+    print_report(report)
+    sys.exit(0 if report['published'] or report['skipped'] else 1)
+
+
+if __name__ == "__main__":
+    with perf.stage("export_model"):
+        main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Отпечаток обученного леса и проверка воспроизводимости без полного переобучения.
+
+Отпечаток дерева — sha256 его структуры (признаки, пороги, потомки узлов)
+и значений в узлах, отпечаток леса — sha256 отпечатков деревьев по
+порядку. `train_model.py` записывает оба в секцию `fingerprint` отчета
+`reports/training_report.json`. Проверка (`python scripts/fingerprint.py`)
+переобучает только случайную выборку деревьев с их исходными зернами и
+бутстреп-выборками и сравнивает отпечатки побитно.
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.model_artifact import is_tree_forest
+
+
+def tree_fingerprint(tree) -> str:
+    """sha256 структуры и значений узлов одного дерева (`tree_` scikit-learn)."""
+    digest = hashlib.sha256()
+    digest.update(np.int64(tree.node_count).tobytes())
+    for array, dtype in (
+        (tree.feature, '<i8'), (tree.threshold, '<f8'),
+        (tree.children_left, '<i8'), (tree.children_right, '<i8'), (tree.value, '<f8')
+    ):
+        digest.update(np.ascontiguousarray(array, dtype=dtype).tobytes())
+    return digest.hexdigest()
+
+
+def forest_fingerprint(model, first_retrainable: int = 0) -> dict:
+    """
+    Отпечаток леса для отчета об обучении.
+
+    Args:
+        model: Обученный лес
+        first_retrainable: Номер первого дерева, которое можно переобучить
+            на текущих данных (деревья родительской модели при дообучении
+            могли быть обучены на других данных)
+    """
+    trees = [tree_fingerprint(est.tree_) for est in model.estimators_]
+    forest = hashlib.sha256(''.join(trees).encode('ascii')).hexdigest()
+    return {
+        'forest': forest,
+        'trees': trees,
+        'first_retrainable': int(first_retrainable)
+    }
+
+
+def retrain_tree(model, index: int, X_train, y_train):
+    """
+    Повторное обучение дерева `index` с его зерном и бутстреп-выборкой.
+
+    Повторяет `_parallel_build_trees` scikit-learn: X приводится к float32,
+    бутстреп задается весами — числом попаданий строки в выборку.
+    """
+    from sklearn.base import clone
+    from sklearn.ensemble._forest import _generate_sample_indices, _get_n_samples_bootstrap
+
+    X = np.ascontiguousarray(X_train, dtype=np.float32)
+    y = np.ascontiguousarray(y_train, dtype=np.float64)
+    n_samples = X.shape[0]
+    tree = clone(model.estimators_[index])
+
+    sample_weight = None
+    if model.bootstrap:
+        n_bootstrap = _get_n_samples_bootstrap(n_samples, model.max_samples)
+        indices = _generate_sample_indices(tree.random_state, n_samples, n_bootstrap)
+        sample_weight = np.bincount(indices, minlength=n_samples).astype(np.float64)
+    tree.fit(X, y, sample_weight=sample_weight)
+    return tree
+
+
+def verify_trees(model, fingerprint: dict, X_train, y_train, n_trees: int, seed: int = 0) -> dict:
+    """
+    Проверка воспроизводимости на случайной выборке деревьев.
+
+    Returns:
+        Словарь с флагом `passed`, проверенными и несовпавшими деревьями
+    """
+    candidates = np.arange(fingerprint.get('first_retrainable', 0), len(fingerprint['trees']))
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(candidates, size=min(n_trees, len(candidates)), replace=False))
+
+    mismatched = []
+    for index in sample.tolist():
+        tree = retrain_tree(model, index, X_train, y_train)
+        if tree_fingerprint(tree.tree_) != fingerprint['trees'][index]:
+            mismatched.append(index)
+    return {
+        'passed': not mismatched,
+        'checked_trees': sample.tolist(),
+        'mismatched_trees': mismatched
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Проверка воспроизводимости модели по отпечатку без полного переобучения"
+    )
+    parser.add_argument('--trees', type=int, default=5, help="Число переобучаемых деревьев")
+    parser.add_argument('--seed', type=int, default=0, help="Зерно выбора деревьев")
+    parser.add_argument('--model', default="models/model", help="Артефакт модели")
+    parser.add_argument('--report', default="reports/training_report.json", help="Отчет об обучении")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    import yaml
+    from sklearn.model_selection import train_test_split
+    from scripts.dataset import Schema, dataset_md5, load_data
+    from scripts.model_artifact import load_model
+
+    args = parse_args(argv)
+    data_path = "data/housing.csv"
+    config_path = "config/model_config.yaml"
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    with open(args.report, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    expected = report.get('fingerprint')
+    if expected is None:
+        print("❌ В отчете об обучении нет отпечатка модели")
+        sys.exit(1)
+
+    # Артефакт должен совпадать с моделью, описанной в отчете
+    model = load_model(args.model)
+    if not is_tree_forest(model) or forest_fingerprint(model)['forest'] != expected['forest']:
+        print(f"❌ Отпечаток {args.model} не совпадает с отчетом об обучении")
+        sys.exit(1)
+
+    if dataset_md5(data_path) != report['data_info']['data_md5']:
+        print("❌ Данные изменились после обучения, проверка невозможна")
+        sys.exit(1)
+
+    if expected.get('first_retrainable', 0) >= len(expected['trees']):
+        print(f"✅ Отпечаток артефакта совпадает с отчетом ({expected['forest'][:16]}); "
+              "деревьев, обученных на общей обучающей выборке, нет — переобучение не требуется")
+        return
+
+    X, y = load_data(data_path, schema=Schema.from_config(config))
+    X_train, _, y_train, _ = train_test_split(
+        X, y, test_size=config['data']['test_size'], random_state=config['data']['random_state']
+    )
+
+    print(f"Переобучение {args.trees} деревьев из {len(expected['trees'])}...")
+    result = verify_trees(model, expected, X_train, y_train, args.trees, args.seed)
+    print(f"Проверены деревья: {result['checked_trees']}")
+    if not result['passed']:
+        print(f"❌ Отпечатки не совпали для деревьев: {result['mismatched_trees']}")
+        sys.exit(1)
+    print(f"✅ Модель воспроизводима (отпечаток {expected['forest'][:16]})")
+
+
+if __name__ == "__main__":
+    main()
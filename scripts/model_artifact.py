@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Формат артефакта модели на основе отображаемых в память массивов.
+
+Лес деревьев сохраняется в директорию:
+
+    meta.json     - класс и параметры модели, признаки, смещения деревьев
+    nodes.npy     - узлы всех деревьев подряд (структура узла scikit-learn)
+    values.npy    - значения в узлах всех деревьев подряд
+    feature.npy, threshold.npy, children.npy, value.npy
+                  - те же деревья в раскладке `PackedForest` для инференса
+                    (+ missing_go_to_left.npy, если он где-то задан)
+
+Массивы записываются без сжатия (`.npy` выравнивает данные по 64 байтам)
+и открываются с `mmap_mode='r'`. `load_model` восстанавливает объект
+scikit-learn: `Tree` копирует узлы в свою память, поэтому время загрузки
+растет с размером леса. Массивы инференса `PackedForest.from_artifact`
+использует как есть, без копирования: загрузка почти не зависит от
+размера леса, а процессы на одном хосте читают одни и те же физические
+страницы файла. Модели, не являющиеся лесом деревьев, сохраняются в той
+же директории через pickle. Загрузчик также принимает старый формат —
+одиночный `.pkl` файл.
+"""
+
+import copy
+import hashlib
+import importlib
+import json
+import pickle
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from scripts.dataset import file_md5
+from scripts.packed_forest import PackedForest
+
+FORMAT_VERSION = 2
+META_FILE = "meta.json"
+NODES_FILE = "nodes.npy"
+VALUES_FILE = "values.npy"
+PICKLE_FILE = "model.pkl"
+PACKED_ARRAYS = ('feature', 'threshold', 'children', 'value')
+MISSING_FILE = "missing_go_to_left.npy"
+
+
+def is_tree_forest(model) -> bool:
+    """Является ли модель лесом деревьев scikit-learn (RandomForest, ExtraTrees)."""
+    estimators = getattr(model, 'estimators_', None)
+    return (
+        isinstance(estimators, list) and len(estimators) > 0
+        and all(hasattr(est, 'tree_') for est in estimators)
+        and hasattr(model, 'estimator_params')
+    )
+
+
+def _forest_meta(model) -> dict:
+    trees = []
+    offset = 0
+    for est in model.estimators_:
+        node_count = int(est.tree_.node_count)
+        trees.append({
+            'offset': offset,
+            'node_count': node_count,
+            'max_depth': int(est.tree_.max_depth),
+            'random_state': int(est.random_state),
+            'max_features_': int(est.max_features_)
+        })
+        offset += node_count
+
+    feature_names = getattr(model, 'feature_names_in_', None)
+    return {
+        'format': 'forest',
+        'format_version': FORMAT_VERSION,
+        'class': f"{type(model).__module__}.{type(model).__name__}",
+        'params': model.get_params(),
+        'n_features_in_': int(model.n_features_in_),
+        'n_outputs_': int(model.n_outputs_),
+        'feature_names_in_': None if feature_names is None else [str(f) for f in feature_names],
+        'n_nodes': offset,
+        'trees': trees
+    }
+
+
+def _write_artifact(model, directory: Path):
+    if not is_tree_forest(model):
+        with open(directory / PICKLE_FILE, 'wb') as f:
+            pickle.dump(model, f)
+        meta = {'format': 'pickle', 'format_version': FORMAT_VERSION,
+                'class': f"{type(model).__module__}.{type(model).__name__}"}
+    else:
+        meta = _forest_meta(model)
+        states = [est.tree_.__getstate__() for est in model.estimators_]
+        np.save(directory / NODES_FILE, np.concatenate([s['nodes'] for s in states]))
+        np.save(directory / VALUES_FILE, np.concatenate([s['values'] for s in states]))
+        packed = PackedForest.from_estimator(model)
+        for name in PACKED_ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(packed, name))
+        if packed.missing_go_to_left is not None:
+            np.save(directory / MISSING_FILE, packed.missing_go_to_left)
+
+    with open(directory / META_FILE, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+
+def staging_directory(path: str) -> Path:
+    """Пустая временная директория рядом с артефактом `path`."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir()
+    return tmp_path
+
+
+def publish_directory(tmp_path: Path, path: str):
+    """Замена артефакта `path` готовой временной директорией."""
+    path = Path(path)
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+    tmp_path.rename(path)
+
+
+def save_model(model, path: str):
+    """
+    Сохранение модели в директорию артефакта.
+
+    Запись идет во временную директорию, которая затем заменяет
+    существующий артефакт, чтобы читатели не увидели его частично.
+    """
+    tmp_path = staging_directory(path)
+    _write_artifact(model, tmp_path)
+    publish_directory(tmp_path, path)
+
+
+def read_meta(path: str) -> dict:
+    """Метаданные артефакта."""
+    with open(Path(path) / META_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def open_forest_arrays(path: str) -> tuple:
+    """
+    Метаданные и отображенные в память массивы узлов леса.
+
+    Returns:
+        (meta, nodes, values) — массивы только для чтения
+    """
+    path = Path(path)
+    meta = read_meta(path)
+    if meta.get('format') != 'forest':
+        raise ValueError(f"{path} не содержит лес деревьев (format={meta.get('format')})")
+    nodes = np.load(path / NODES_FILE, mmap_mode='r')
+    values = np.load(path / VALUES_FILE, mmap_mode='r')
+    return meta, nodes, values
+
+
+def open_packed_arrays(path: str):
+    """
+    Отображенные в память массивы инференса леса.
+
+    Returns:
+        Словарь массивов `PackedForest` (feature, threshold, children, value,
+        missing_go_to_left — None, если не задан) или None для артефакта
+        первой версии формата, где их нет
+    """
+    path = Path(path)
+    if not all((path / f"{name}.npy").exists() for name in PACKED_ARRAYS):
+        return None
+    arrays = {name: np.load(path / f"{name}.npy", mmap_mode='r') for name in PACKED_ARRAYS}
+    arrays['missing_go_to_left'] = None
+    if (path / MISSING_FILE).exists():
+        arrays['missing_go_to_left'] = np.load(path / MISSING_FILE, mmap_mode='r')
+    return arrays
+
+
+def _build_forest(meta: dict, nodes, values):
+    from sklearn.base import clone
+    from sklearn.tree._tree import Tree
+
+    module_name, class_name = meta['class'].rsplit('.', 1)
+    if not module_name.startswith('sklearn.'):
+        raise ValueError(f"Неподдерживаемый класс модели: {meta['class']}")
+    model = getattr(importlib.import_module(module_name), class_name)(**meta['params'])
+
+    model.estimator_ = clone(model.estimator)
+    n_features = meta['n_features_in_']
+    n_outputs = meta['n_outputs_']
+    n_classes = np.ones(n_outputs, dtype=np.intp)
+
+    # Шаблон дерева клонируется один раз: clone на каждое дерево
+    # занимает больше времени, чем восстановление самих узлов
+    template = clone(model.estimator_).set_params(
+        **{name: getattr(model, name) for name in model.estimator_params}
+    )
+    template.n_features_in_ = n_features
+    template.n_outputs_ = n_outputs
+
+    estimators = []
+    for info in meta['trees']:
+        start, stop = info['offset'], info['offset'] + info['node_count']
+        est = copy.copy(template)
+        est.random_state = info['random_state']
+        est.max_features_ = info['max_features_']
+        tree = Tree(n_features, n_classes, n_outputs)
+        tree.__setstate__({
+            'max_depth': info['max_depth'],
+            'node_count': info['node_count'],
+            'nodes': nodes[start:stop],
+            'values': values[start:stop]
+        })
+        est.tree_ = tree
+        estimators.append(est)
+
+    model.estimators_ = estimators
+    model.n_features_in_ = n_features
+    model.n_outputs_ = n_outputs
+    if meta.get('feature_names_in_') is not None:
+        model.feature_names_in_ = np.asarray(meta['feature_names_in_'], dtype=object)
+    return model
+
+
+def load_model(path: str):
+    """
+    Загрузка модели из директории артефакта или из старого `.pkl` файла.
+    """
+    path = Path(path)
+    if not path.is_dir():
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    meta = read_meta(path)
+    if meta.get('format') == 'pickle':
+        with open(path / PICKLE_FILE, 'rb') as f:
+            return pickle.load(f)
+    _, nodes, values = open_forest_arrays(path)
+    return _build_forest(meta, nodes, values)
+
+
+def artifact_size(path: str) -> int:
+    """Размер артефакта в байтах: файла или всех файлов директории."""
+    path = Path(path)
+    if not path.is_dir():
+        return path.stat().st_size
+    return sum(file.stat().st_size for file in path.iterdir() if file.is_file())
+
+
+def artifact_md5(path: str) -> str:
+    """md5 артефакта: файла или всех файлов директории в порядке имен."""
+    path = Path(path)
+    if not path.is_dir():
+        return file_md5(path)
+    digest = hashlib.md5()
+    for file in sorted(p for p in path.iterdir() if p.is_file()):
+        digest.update(file.name.encode('utf-8'))
+        digest.update(file_md5(file).encode('ascii'))
+    return digest.hexdigest()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Локальное хранилище результатов обучения с адресацией по содержимому.
+
+Ключ записи — хеш md5 данных, канонического JSON секций конфигурации,
+влияющих на обучение и отчет (`data`, `schema`, `model`, `thresholds`,
+`metrics`, `cross_validation` и секция включенного режима), и версии
+кода обучения (исходники train_model.py и всех модулей scripts/, которые
+он импортирует прямо или косвенно, и версии numpy/scikit-learn). При
+совпадении ключа артефакты этапа (`models/model`, `models/metrics.json`,
+`reports/training_report.json`) восстанавливаются без обучения. Размер
+хранилища ограничен, при превышении удаляются давно не использованные
+записи (LRU).
+"""
+
+import ast
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(".cache") / "models"
+ENTRY_FILE = "entry.json"
+
+# Модуль обучения: версия кода — его исходник и исходники всех модулей
+# scripts/, которые он импортирует
+_ROOT_MODULE = "train_model"
+
+# Секции конфигурации, влияющие на модель и отчет
+_CONFIG_SECTIONS = ('data', 'schema', 'model', 'thresholds', 'metrics', 'cross_validation')
+
+
+def _imported_modules(source: str) -> set:
+    """Имена модулей scripts/, импортируемых в исходнике (в том числе внутри функций)."""
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.ImportFrom) and node.module == 'scripts':
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and (node.module or '').startswith('scripts.'):
+            names.add(node.module.split('.')[1])
+        elif isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[1] for alias in node.names
+                         if alias.name.startswith('scripts.'))
+    return names
+
+
+def code_modules() -> list:
+    """
+    Файлы модулей, от которых зависит результат обучения.
+
+    Список выводится из импортов train_model.py по исходникам (транзитивно),
+    поэтому новый модуль, влияющий на артефакты или отчет, не выпадает из
+    версии кода.
+    """
+    scripts_dir = Path(__file__).resolve().parent
+    seen = set()
+    pending = [_ROOT_MODULE]
+    while pending:
+        name = pending.pop()
+        path = scripts_dir / f"{name}.py"
+        if name in seen or not path.exists():
+            continue
+        seen.add(name)
+        pending.extend(_imported_modules(path.read_text(encoding='utf-8')))
+    return sorted(f"{name}.py" for name in seen)
+
+
+def code_version() -> str:
+    """Хеш исходного кода обучения и версий numpy/scikit-learn."""
+    import numpy as np
+    import sklearn
+
+    digest = hashlib.md5()
+    scripts_dir = Path(__file__).resolve().parent
+    for name in code_modules():
+        digest.update(name.encode('utf-8'))
+        digest.update((scripts_dir / name).read_bytes())
+    digest.update(f"numpy={np.__version__};sklearn={sklearn.__version__}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def config_sections(config: dict, mode: str) -> dict:
+    """Секции конфигурации, влияющие на результат обучения в режиме `mode`."""
+    sections = {name: config.get(name) for name in _CONFIG_SECTIONS}
+    if mode != 'default':
+        sections[mode] = config.get(mode)
+    return sections
+
+
+def cache_key(data_md5: str, config: dict, mode: str) -> str:
+    """
+    Ключ записи кеша.
+
+    Args:
+        data_md5: md5 файла данных
+        config: Конфигурация модели
+        mode: Режим обучения ('default', 'sweep', 'early_stopping', 'out_of_core')
+    """
+    canonical = json.dumps(
+        {
+            'data_md5': data_md5, 'mode': mode,
+            'config': config_sections(config, mode), 'code': code_version()
+        },
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.md5(canonical.encode('utf-8')).hexdigest()
+
+
+def _entry_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+def _copy(source: Path, target: Path):
+    """Копирование файла или директории через временный путь с заменой."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    if tmp.is_dir():
+        shutil.rmtree(tmp)
+    if source.is_dir():
+        shutil.copytree(source, tmp)
+    else:
+        shutil.copy2(source, tmp)
+    if target.is_dir():
+        shutil.rmtree(target)
+    tmp.replace(target)
+
+
+class ModelCache:
+    """
+    Хранилище записей `<cache_dir>/<ключ>/` с ограничением размера.
+
+    Каждая запись хранит копии выходных файлов этапа под их
+    относительными путями и `entry.json` со временем последнего
+    использования.
+    """
+
+    def __init__(self, cache_dir=None, max_size_mb: float = 512):
+        self.cache_dir = Path(cache_dir or CACHE_DIR)
+        self.max_size_bytes = int(max_size_mb * 2 ** 20)
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def _touch(self, entry_dir: Path, outputs: list):
+        with open(entry_dir / ENTRY_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'last_used': time.time(), 'outputs': outputs}, f, indent=2)
+
+    def restore(self, key: str, outputs: list) -> bool:
+        """
+        Восстановление выходов записи на их места.
+
+        Returns:
+            False, если записи нет или в ней нет какого-либо из `outputs`
+        """
+        entry_dir = self._entry_dir(key)
+        if not (entry_dir / ENTRY_FILE).exists():
+            return False
+        if not all((entry_dir / "files" / output).exists() for output in outputs):
+            return False
+
+        for output in outputs:
+            _copy(entry_dir / "files" / output, Path(output))
+        self._touch(entry_dir, outputs)
+        return True
+
+    def store(self, key: str, outputs: list):
+        """Сохранение выходов этапа в запись и вытеснение старых записей."""
+        entry_dir = self._entry_dir(key)
+        tmp_dir = entry_dir.with_name(key + ".tmp")
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        for output in outputs:
+            _copy(Path(output), tmp_dir / "files" / output)
+        self._touch(tmp_dir, outputs)
+        if entry_dir.exists():
+            shutil.rmtree(entry_dir)
+        tmp_dir.rename(entry_dir)
+        self.evict(keep=key)
+
+    def entries(self) -> list:
+        """Записи кеша: (время последнего использования, размер, путь)."""
+        result = []
+        if not self.cache_dir.exists():
+            return result
+        for entry_dir in self.cache_dir.iterdir():
+            entry_file = entry_dir / ENTRY_FILE
+            if not entry_file.exists():
+                continue
+            try:
+                with open(entry_file, 'r', encoding='utf-8') as f:
+                    last_used = json.load(f)['last_used']
+            except (OSError, ValueError, KeyError):
+                last_used = 0.0
+            result.append((last_used, _entry_size(entry_dir), entry_dir))
+        return result
+
+    def evict(self, keep: str = None) -> list:
+        """
+        Удаление давно не использованных записей сверх лимита размера.
+
+        Returns:
+            Ключи удаленных записей
+        """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, entry_dir in entries:
+            if total <= self.max_size_bytes:
+                break
+            if entry_dir.name == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            evicted.append(entry_dir.name)
+        return evicted
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Локальный реестр запусков обучения и оценки в SQLite.
+
+train_model и evaluate_model добавляют по строке на запуск: md5 артефакта
+модели, md5 данных, md5 секций конфигурации, влияющих на обучение (те же,
+что в ключе scripts/model_cache.py), метрики, итог проверки качества, путь
+к артефакту и замеры времени этапа (scripts/perf.py). RMSE, MAE и R²
+хранятся в отдельных колонках с индексами по данным и метрикам, поэтому
+вопросы вида «какая конфигурация дала лучший RMSE на этих данных»
+решаются одним запросом, без выгрузки версий и чтения pickle. Чемпион —
+последняя продвинутая (promote) модель; история продвижений сохраняется.
+
+Запросы из командной строки:
+
+    python scripts/model_registry.py list
+    python scripts/model_registry.py best --metric r2 --data-md5 <md5>
+    python scripts/model_registry.py latest
+    python scripts/model_registry.py compare --fail-if-worse
+    python scripts/model_registry.py promote --latest
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+REGISTRY_PATH = Path("models") / "registry.sqlite"
+CONFIG_PATH = "config/model_config.yaml"
+
+STAGES = ('train', 'evaluate')
+METRICS = ('rmse', 'mae', 'r2')
+
+# Метрики, для которых большее значение лучше
+_MAXIMIZE = {'r2'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    stage TEXT NOT NULL,
+    model_md5 TEXT NOT NULL,
+    data_md5 TEXT,
+    config_md5 TEXT,
+    model_name TEXT,
+    mode TEXT,
+    artifact_path TEXT NOT NULL,
+    rmse REAL,
+    mae REAL,
+    r2 REAL,
+    quality_passed INTEGER,
+    cached INTEGER NOT NULL DEFAULT 0,
+    wall_seconds REAL,
+    metrics TEXT NOT NULL,
+    timings TEXT,
+    config TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_data_rmse ON runs (stage, data_md5, rmse);
+CREATE INDEX IF NOT EXISTS runs_data_r2 ON runs (stage, data_md5, r2);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model_md5);
+CREATE INDEX IF NOT EXISTS runs_config ON runs (config_md5);
+CREATE TABLE IF NOT EXISTS promotions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    promoted_at REAL NOT NULL,
+    note TEXT
+);
+"""
+
+# Колонки строки запуска в результатах запросов (JSON-поля разбираются)
+_JSON_COLUMNS = ('metrics', 'timings', 'config')
+
+
+def config_md5(config: dict, mode: str) -> tuple:
+    """
+    Хеш секций конфигурации, влияющих на обучение.
+
+    Returns:
+        (md5 канонического JSON, сами секции)
+    """
+    from scripts.model_cache import config_sections
+
+    sections = config_sections(config, mode)
+    canonical = json.dumps(sections, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.md5(canonical.encode('utf-8')).hexdigest(), sections
+
+
+def _row_dict(row: sqlite3.Row) -> dict:
+    result = dict(row)
+    for name in _JSON_COLUMNS:
+        if result.get(name) is not None:
+            result[name] = json.loads(result[name])
+    if result.get('quality_passed') is not None:
+        result['quality_passed'] = bool(result['quality_passed'])
+    if result.get('cached') is not None:
+        result['cached'] = bool(result['cached'])
+    return result
+
+
+def _order(metric: str) -> str:
+    if metric not in METRICS:
+        raise ValueError(f"Неизвестная метрика {metric!r}, доступны: {list(METRICS)}")
+    return f"{metric} {'DESC' if metric in _MAXIMIZE else 'ASC'}, id DESC"
+
+
+class ModelRegistry:
+    """Файл реестра SQLite со строками запусков и историей продвижений."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or REGISTRY_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.path), timeout=30)
+        self._connection.row_factory = sqlite3.Row
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        return [_row_dict(row) for row in self._connection.execute(sql, params)]
+
+    def _one(self, sql: str, params: tuple = ()):
+        rows = self._query(sql + " LIMIT 1", params)
+        return rows[0] if rows else None
+
+    def record(self, stage: str, model_md5: str, artifact_path: str, metrics: dict,
+               data_md5: str = None, config_md5: str = None, config: dict = None,
+               model_name: str = None, mode: str = None, quality_passed: bool = None,
+               timings: dict = None, cached: bool = False) -> int:
+        """
+        Запись запуска этапа.
+
+        Оценка без `config_md5` наследует конфигурацию, имя модели и режим
+        последнего обучения той же модели (по md5 артефакта).
+
+        Returns:
+            Номер записи
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Неизвестный этап {stage!r}, доступны: {list(STAGES)}")
+        if config_md5 is None:
+            trained = self._one(
+                "SELECT config_md5, model_name, mode FROM runs "
+                "WHERE stage = 'train' AND model_md5 = ? ORDER BY id DESC",
+                (model_md5,)
+            ) if stage == 'evaluate' else None
+            if trained is not None:
+                config_md5 = trained['config_md5']
+                model_name = model_name or trained['model_name']
+                mode = mode or trained['mode']
+
+        row = {
+            'created_at': time.time(),
+            'stage': stage,
+            'model_md5': model_md5,
+            'data_md5': data_md5,
+            'config_md5': config_md5,
+            'model_name': model_name,
+            'mode': mode,
+            'artifact_path': str(artifact_path),
+            **{name: metrics.get(name) for name in METRICS},
+            'quality_passed': None if quality_passed is None else int(quality_passed),
+            'cached': int(cached),
+            'wall_seconds': (timings or {}).get('total', {}).get('wall_seconds'),
+            'metrics': json.dumps(metrics, ensure_ascii=False),
+            'timings': None if timings is None else json.dumps(timings, ensure_ascii=False),
+            'config': None if config is None else json.dumps(config, ensure_ascii=False, default=str)
+        }
+        columns = ', '.join(row)
+        placeholders = ', '.join('?' for _ in row)
+        with self._connection:
+            cursor = self._connection.execute(
+                f"INSERT INTO runs ({columns}) VALUES ({placeholders})", tuple(row.values())
+            )
+        return cursor.lastrowid
+
+    def get(self, run_id: int):
+        return self._one("SELECT * FROM runs WHERE id = ?", (run_id,))
+
+    def runs(self, stage: str = None, data_md5: str = None, limit: int = 20) -> list:
+        """Последние запуски (новые первыми)."""
+        where, params = self._filters(stage, data_md5)
+        return self._query(f"SELECT * FROM runs{where} ORDER BY id DESC LIMIT ?", params + (limit,))
+
+    @staticmethod
+    def _filters(stage: str = None, data_md5: str = None, passed_only: bool = False) -> tuple:
+        conditions, params = [], []
+        if stage is not None:
+            conditions.append("stage = ?")
+            params.append(stage)
+        if data_md5 is not None:
+            conditions.append("data_md5 = ?")
+            params.append(data_md5)
+        if passed_only:
+            conditions.append("quality_passed = 1")
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, tuple(params)
+
+    def latest(self, stage: str = 'train', data_md5: str = None):
+        where, params = self._filters(stage, data_md5)
+        return self._one(f"SELECT * FROM runs{where} ORDER BY id DESC", params)
+
+    def best(self, metric: str = 'rmse', stage: str = 'train', data_md5: str = None,
+             passed_only: bool = True):
+        """Запуск с лучшим значением метрики (при равенстве — более поздний)."""
+        where, params = self._filters(stage, data_md5, passed_only)
+        where += (" AND " if where else " WHERE ") + f"{metric} IS NOT NULL"
+        return self._one(f"SELECT * FROM runs{where} ORDER BY {_order(metric)}", params)
+
+    def promote(self, run_id: int, note: str = None, force: bool = False) -> dict:
+        """
+        Продвижение модели обучения в чемпионы.
+
+        Args:
+            run_id: Номер записи обучения
+            note: Комментарий к продвижению
+            force: Продвинуть и модель, не прошедшую проверку качества
+        """
+        run = self.get(run_id)
+        if run is None or run['stage'] != 'train':
+            raise ValueError(f"Нет записи обучения с номером {run_id}")
+        if not run['quality_passed'] and not force:
+            raise ValueError(f"Модель записи {run_id} не прошла проверку качества")
+        with self._connection:
+            self._connection.execute(
+                "INSERT INTO promotions (run_id, promoted_at, note) VALUES (?, ?, ?)",
+                (run_id, time.time(), note)
+            )
+        return run
+
+    def champion(self):
+        """Текущий чемпион (последнее продвижение) с временем продвижения."""
+        return self._one(
+            "SELECT runs.*, promotions.promoted_at, promotions.note FROM promotions "
+            "JOIN runs ON runs.id = promotions.run_id ORDER BY promotions.id DESC"
+        )
+
+    def compare(self, run_id: int = None) -> dict:
+        """
+        Сравнение запуска (по умолчанию — последнего обучения) с чемпионом.
+
+        Returns:
+            Запуск, чемпион и разности метрик (`better` — для каждой метрики,
+            лучше ли запуск чемпиона); без чемпиона разностей нет
+        """
+        run = self.latest() if run_id is None else self.get(run_id)
+        if run is None:
+            raise ValueError("В реестре нет запусков обучения" if run_id is None
+                             else f"Нет записи с номером {run_id}")
+        champion = self.champion()
+        result = {'run': run, 'champion': champion, 'deltas': {}, 'same_data': None}
+        if champion is None:
+            return result
+        result['same_data'] = run['data_md5'] == champion['data_md5']
+        for name in METRICS:
+            if run[name] is None or champion[name] is None:
+                continue
+            delta = run[name] - champion[name]
+            result['deltas'][name] = {
+                'run': run[name],
+                'champion': champion[name],
+                'delta': delta,
+                'better': delta > 0 if name in _MAXIMIZE else delta < 0
+            }
+        return result
+
+
+def open_registry(registry_config: dict):
+    """Реестр из секции `registry` конфигурации или None, если он выключен."""
+    if not (registry_config or {}).get('enabled', False):
+        return None
+    return ModelRegistry(registry_config.get('path'))
+
+
+def _stage_timings() -> dict:
+    from scripts import perf
+
+    return perf.current_summary()
+
+
+def record_training(config: dict, mode: str, report: dict, model_path: str,
+                    cached: bool = False):
+    """Запись обучения по отчету этапа (без реестра в конфигурации — ничего)."""
+    from scripts.model_artifact import artifact_md5
+
+    registry = open_registry(config.get('registry'))
+    if registry is None:
+        return None
+    digest, sections = config_md5(config, mode)
+    with registry:
+        run_id = registry.record(
+            'train', artifact_md5(model_path), model_path, report['metrics'],
+            data_md5=report['data_info'].get('data_md5'), config_md5=digest, config=sections,
+            model_name=report.get('model_name'), mode=mode,
+            quality_passed=report['quality_check']['passed'],
+            timings=_stage_timings(), cached=cached
+        )
+    print(f"Запуск записан в реестр моделей (№{run_id})")
+    return run_id
+
+
+def record_evaluation(registry_config: dict, report: dict, model_path: str, data_path: str = None):
+    """Запись оценки по отчету этапа (без реестра в конфигурации — ничего)."""
+    from scripts.dataset import dataset_md5
+    from scripts.model_artifact import artifact_md5
+
+    registry = open_registry(registry_config)
+    if registry is None:
+        return None
+    data_md5 = dataset_md5(data_path) if data_path else None
+    with registry:
+        run_id = registry.record(
+            'evaluate', artifact_md5(model_path), model_path, report['metrics'],
+            data_md5=data_md5, model_name=report['model_info']['type'],
+            timings=_stage_timings()
+        )
+    print(f"Оценка записана в реестр моделей (№{run_id})")
+    return run_id
+
+
+def _summary_line(run: dict) -> str:
+    metrics = "  ".join(
+        f"{name.upper()}={run[name]:.4f}" for name in METRICS if run[name] is not None
+    )
+    passed = {True: "✅", False: "❌", None: "—"}[run['quality_passed']]
+    created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['created_at']))
+    return (f"№{run['id']:<5} {created}  {run['stage']:<8} {passed} {metrics}  "
+            f"модель {run['model_md5'][:8]}  данные {(run['data_md5'] or '—')[:8]}  "
+            f"конфигурация {(run['config_md5'] or '—')[:8]}  {run['model_name'] or ''}")
+
+
+def _print_run(run):
+    if run is None:
+        print("Подходящих запусков нет")
+        return
+    print(json.dumps(run, indent=2, ensure_ascii=False))
+
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Запросы к реестру моделей")
+    parser.add_argument("--registry", default=None, help="Файл реестра (по умолчанию registry.path)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    listing = commands.add_parser("list", help="последние запуски")
+    listing.add_argument("--stage", choices=STAGES, default=None)
+    listing.add_argument("--data-md5", default=None)
+    listing.add_argument("--limit", type=int, default=20)
+
+    best = commands.add_parser("best", help="лучший запуск по метрике")
+    best.add_argument("--metric", choices=METRICS, default='rmse')
+    best.add_argument("--stage", choices=STAGES, default='train')
+    best.add_argument("--data-md5", default=None)
+    best.add_argument("--include-failed", action="store_true",
+                      help="Учитывать модели, не прошедшие проверку качества")
+
+    latest = commands.add_parser("latest", help="последний запуск")
+    latest.add_argument("--stage", choices=STAGES, default='train')
+    latest.add_argument("--data-md5", default=None)
+
+    compare = commands.add_parser("compare", help="сравнение запуска с чемпионом")
+    compare.add_argument("--run", type=int, default=None, help="Номер записи (по умолчанию последнее обучение)")
+    compare.add_argument("--metric", choices=METRICS, default='rmse', help="Метрика для --fail-if-worse")
+    compare.add_argument("--fail-if-worse", action="store_true",
+                         help="Код выхода 1, если запуск хуже чемпиона по --metric")
+
+    promote = commands.add_parser("promote", help="продвижение модели в чемпионы")
+    target = promote.add_mutually_exclusive_group(required=True)
+    target.add_argument("run", type=int, nargs='?', help="Номер записи обучения")
+    target.add_argument("--latest", action="store_true", help="Последнее обучение")
+    promote.add_argument("--note", default=None)
+    promote.add_argument("--force", action="store_true",
+                         help="Продвинуть модель, не прошедшую проверку качества")
+    return parser.parse_args(argv)
+
+
+def registry_path(args) -> str:
+    if args.registry:
+        return args.registry
+    import yaml
+
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    return (config.get('registry') or {}).get('path') or str(REGISTRY_PATH)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    path = registry_path(args)
+    if not Path(path).exists():
+        print(f"Реестр {path} не найден: запусков еще не было")
+        sys.exit(1)
+
+    with ModelRegistry(path) as registry:
+        if args.command == 'list':
+            for run in registry.runs(args.stage, args.data_md5, args.limit):
+                print(_summary_line(run))
+        elif args.command == 'best':
+            _print_run(registry.best(args.metric, args.stage, args.data_md5,
+                                     passed_only=not args.include_failed))
+        elif args.command == 'latest':
+            _print_run(registry.latest(args.stage, args.data_md5))
+        elif args.command == 'promote':
+            try:
+                if args.latest:
+                    latest = registry.latest()
+                    if latest is None:
+                        raise ValueError("В реестре нет запусков обучения")
+                    run_id = latest['id']
+                else:
+                    run_id = args.run
+                run = registry.promote(run_id, args.note, args.force)
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            print(f"✅ Чемпион: {_summary_line(run)}")
+        elif args.command == 'compare':
+            result = registry.compare(args.run)
+            print(f"Запуск:  {_summary_line(result['run'])}")
+            if result['champion'] is None:
+                print("Чемпиона нет (python scripts/model_registry.py promote --latest)")
+                return
+            print(f"Чемпион: {_summary_line(result['champion'])}")
+            if not result['same_data']:
+                print("⚠️  Запуск и чемпион оценены на разных данных")
+            for name, entry in result['deltas'].items():
+                mark = "✅" if entry['better'] else ("=" if entry['delta'] == 0 else "❌")
+                print(f"  {mark} {name.upper()}: {entry['run']:.4f} vs {entry['champion']:.4f} "
+                      f"({entry['delta']:+.4f})")
+            worse = result['deltas'].get(args.metric)
+            if args.fail_if_worse and worse is not None and not worse['better'] and worse['delta'] != 0:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
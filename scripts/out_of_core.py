@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Обучение леса без загрузки всего датасета в память (out-of-core).
+
+Тестовая выборка выделяется не глобальным перемешиванием, а
+детерминированным хешем значений каждой строки, поэтому строка попадает
+в тест независимо от разбиения на блоки и порядка файла. Обучающие
+строки за один проход по файлу (блоками по `out_of_core.chunksize`)
+раскладываются по хешу в сегменты на диске — внешнее перемешивание:
+файл может быть упорядочен (например, по районам), а сегменты остаются
+случайными подвыборками размером около `chunksize` строк. На каждом
+сегменте обучается лес из `trees_per_shard` деревьев (по умолчанию
+`n_estimators` модели делится между сегментами), деревья всех лесов
+объединяются в один регрессор. Метрики на тестовой выборке считаются
+сливаемыми аккумуляторами (`streaming_metrics`) по блокам, поэтому
+пиковая память ограничена размером сегмента.
+"""
+
+import hashlib
+import math
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scripts.dataset import default_schema, iter_csv_chunks
+from scripts.streaming_metrics import RegressionAccumulator
+from scripts.validation_stats import RowFingerprints
+
+DEFAULT_OUT_OF_CORE = {
+    'chunksize': 100000,
+    'trees_per_shard': None,
+    'work_dir': None
+}
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_COUNT_BLOCK_SIZE = 1 << 20
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """Финальное перемешивание splitmix64 (uint64 -> uint64)."""
+    with np.errstate(over='ignore'):
+        z = values + _GOLDEN_GAMMA
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def row_hashes(frame, seed: int = 0) -> np.ndarray:
+    """Хеши строк (uint64), перемешанные с зерном."""
+    hashes = RowFingerprints.hash_rows(frame.to_numpy(dtype=np.float64))
+    return _mix64(hashes ^ _mix64(np.full(1, seed, dtype=np.uint64)))
+
+
+def rows_md5(frame) -> str:
+    """md5 хешей строк по порядку: совпадает, только если совпадают все строки."""
+    return hashlib.md5(row_hashes(frame).tobytes()).hexdigest()
+
+
+def holdout_mask(frame, test_size: float, seed: int = 0) -> np.ndarray:
+    """
+    Принадлежность строк тестовой выборке по хешу их значений.
+
+    Доля тестовых строк в среднем равна `test_size`; одинаковые строки
+    всегда попадают в одну и ту же выборку.
+    """
+    uniform = (row_hashes(frame, seed) >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+    return uniform < test_size
+
+
+def shard_ids(frame, n_shards: int, seed: int = 0) -> np.ndarray:
+    """Номер сегмента обучающей строки (не зависит от `holdout_mask`)."""
+    return (row_hashes(frame, seed + 1) % np.uint64(n_shards)).astype(np.int64)
+
+
+def count_rows(data_path) -> int:
+    """Число строк текстового файла без его разбора."""
+    rows = 0
+    last = b'\n'
+    with open(data_path, 'rb') as f:
+        for block in iter(lambda: f.read(_COUNT_BLOCK_SIZE), b''):
+            rows += block.count(b'\n')
+            last = block[-1:]
+    return rows + (last != b'\n')
+
+
+def merge_forests(forests: list, random_state=None):
+    """Объединение деревьев нескольких лесов одного класса в один лес."""
+    merged = forests[0]
+    for forest in forests[1:]:
+        if type(forest) is not type(merged) or \
+                list(forest.feature_names_in_) != list(merged.feature_names_in_):
+            raise ValueError("Объединяемые леса должны иметь один класс и набор признаков")
+        merged.estimators_.extend(forest.estimators_)
+    merged.set_params(n_estimators=len(merged.estimators_), random_state=random_state)
+    return merged
+
+
+def _append_rows(path: Path, frame, columns: list):
+    with open(path, 'ab') as f:
+        frame[columns].to_numpy(dtype=np.float64).tofile(f)
+
+
+def _to_frame(values: np.ndarray, schema) -> pd.DataFrame:
+    """Строки в типах схемы (float64 точно хранит значения всех типов схемы)."""
+    return pd.DataFrame(values, columns=schema.columns).astype(schema.dtypes)
+
+
+def _read_rows(path: Path, schema) -> pd.DataFrame:
+    values = np.fromfile(path, dtype=np.float64).reshape(-1, len(schema.columns))
+    return _to_frame(values, schema)
+
+
+def _iter_rows(path: Path, schema, chunksize: int):
+    """Блоки строк файла без чтения его целиком."""
+    if not path.exists():
+        return
+    values = np.memmap(path, dtype=np.float64, mode='r').reshape(-1, len(schema.columns))
+    for start in range(0, len(values), chunksize):
+        yield _to_frame(np.array(values[start:start + chunksize]), schema)
+
+
+def _shard_seed(random_state, index: int):
+    if random_state is None:
+        return None
+    return int(np.random.SeedSequence([int(random_state), index]).generate_state(1)[0])
+
+
+def train_out_of_core(data_path: str, config: dict, schema=None) -> tuple:
+    """
+    Потоковое обучение объединенного леса и оценка на тестовой выборке.
+
+    Returns:
+        (модель, метрики на тестовой выборке, отчет о потоковом обучении
+        с размерами выборок)
+    """
+    from scripts.estimators import get_estimator_class, thread_budget
+    from scripts.train_model import build_model
+
+    schema = schema or default_schema()
+    settings = dict(DEFAULT_OUT_OF_CORE, **(config.get('out_of_core') or {}))
+    chunksize = int(settings['chunksize'])
+    test_size = config['data']['test_size']
+    split_seed = config['data']['random_state']
+    params = config['model']['params']
+    n_jobs = config['model'].get('n_jobs')
+    estimator_class = get_estimator_class(config['model']['name'])
+    if not hasattr(estimator_class(), 'estimator_params'):
+        raise ValueError(
+            f"Потоковое обучение поддерживает только леса, а не {estimator_class.__name__}"
+        )
+
+    # Сегментов столько, чтобы в каждом было около chunksize обучающих строк
+    n_shards = max(1, math.ceil(count_rows(data_path) * (1 - test_size) / chunksize))
+    trees_per_shard = settings['trees_per_shard']
+    if trees_per_shard is None:
+        trees_per_shard = math.ceil(params.get('n_estimators', 100) / n_shards)
+    trees_per_shard = max(1, int(trees_per_shard))
+    print(f"Потоковое обучение: блоки по {chunksize} строк, {n_shards} сегментов "
+          f"по {trees_per_shard} деревьев")
+
+    with tempfile.TemporaryDirectory(prefix="out_of_core-", dir=settings['work_dir']) as work_dir:
+        work_dir = Path(work_dir)
+        test_path = work_dir / "test.f64"
+        shard_paths = [work_dir / f"shard-{index}.f64" for index in range(n_shards)]
+
+        # Один проход по файлу: тестовые строки и сегменты обучающих строк
+        train_size = test_size_rows = 0
+        for chunk in iter_csv_chunks(data_path, chunksize, schema=schema):
+            in_test = holdout_mask(chunk, test_size, split_seed)
+            _append_rows(test_path, chunk[in_test], schema.columns)
+            test_size_rows += int(in_test.sum())
+            train = chunk[~in_test]
+            train_size += len(train)
+            shards = shard_ids(train, n_shards, split_seed)
+            for index in np.unique(shards).tolist():
+                _append_rows(shard_paths[index], train[shards == index], schema.columns)
+
+        forests = []
+        for index, shard_path in enumerate(shard_paths):
+            if not shard_path.exists():
+                continue
+            shard = _read_rows(shard_path, schema)
+            forest = build_model(config, dict(
+                params, n_estimators=trees_per_shard,
+                random_state=_shard_seed(params.get('random_state'), index)
+            ))
+            with thread_budget(forest, n_jobs):
+                forest.fit(shard[schema.features], shard[schema.target])
+            forests.append(forest)
+            print(f"  сегмент {index}: {len(shard)} строк")
+
+        if not forests:
+            raise ValueError("Нет обучающих строк")
+        model = merge_forests(forests, params.get('random_state'))
+
+        print("Оценка на тестовой выборке...")
+        accumulator = RegressionAccumulator()
+        for test in _iter_rows(test_path, schema, chunksize):
+            accumulator.update(test[schema.target], model.predict(test[schema.features]))
+
+    return model, accumulator.metrics(), {
+        'chunksize': chunksize,
+        'trees_per_shard': trees_per_shard,
+        'n_shards': len(forests),
+        'train_size': train_size,
+        'test_size': test_size_rows
+    }
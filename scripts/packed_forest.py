@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Упакованный лес для быстрого инференса.
+
+Деревья обученного леса (RandomForestRegressor, ExtraTreesRegressor)
+переносятся в общие непрерывные массивы признаков, порогов, потомков и
+значений. Предсказание для пачки строк вычисляется векторно в NumPy —
+все деревья проходятся одновременно, уровень за уровнем, — без вызова
+Python-кода на каждое дерево, как в `model.predict`.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+# Строк в блоке предсказания: матрица индексов узлов блока
+# (строки x деревья) остается небольшой
+PREDICT_BLOCK_ROWS = 4096
+
+_LEAF = -1
+
+
+def float32_floor(threshold: np.ndarray) -> np.ndarray:
+    """
+    Пороги в float32, округленные вниз.
+
+    Наибольшее float32 не больше порога: для признаков в float32
+    сравнение x <= порог дает тот же результат, что и в float64.
+    """
+    rounded = np.asarray(threshold).astype(np.float32)
+    too_big = rounded > threshold
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+class PackedForest:
+    """
+    Лес в виде плоских массивов.
+
+    `children[i]` — пара (левый, правый потомок) узла `i`. Листья ссылаются
+    сами на себя, поэтому обход фиксированной глубины `max_depth` корректно
+    завершается для деревьев любой глубины.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth,
+                 feature_names=None, missing_go_to_left=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.feature_names = None if feature_names is None else list(feature_names)
+        self.missing_go_to_left = missing_go_to_left
+        self.n_trees = len(roots)
+        self.n_nodes = len(feature)
+
+    @classmethod
+    def from_nodes(cls, nodes, values, tree_offsets, max_depth, feature_names=None,
+                   float32_thresholds: bool = False) -> "PackedForest":
+        """
+        Упаковка из массивов узлов scikit-learn, идущих подряд по деревьям.
+
+        Args:
+            nodes: Структурированный массив узлов всех деревьев
+            values: Значения узлов, форма (n_nodes, 1, 1)
+            tree_offsets: Индекс корня каждого дерева в `nodes`
+            max_depth: Наибольшая глубина дерева
+            feature_names: Имена признаков модели
+            float32_thresholds: Хранить пороги в float32 (вдвое меньше памяти;
+                порог округляется вниз, поэтому решения в узлах не меняются)
+        """
+        if values.shape[1:] != (1, 1):
+            raise ValueError("Поддерживаются только регрессоры с одним выходом")
+
+        n_nodes = len(nodes)
+        tree_offsets = np.asarray(tree_offsets, dtype=np.int64)
+        tree_ids = np.repeat(np.arange(len(tree_offsets)),
+                             np.diff(np.append(tree_offsets, n_nodes)))
+        offsets = tree_offsets[tree_ids]
+        own = np.arange(n_nodes, dtype=np.int64)
+        is_leaf = nodes['left_child'] == _LEAF
+
+        children = np.empty((n_nodes, 2), dtype=np.int32)
+        children[:, 0] = np.where(is_leaf, own, nodes['left_child'] + offsets)
+        children[:, 1] = np.where(is_leaf, own, nodes['right_child'] + offsets)
+        feature = np.where(is_leaf, 0, nodes['feature']).astype(np.int32)
+        threshold = np.where(is_leaf, np.inf, nodes['threshold'])
+        if float32_thresholds:
+            threshold = float32_floor(threshold)
+
+        missing_go_to_left = None
+        if 'missing_go_to_left' in nodes.dtype.names and nodes['missing_go_to_left'].any():
+            missing_go_to_left = nodes['missing_go_to_left'].astype(bool)
+
+        return cls(feature, threshold, children,
+                   np.ascontiguousarray(values[:, 0, 0], dtype=np.float64),
+                   tree_offsets.astype(np.int32), max_depth,
+                   feature_names=feature_names, missing_go_to_left=missing_go_to_left)
+
+    @classmethod
+    def from_estimator(cls, model, float32_thresholds: bool = False) -> "PackedForest":
+        """Упаковка обученного леса scikit-learn."""
+        states = [est.tree_.__getstate__() for est in model.estimators_]
+        sizes = [state['node_count'] for state in states]
+        return cls.from_nodes(
+            np.concatenate([state['nodes'] for state in states]),
+            np.concatenate([state['values'] for state in states]),
+            np.concatenate([[0], np.cumsum(sizes)[:-1]]),
+            max(state['max_depth'] for state in states),
+            feature_names=getattr(model, 'feature_names_in_', None),
+            float32_thresholds=float32_thresholds
+        )
+
+    @classmethod
+    def from_artifact(cls, path: str, float32_thresholds: bool = False) -> "PackedForest":
+        """
+        Лес из артефакта `models/model/` без сборки модели scikit-learn.
+
+        Массивы инференса артефакта используются как отображенные в память,
+        без копирования; копируются только пороги при `float32_thresholds`.
+        Артефакт первой версии формата упаковывается из узлов scikit-learn.
+        """
+        from scripts.model_artifact import open_forest_arrays, open_packed_arrays
+
+        meta, nodes, values = open_forest_arrays(Path(path))
+        arrays = open_packed_arrays(path)
+        if arrays is not None:
+            threshold = arrays['threshold']
+            if float32_thresholds:
+                threshold = float32_floor(threshold)
+            return cls(
+                arrays['feature'], threshold, arrays['children'], arrays['value'],
+                np.asarray([tree['offset'] for tree in meta['trees']], dtype=np.int32),
+                max(tree['max_depth'] for tree in meta['trees']),
+                feature_names=meta.get('feature_names_in_'),
+                missing_go_to_left=arrays['missing_go_to_left']
+            )
+        return cls.from_nodes(
+            nodes, values,
+            [tree['offset'] for tree in meta['trees']],
+            max(tree['max_depth'] for tree in meta['trees']),
+            feature_names=meta.get('feature_names_in_'),
+            float32_thresholds=float32_thresholds
+        )
+
+    def _as_matrix(self, X) -> np.ndarray:
+        if self.feature_names is not None and hasattr(X, 'columns'):
+            if list(X.columns) != self.feature_names:
+                raise ValueError("Признаки не совпадают с признаками, на которых обучена модель")
+        # Как и scikit-learn, сравниваем значения признаков в float32
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        flat_X = X.ravel()
+        flat_children = self.children.ravel()
+        row_start = (np.arange(len(X), dtype=np.intp) * X.shape[1])[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            x = np.take(flat_X, row_start + np.take(self.feature, node))
+            # NaN, как и в scikit-learn, уходит вправо, если не задано иное
+            go_right = ~(x <= np.take(self.threshold, node))
+            if self.missing_go_to_left is not None:
+                go_right &= ~(np.isnan(x) & np.take(self.missing_go_to_left, node))
+            node = np.take(flat_children, 2 * node + go_right)
+        return np.take(self.value, node).mean(axis=1)
+
+    def predict(self, X) -> np.ndarray:
+        """Предсказание для пачки строк (DataFrame или массив)."""
+        X = self._as_matrix(X)
+        if len(X) <= PREDICT_BLOCK_ROWS:
+            return self._predict_block(X)
+        return np.concatenate([
+            self._predict_block(X[start:start + PREDICT_BLOCK_ROWS])
+            for start in range(0, len(X), PREDICT_BLOCK_ROWS)
+        ])
+
+
+def inference_artifact(inference_config: dict, model_path: str) -> str:
+    """Артефакт, который читает движок: компактная модель при `engine: compact`, иначе `model_path`."""
+    if inference_config.get('engine', 'sklearn') == 'compact':
+        return inference_config.get('compact_path') or "models/model_compact"
+    return model_path
+
+
+def load_predictor(model, model_path: str, inference_config: dict):
+    """
+    Движок предсказаний по секции `inference` конфигурации.
+
+    Returns:
+        Объект с методом predict: сама модель (`engine: sklearn`),
+        упакованный лес (`engine: packed`) или компактный экспорт модели
+        из `compact_path` (`engine: compact`, scripts/export_model.py)
+    """
+    from scripts.model_artifact import is_tree_forest, read_meta
+
+    engine = inference_config.get('engine', 'sklearn')
+    if engine == 'sklearn':
+        return model
+    if engine == 'compact':
+        from scripts.compact_forest import load_compact
+
+        compact_path = inference_artifact(inference_config, model_path)
+        print(f"Загрузка компактной модели из {compact_path}...")
+        return load_compact(compact_path, source_path=model_path)
+    if engine != 'packed':
+        raise ValueError(f"Неизвестный движок инференса: {engine}")
+
+    float32_thresholds = inference_config.get('float32_thresholds', False)
+    if Path(model_path).is_dir() and read_meta(model_path).get('format') == 'forest':
+        print(f"Лес для инференса из {model_path} (float32 пороги: {float32_thresholds})...")
+        return PackedForest.from_artifact(model_path, float32_thresholds=float32_thresholds)
+    if not is_tree_forest(model):
+        print(f"{type(model).__name__} не является лесом деревьев, используется движок sklearn")
+        return model
+
+    print(f"Упаковка леса для инференса (float32 пороги: {float32_thresholds})...")
+    return PackedForest.from_estimator(model, float32_thresholds=float32_thresholds)
+
+
+def open_predictor(model_path: str, inference_config: dict):
+    """
+    Движок предсказаний прямо из артефакта модели.
+
+    Для `engine: packed` и `engine: compact` лес не собирается в объект
+    scikit-learn: предсказания идут по отображенным в память массивам, и
+    загрузка почти не зависит от размера модели. В остальных случаях
+    модель загружается `load_model` и передается в `load_predictor`.
+    """
+    from scripts.model_artifact import load_model, read_meta
+
+    engine = inference_config.get('engine', 'sklearn')
+    is_forest = Path(model_path).is_dir() and read_meta(model_path).get('format') == 'forest'
+    if engine == 'compact' or (engine == 'packed' and is_forest):
+        return load_predictor(None, model_path, inference_config)
+    return load_predictor(load_model(model_path), model_path, inference_config)
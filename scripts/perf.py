@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Легковесные замеры этапов pipeline: время, CPU и пик памяти по фазам.
+
+Этап (`validate_data`, `train_model`, `evaluate_model`) оборачивается в
+`stage(name)`, а его фазы — в `phase(name)`. Для каждой фазы
+записываются время (wall), процессорное время и пиковый RSS; результат
+сохраняется в `reports/perf_<этап>.json`, который объявлен в `dvc.yaml`
+как `metrics`, поэтому `dvc metrics diff` показывает изменения
+производительности рядом с RMSE/R². Фазы не вкладываются друг в друга
+(пик RSS сбрасывается в начале каждой фазы). Вне `stage` вызовы `phase`
+ничего не делают.
+
+Если задана переменная окружения `PERF_PROFILE` (не пустая и не `0`),
+весь этап дополнительно профилируется cProfile в `reports/perf_<этап>.prof`.
+"""
+
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PERF_DIR = Path("reports")
+PROFILE_ENV = "PERF_PROFILE"
+
+_ACTIVE = []
+
+
+def read_peak_rss() -> float:
+    """Пиковый RSS процесса в МБ (VmHWM; иначе ru_maxrss)."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: килобайты в Linux, байты в macOS
+    return maxrss / 2 ** 20 if sys.platform == 'darwin' else maxrss / 1024
+
+
+def reset_peak_rss() -> bool:
+    """Сброс пика RSS (Linux: /proc/self/clear_refs); False, если недоступно."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class PerfRecorder:
+    """Замеры фаз одного этапа."""
+
+    def __init__(self, stage_name: str):
+        self.stage_name = stage_name
+        self.phases = {}
+        self.peak_is_per_phase = reset_peak_rss()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+
+    @contextmanager
+    def phase(self, name: str):
+        if self.peak_is_per_phase:
+            reset_peak_rss()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            entry = self.phases.setdefault(
+                name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'peak_rss_mb': 0.0}
+            )
+            entry['wall_seconds'] = round(entry['wall_seconds'] + time.perf_counter() - start_wall, 6)
+            entry['cpu_seconds'] = round(entry['cpu_seconds'] + time.process_time() - start_cpu, 6)
+            entry['peak_rss_mb'] = round(max(entry['peak_rss_mb'], read_peak_rss()), 3)
+
+    def summary(self) -> dict:
+        peak = max([entry['peak_rss_mb'] for entry in self.phases.values()] + [read_peak_rss()])
+        return {
+            'stage': self.stage_name,
+            'total': {
+                'wall_seconds': round(time.perf_counter() - self._start_wall, 6),
+                'cpu_seconds': round(time.process_time() - self._start_cpu, 6),
+                'peak_rss_mb': round(peak, 3)
+            },
+            'phases': self.phases,
+            'peak_rss_per_phase': self.peak_is_per_phase
+        }
+
+    def save(self, path) -> dict:
+        summary = self.summary()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        return summary
+
+
+@contextmanager
+def phase(name: str):
+    """Замер фазы текущего этапа (без активного этапа — ничего не делает)."""
+    if not _ACTIVE:
+        yield
+        return
+    with _ACTIVE[-1].phase(name):
+        yield
+
+
+def current_summary():
+    """Замеры текущего этапа на данный момент (None без активного этапа)."""
+    return _ACTIVE[-1].summary() if _ACTIVE else None
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV, '') not in ('', '0')
+
+
+@contextmanager
+def stage(name: str, output_dir=None):
+    """
+    Замеры этапа pipeline с сохранением в `<output_dir>/perf_<name>.json`.
+
+    Отчет сохраняется и при выходе через исключение (в том числе
+    `sys.exit` с кодом ошибки из проверки качества).
+    """
+    output_dir = Path(output_dir or PERF_DIR)
+    recorder = PerfRecorder(name)
+    profiler = None
+    if profiling_enabled():
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    _ACTIVE.append(recorder)
+    try:
+        yield recorder
+    finally:
+        _ACTIVE.pop()
+        if profiler is not None:
+            profiler.disable()
+            output_dir.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(output_dir / f"perf_{name}.prof"))
+        recorder.save(output_dir / f"perf_{name}.json")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Параллельная перестановочная важность признаков для evaluate_model.
+
+Важность признака — рост RMSE после случайной перестановки его столбца,
+усредненный по `n_repeats` перестановкам, с доверительным интервалом
+Стьюдента. Матрица признаков один раз копируется в общую память
+(`scripts/shared_arrays.py`) и доступна воркерам только для чтения.
+Задачи (признак, повтор) распределяются по пулу процессов пачками:
+воркер держит один буфер из нескольких копий матрицы, в каждой копии
+переставляет только столбец своей задачи и предсказывает всю пачку
+одним вызовом predict, затем восстанавливает столбцы из общей матрицы.
+Перестановка задачи определяется ее зерном, поэтому результат не
+зависит от числа процессов и размера пачек.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scripts.shared_arrays import SharedArrays, attach
+
+DEFAULT_PERMUTATION_IMPORTANCE = {
+    'n_repeats': 10,
+    'n_workers': None,
+    'batch_rows': 65536,
+    'max_rows': 100000,
+    'confidence': 0.95,
+    'random_state': 42
+}
+
+_WORKER = {}
+
+
+class Permuter:
+    """Расчет RMSE на пачках перестановок одной общей матрицы."""
+
+    def __init__(self, predictor, X: np.ndarray, y: np.ndarray, feature_names: list,
+                 batch_rows: int):
+        self.predictor = predictor
+        self.X = X
+        self.y = y
+        self.feature_names = list(feature_names)
+        self.copies = max(1, int(batch_rows) // max(1, len(X)))
+        self._buffer = None
+
+    def _frame(self, values: np.ndarray):
+        import pandas as pd
+
+        return pd.DataFrame(values, columns=self.feature_names, copy=False)
+
+    def rmse(self, y_pred: np.ndarray) -> float:
+        return float(np.sqrt(np.mean((self.y - y_pred) ** 2)))
+
+    def baseline(self) -> float:
+        return self.rmse(self.predictor.predict(self._frame(self.X)))
+
+    def run(self, tasks: list) -> list:
+        """
+        RMSE для задач (признак, повтор, зерно) пачками по `copies` задач.
+
+        Returns:
+            Список (признак, повтор, RMSE) в порядке задач
+        """
+        n_rows = len(self.X)
+        if self._buffer is None:
+            self._buffer = np.tile(self.X, (self.copies, 1))
+        results = []
+        for start in range(0, len(tasks), self.copies):
+            batch = tasks[start:start + self.copies]
+            for slot, (feature, _, seed) in enumerate(batch):
+                permutation = np.random.default_rng(seed).permutation(n_rows)
+                self._buffer[slot * n_rows:(slot + 1) * n_rows, feature] = self.X[permutation, feature]
+            y_pred = self.predictor.predict(self._frame(self._buffer[:len(batch) * n_rows]))
+            for slot, (feature, repeat, _) in enumerate(batch):
+                rows = slice(slot * n_rows, (slot + 1) * n_rows)
+                results.append((feature, repeat, self.rmse(y_pred[rows])))
+                self._buffer[rows, feature] = self.X[:, feature]
+        return results
+
+
+def _init_worker(spec: dict, predictor, feature_names: list, batch_rows: int):
+    arrays = attach(spec)
+    _WORKER['permuter'] = Permuter(predictor, arrays['X'], arrays['y'], feature_names, batch_rows)
+
+
+def _run_tasks(tasks: list) -> list:
+    return _WORKER['permuter'].run(tasks)
+
+
+def plan_tasks(n_features: int, n_repeats: int, random_state: int) -> list:
+    """Задачи (признак, повтор, зерно); зерно зависит только от задачи."""
+    seeds = np.random.SeedSequence(random_state).spawn(n_features * n_repeats)
+    return [
+        (feature, repeat, seeds[feature * n_repeats + repeat].generate_state(1)[0].item())
+        for feature in range(n_features) for repeat in range(n_repeats)
+    ]
+
+
+def summarize(feature_names: list, baseline: float, scores: np.ndarray, confidence: float) -> dict:
+    """Среднее, стандартное отклонение и доверительный интервал роста RMSE."""
+    from scipy import stats
+
+    drops = scores - baseline
+    n_repeats = drops.shape[1]
+    features = {}
+    for name, values in zip(feature_names, drops):
+        mean = float(np.mean(values))
+        std = float(np.std(values, ddof=1)) if n_repeats > 1 else 0.0
+        half_width = 0.0
+        if n_repeats > 1:
+            half_width = float(stats.t.ppf((1 + confidence) / 2, n_repeats - 1) * std / np.sqrt(n_repeats))
+        features[name] = {
+            'mean': mean,
+            'std': std,
+            'ci_low': mean - half_width,
+            'ci_high': mean + half_width
+        }
+    return features
+
+
+def permutation_importance(predictor, X, y, settings: dict = None) -> dict:
+    """
+    Перестановочная важность признаков по росту RMSE.
+
+    Args:
+        predictor: Объект с методом predict (модель или упакованный лес)
+        X, y: Данные оценки; при числе строк больше `max_rows` берется
+            случайная выборка строк
+        settings: Секция `permutation_importance` конфигурации
+
+    Returns:
+        Результат для отчета об оценке
+    """
+    settings = dict(DEFAULT_PERMUTATION_IMPORTANCE, **(settings or {}))
+    n_repeats = int(settings['n_repeats'])
+    random_state = int(settings['random_state'])
+    feature_names = list(X.columns)
+
+    rows = np.arange(len(X))
+    if settings['max_rows'] and len(X) > int(settings['max_rows']):
+        rows = np.sort(np.random.default_rng(random_state).choice(
+            len(X), size=int(settings['max_rows']), replace=False
+        ))
+    arrays = {
+        'X': X.iloc[rows].to_numpy(dtype=np.float32),
+        'y': np.asarray(y, dtype=np.float64)[rows]
+    }
+
+    tasks = plan_tasks(len(feature_names), n_repeats, random_state)
+    n_workers = int(settings['n_workers'] or (os.cpu_count() or 1))
+    n_workers = max(1, min(n_workers, len(tasks)))
+    print(f"Перестановочная важность: {len(feature_names)} признаков x {n_repeats} повторов, "
+          f"{len(rows)} строк, {n_workers} процессов")
+
+    baseline_permuter = Permuter(predictor, arrays['X'], arrays['y'], feature_names,
+                                 settings['batch_rows'])
+    baseline = baseline_permuter.baseline()
+    if n_workers == 1:
+        results = baseline_permuter.run(tasks)
+    else:
+        # Задачи делятся на равные части по числу процессов
+        parts = [tasks[i::n_workers] for i in range(n_workers)]
+        with SharedArrays(arrays) as shared, ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(shared.spec, predictor, feature_names, settings['batch_rows'])
+        ) as pool:
+            results = [result for part in pool.map(_run_tasks, parts) for result in part]
+
+    scores = np.empty((len(feature_names), n_repeats))
+    for feature, repeat, score in results:
+        scores[feature, repeat] = score
+
+    return {
+        'metric': 'rmse',
+        'baseline': baseline,
+        'n_repeats': n_repeats,
+        'n_rows': int(len(rows)),
+        'confidence': float(settings['confidence']),
+        'features': summarize(feature_names, baseline, scores, float(settings['confidence']))
+    }
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Предсказания обученной модели для файла без целевой переменной.
+
+Входной файл — текст в формате data/housing.csv без заголовка: строки
+только с признаками или полные строки (тогда последняя колонка, целевая
+переменная, отбрасывается). Файл читается блоками по `inference.chunksize`
+строк, предсказания пишутся по одному в строке в файл или stdout.
+Движок предсказаний выбирается секцией `inference`, как в evaluate_model.
+"""
+
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.dataset import Schema
+from scripts.packed_forest import open_predictor
+
+# Строк в блоке, если inference.chunksize не задан
+PREDICT_CHUNK_ROWS = 65536
+
+
+def iter_feature_chunks(source, schema: Schema, chunksize: int = PREDICT_CHUNK_ROWS):
+    """Блоки признаков входного файла (путь или открытый файл)."""
+    reader = pd.read_csv(source, sep=r'\s+', header=None, chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            if chunk.shape[1] == len(schema.columns):
+                chunk = chunk.iloc[:, :len(schema.features)]
+            yield schema.apply(chunk, features_only=True)
+
+
+def predict_file(predictor, source, output, schema: Schema, chunksize: int = PREDICT_CHUNK_ROWS) -> int:
+    """
+    Предсказания по блокам входного файла.
+
+    Args:
+        predictor: Объект с методом predict
+        source: Путь к входному файлу или открытый файл
+        output: Открытый текстовый файл для предсказаний
+        schema: Схема данных
+
+    Returns:
+        Число предсказанных строк
+    """
+    n_rows = 0
+    for X in iter_feature_chunks(source, schema, chunksize):
+        np.savetxt(output, predictor.predict(X), fmt='%.10g')
+        n_rows += len(X)
+    return n_rows
+
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Предсказания модели Boston Housing")
+    parser.add_argument("input", help="Входной файл без заголовка ('-' — stdin)")
+    parser.add_argument("--output", "-o", default=None, help="Файл предсказаний (по умолчанию stdout)")
+    parser.add_argument("--model", default="models/model", help="Путь к модели")
+    parser.add_argument("--config", default="config/model_config.yaml", help="Путь к конфигурации")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    inference_config = config.get('inference') or {}
+    chunksize = int(inference_config.get('chunksize') or PREDICT_CHUNK_ROWS)
+
+    # Служебные сообщения идут в stderr, чтобы не смешиваться с предсказаниями
+    with redirect_stdout(sys.stderr):
+        predictor = open_predictor(args.model, inference_config)
+
+    source = sys.stdin if args.input == '-' else args.input
+    if args.output is None:
+        n_rows = predict_file(predictor, source, sys.stdout, Schema.from_config(config), chunksize)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            n_rows = predict_file(predictor, source, output, Schema.from_config(config), chunksize)
+    print(f"Предсказано строк: {n_rows}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
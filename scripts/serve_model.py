@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Локальный HTTP-сервер пакетного инференса обученной модели.
+
+Модель загружается один раз из `models/model/`. Строки принимаются в
+JSON или CSV и проверяются по секции `schema` конфигурации так же, как
+при обучении и в predict (`Schema.apply`: число колонок и приведение к
+типам), а также по объявленным диапазонам признаков. Одновременные
+запросы объединяются в микропакеты: пакет отправляется в predict, когда
+набрано `max_batch_size` строк или истекло `max_wait_ms` с момента
+первого запроса в пакете. Сервер перезагружает модель, когда меняется
+md5 артефакта.
+
+Эндпоинты:
+    POST /predict  - предсказания (application/json или text/csv)
+    GET  /stats    - перцентили задержки, гистограмма размеров пакетов
+    GET  /health   - состояние и md5 загруженной модели
+"""
+
+import argparse
+import bisect
+import csv
+import io
+import json
+import math
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.dataset import Schema, SchemaError, default_schema
+from scripts.model_artifact import artifact_md5
+from scripts.packed_forest import open_predictor
+
+DEFAULT_SERVING = {
+    'host': '127.0.0.1',
+    'port': 8000,
+    'max_batch_size': 64,
+    'max_wait_ms': 5,
+    'reload_check_seconds': 2.0,
+    'latency_window': 10000
+}
+
+
+def _rows_from_records(records: list, features: list) -> np.ndarray:
+    expected = set(features)
+    matrix = np.empty((len(records), len(features)), dtype=np.float64)
+    for i, record in enumerate(records):
+        if isinstance(record, dict):
+            keys = set(record)
+            if keys != expected:
+                missing = sorted(expected - keys)
+                extra = sorted(keys - expected)
+                raise SchemaError(f"строка {i}: отсутствуют {missing}, лишние {extra}")
+            values = [record[name] for name in features]
+        elif isinstance(record, (list, tuple)):
+            if len(record) != len(features):
+                raise SchemaError(
+                    f"строка {i}: ожидается {len(features)} значений, получено {len(record)}"
+                )
+            values = record
+        else:
+            raise SchemaError(f"строка {i}: ожидается объект или список значений")
+        try:
+            matrix[i] = [float(value) for value in values]
+        except (TypeError, ValueError):
+            raise SchemaError(f"строка {i}: значения признаков должны быть числами") from None
+    return matrix
+
+
+def parse_json_rows(body: bytes, schema: Schema = None) -> np.ndarray:
+    """
+    Строки из JSON: один объект, список объектов/списков
+    или `{"rows": [...]}`.
+    """
+    schema = schema or default_schema()
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise SchemaError(f"некорректный JSON: {e}") from None
+    if isinstance(payload, dict) and 'rows' in payload:
+        payload = payload['rows']
+    if isinstance(payload, dict):
+        payload = [payload]
+    if not isinstance(payload, list):
+        raise SchemaError("ожидается объект, список строк или {\"rows\": [...]}")
+    return _rows_from_records(payload, schema.features)
+
+
+def parse_csv_rows(body: bytes, schema: Schema = None) -> np.ndarray:
+    """
+    Строки из CSV: с заголовком из имен признаков (в любом порядке)
+    или без заголовка — значения в порядке признаков схемы.
+    """
+    schema = schema or default_schema()
+    lines = [row for row in csv.reader(io.StringIO(body.decode('utf-8'))) if row]
+    if not lines:
+        raise SchemaError("пустой CSV")
+    header = [cell.strip() for cell in lines[0]]
+    if set(header) & set(schema.features):
+        return _rows_from_records([dict(zip(header, row)) for row in lines[1:]], schema.features)
+    return _rows_from_records(lines, schema.features)
+
+
+def validate_rows(matrix: np.ndarray, schema: Schema = None) -> pd.DataFrame:
+    """
+    Признаки в типах схемы: значения конечны, представимы в типе колонки
+    (`Schema.apply`, как при обучении и в predict) и лежат в объявленных
+    диапазонах.
+    """
+    schema = schema or default_schema()
+    if len(matrix) == 0:
+        raise SchemaError("нет строк для предсказания")
+    bad = ~np.isfinite(matrix)
+    if bad.any():
+        row, col = np.argwhere(bad)[0]
+        raise SchemaError(f"строка {row}: {schema.features[col]} не является конечным числом")
+    X = schema.apply(pd.DataFrame(matrix), features_only=True)
+    for name, (lower, upper) in schema.ranges().items():
+        if name not in X:
+            continue
+        values = X[name].to_numpy()
+        outside = np.zeros(len(values), dtype=bool)
+        if lower is not None:
+            outside |= values < lower
+        if upper is not None:
+            outside |= values > upper
+        if outside.any():
+            row = int(np.argmax(outside))
+            raise SchemaError(
+                f"строка {row}: {name}={values[row]} вне диапазона [{lower}, {upper}]"
+            )
+    return X
+
+
+class ServingStats:
+    """Счетчики сервера, задержки запросов и гистограмма размеров пакетов."""
+
+    def __init__(self, max_batch_size: int, latency_window: int):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        # Корзины размеров пакета: 1, 2, 3-4, 5-8, ... до max_batch_size и
+        # отдельная корзина для пакетов больше него (один запрос, в котором
+        # строк больше max_batch_size, не делится и уходит целиком)
+        self.max_batch_size = max(max_batch_size, 1)
+        self._edges = [2 ** k for k in range(int(math.ceil(math.log2(self.max_batch_size))))]
+        self._edges.append(self.max_batch_size)
+        self._batch_counts = [0] * (len(self._edges) + 1)
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.reloads = 0
+
+    def record_batch(self, size: int):
+        with self._lock:
+            self.batches += 1
+            self._batch_counts[bisect.bisect_left(self._edges, size)] += 1
+
+    def record_request(self, n_rows: int, latency_seconds: float):
+        with self._lock:
+            self.requests += 1
+            self.rows += n_rows
+            self._latencies.append(latency_seconds * 1000)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_reload(self):
+        with self._lock:
+            self.reloads += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.asarray(self._latencies)
+            histogram = {}
+            lower = 1
+            for edge, count in zip(self._edges, self._batch_counts):
+                histogram[str(edge) if lower == edge else f"{lower}-{edge}"] = count
+                lower = edge + 1
+            histogram[f">{self.max_batch_size}"] = self._batch_counts[-1]
+            percentiles = {}
+            if len(latencies):
+                for q in (50, 90, 95, 99):
+                    percentiles[f"p{q}"] = float(np.percentile(latencies, q))
+                percentiles['max'] = float(latencies.max())
+            return {
+                'requests': self.requests,
+                'rows': self.rows,
+                'batches': self.batches,
+                'errors': self.errors,
+                'reloads': self.reloads,
+                'mean_batch_rows': self.rows / self.batches if self.batches else 0.0,
+                'latency_ms': percentiles,
+                'batch_size_histogram': histogram
+            }
+
+
+class ModelHolder:
+    """
+    Загруженная модель и движок предсказаний с перезагрузкой по md5.
+
+    Дешевая проверка размеров и mtime файлов артефакта выполняется не
+    чаще `check_seconds`; md5 пересчитывается только при их изменении.
+    """
+
+    def __init__(self, model_path: str, inference_config: dict, check_seconds: float):
+        self.model_path = Path(model_path)
+        self.inference_config = inference_config
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._signature = None
+        self._last_check = 0.0
+        self.model_md5 = None
+        self.predictor = None
+        self._load()
+
+    def _file_signature(self):
+        files = sorted(self.model_path.iterdir()) if self.model_path.is_dir() else [self.model_path]
+        return tuple((f.name, f.stat().st_size, f.stat().st_mtime_ns) for f in files if f.is_file())
+
+    def _load(self):
+        signature = self._file_signature()
+        md5 = artifact_md5(self.model_path)
+        if md5 != self.model_md5:
+            predictor = open_predictor(str(self.model_path), self.inference_config)
+            with self._lock:
+                self.predictor = predictor
+                self.model_md5 = md5
+            print(f"Модель загружена из {self.model_path} (md5 {md5})")
+        self._signature = signature
+
+    def maybe_reload(self) -> bool:
+        """Перезагрузка модели, если изменился md5 артефакта."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_seconds:
+            return False
+        self._last_check = now
+        previous = self.model_md5
+        try:
+            if self._file_signature() == self._signature:
+                return False
+            self._load()
+        except (OSError, ValueError) as e:
+            # Артефакт может быть в процессе замены: остаемся на текущей модели
+            print(f"Перезагрузка модели отложена: {e}")
+            return False
+        return self.model_md5 != previous
+
+    def predict(self, X: pd.DataFrame) -> tuple:
+        with self._lock:
+            predictor, md5 = self.predictor, self.model_md5
+        return predictor.predict(X), md5
+
+
+class MicroBatcher:
+    """
+    Объединение одновременных запросов в пакеты для одного вызова predict.
+
+    Пакет закрывается, когда набрано `max_batch_size` строк или прошло
+    `max_wait_ms` с момента поступления первого запроса пакета. Запрос,
+    с которым пакет превысил бы `max_batch_size`, открывает следующий
+    пакет; больше `max_batch_size` строк бывает только в пакете из одного
+    запроса.
+    """
+
+    def __init__(self, holder: ModelHolder, stats: ServingStats,
+                 max_batch_size: int, max_wait_ms: float):
+        self.holder = holder
+        self.stats = stats
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._pending = None
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, X: pd.DataFrame) -> Future:
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first) -> list:
+        batch = [first]
+        n_rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while n_rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            if n_rows + len(item[0]) > self.max_batch_size:
+                self._pending = item
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            first, self._pending = self._pending or self._queue.get(), None
+            if first is None:
+                return
+            batch = self._collect(first)
+            if self.holder.maybe_reload():
+                self.stats.record_reload()
+            sizes = [len(X) for X, _ in batch]
+            try:
+                predictions, md5 = self.holder.predict(pd.concat([X for X, _ in batch], ignore_index=True))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.stats.record_batch(sum(sizes))
+            start = 0
+            for (_, future), size in zip(batch, sizes):
+                future.set_result((predictions[start:start + size], md5))
+                start += size
+
+
+class InferenceHTTPServer(ThreadingHTTPServer):
+    """HTTP-сервер с потоком на соединение и длинной очередью подключений."""
+
+    daemon_threads = True
+    # Очередь listen() по умолчанию (5) сбрасывает соединения при всплесках
+    request_queue_size = 128
+
+
+def make_handler(batcher: MicroBatcher, stats: ServingStats, holder: ModelHolder, schema: Schema):
+    """Класс обработчика HTTP-запросов, связанный с батчером и статистикой."""
+
+    class PredictionHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._send_json(200, dict(stats.snapshot(), model_md5=holder.model_md5))
+            elif self.path == '/health':
+                self._send_json(200, {'status': 'ok', 'model_md5': holder.model_md5})
+            else:
+                self._send_json(404, {'error': f"неизвестный путь {self.path}"})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send_json(404, {'error': f"неизвестный путь {self.path}"})
+                return
+            start = time.perf_counter()
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            content_type = self.headers.get('Content-Type', 'application/json')
+            try:
+                if 'csv' in content_type:
+                    X = validate_rows(parse_csv_rows(body, schema), schema)
+                else:
+                    X = validate_rows(parse_json_rows(body, schema), schema)
+            except (SchemaError, UnicodeDecodeError) as e:
+                stats.record_error()
+                self._send_json(400, {'error': str(e)})
+                return
+            try:
+                predictions, md5 = batcher.submit(X).result()
+            except Exception as e:
+                stats.record_error()
+                self._send_json(500, {'error': str(e)})
+                return
+            stats.record_request(len(X), time.perf_counter() - start)
+            self._send_json(200, {'predictions': predictions.tolist(), 'model_md5': md5})
+
+    return PredictionHandler
+
+
+def create_server(model_path: str, config: dict, host=None, port=None) -> tuple:
+    """
+    Сервер с загруженной моделью (не запущенный).
+
+    Returns:
+        (HTTP-сервер, микробатчер)
+    """
+    serving = dict(DEFAULT_SERVING, **(config.get('serving') or {}))
+    holder = ModelHolder(model_path, config.get('inference') or {},
+                         float(serving['reload_check_seconds']))
+    stats = ServingStats(int(serving['max_batch_size']), int(serving['latency_window']))
+    batcher = MicroBatcher(holder, stats, int(serving['max_batch_size']),
+                           float(serving['max_wait_ms']))
+    server = InferenceHTTPServer(
+        (host or serving['host'], int(serving['port'] if port is None else port)),
+        make_handler(batcher, stats, holder, Schema.from_config(config))
+    )
+    return server, batcher
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный сервер пакетного инференса")
+    parser.add_argument('--model', default="models/model", help="Артефакт модели")
+    parser.add_argument('--config', default="config/model_config.yaml", help="Конфигурация")
+    parser.add_argument('--host', default=None, help="Адрес (по умолчанию serving.host)")
+    parser.add_argument('--port', type=int, default=None, help="Порт (по умолчанию serving.port)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+
+    server, batcher = create_server(args.model, config, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Сервер инференса запущен на http://{host}:{port} (POST /predict, GET /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nОстановка сервера...")
+    finally:
+        server.server_close()
+        batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Передача NumPy-массивов в пул процессов через общую память.
+
+Родительский процесс один раз копирует массивы в блоки
+`multiprocessing.shared_memory`, а воркеры подключаются к ним по имени
+в инициализаторе пула, поэтому данные не сериализуются в каждую задачу.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedArrays:
+    """
+    Набор массивов в общей памяти (контекстный менеджер владельца).
+
+    Атрибут `spec` — сериализуемое описание блоков, которое передается
+    воркерам и превращается обратно в массивы функцией `attach`.
+    """
+
+    def __init__(self, arrays: dict):
+        self._blocks = []
+        self.spec = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocks.append(block)
+                view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+                view[...] = array
+                self.spec[name] = (block.name, array.shape, array.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+_ATTACHED = []
+
+
+def attach(spec: dict) -> dict:
+    """
+    Подключение к массивам по описанию `SharedArrays.spec`.
+
+    Массивы доступны только для чтения; ссылки на блоки хранятся до
+    завершения процесса.
+    """
+    arrays = {}
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _ATTACHED.append(block)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        arrays[name] = array
+    return arrays
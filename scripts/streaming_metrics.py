@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Сливаемые аккумуляторы метрик регрессии для оценки по блокам.
+
+Блок предсказаний сворачивается в суммы (SSE, SAE, сумма ошибок в
+процентах, суммы остатков и целевой переменной и их квадратов) и
+минимум/максимум остатков. Квадраты раскладываются без потерь на
+округленный квадрат и его остаток (TwoProd), а центрирование
+Σx² - (Σx)²/n вычитает (Σx)²/n тоже без потерь, поэтому знаменатель R² и
+разброс остатков не теряют точность при большом смещении значений;
+аккумуляторы блоков сливаются в любом порядке. Массив блока суммируется
+векторно в NumPy: точный остаток каждого сложения (TwoSum) копится в
+поправку, и сумма с поправкой имеют точность вдвое большую, чем у
+float64. Пары (сумма, поправка) блоков сливаются без потерь — списком
+неперекрывающихся частичных сумм (алгоритм Шевчука, как в `math.fsum`) —
+и округляются один раз при расчете метрик. Поэтому результат практически
+не зависит от размера блоков, числа потоков и порядка слияния, а память
+не растет с числом строк.
+"""
+
+import math
+
+import numpy as np
+
+# Ширина полосы в `two_sum_array`: строки полосы (64 КБ float64)
+# остаются в кеше процессора
+_SUM_BLOCK = 8192
+
+# Множитель Деккера: делит float64 на две половины по 26 бит мантиссы
+_SPLITTER = 134217729.0  # 2**27 + 1
+
+
+def _split(a):
+    scaled = _SPLITTER * a
+    high = scaled - (scaled - a)
+    return high, a - high
+
+
+def two_product(a, b) -> tuple:
+    """
+    Произведение и его точный остаток (TwoProd Деккера): a * b = p + e.
+
+    Работает и для чисел, и поэлементно для массивов NumPy.
+    """
+    product = a * b
+    a_high, a_low = _split(a)
+    b_high, b_low = _split(b)
+    error = ((a_high * b_high - product) + a_high * b_low + a_low * b_high) + a_low * b_low
+    return product, error
+
+
+def _pairwise_two_sum(level: np.ndarray) -> tuple:
+    """Попарное сложение половин массива с точным остатком на каждом уровне."""
+    error = 0.0
+    extra = []
+    while len(level) > 1:
+        half = len(level) // 2
+        if len(level) % 2:
+            extra.append(float(level[-1]))
+        a, b = level[:half], level[half:2 * half]
+        total = a + b
+        b_virtual = total - a
+        lost = total - b_virtual
+        np.subtract(a, lost, out=lost)
+        np.subtract(b, b_virtual, out=b_virtual)
+        lost += b_virtual
+        error += float(lost.sum())
+        level = total
+    return (float(level[0]) if len(level) else 0.0), error, extra
+
+
+def two_sum_array(values: np.ndarray) -> tuple:
+    """
+    Сумма массива float64 с поправкой округления, векторно в NumPy.
+
+    Массив делится на полосы по `_SUM_BLOCK` элементов, которые
+    складываются построчно; точный остаток каждого сложения (TwoSum)
+    копится в векторе поправок. Строка сумм полос и остаток массива
+    складываются попарно тем же способом. Сумма с поправкой отличается от
+    точной не больше чем примерно на n * 2**-106 от суммы модулей, как
+    при счете с двойной точностью float64. Время — несколько `np.sum`;
+    NumPy отпускает GIL, так что блоки суммируются в потоках параллельно.
+
+    Returns:
+        (сумма, поправка, непарные элементы уровней — не больше log2(n)
+        чисел, которые нужно прибавить отдельно)
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    n_rows = len(values) // _SUM_BLOCK
+    if n_rows < 2:
+        return _pairwise_two_sum(values)
+
+    rows = values[:n_rows * _SUM_BLOCK].reshape(n_rows, _SUM_BLOCK)
+    total = rows[0].copy()
+    compensation = np.zeros(_SUM_BLOCK)
+    new_total = np.empty(_SUM_BLOCK)
+    b_virtual = np.empty(_SUM_BLOCK)
+    lost = np.empty(_SUM_BLOCK)
+    for row in rows[1:]:
+        np.add(total, row, out=new_total)
+        np.subtract(new_total, total, out=b_virtual)
+        np.subtract(new_total, b_virtual, out=lost)
+        np.subtract(total, lost, out=lost)
+        np.subtract(row, b_virtual, out=b_virtual)
+        lost += b_virtual
+        compensation += lost
+        total, new_total = new_total, total
+
+    row_total, row_error, extra = _pairwise_two_sum(total)
+    tail_total, tail_error, tail_extra = _pairwise_two_sum(values[n_rows * _SUM_BLOCK:])
+    error = row_error + float(compensation.sum()) + tail_error
+    return row_total, error, extra + [tail_total] + tail_extra
+
+
+class ExactSum:
+    """
+    Точная сумма чисел float64 в виде частичных сумм.
+
+    Бесконечности и NaN в частичные суммы не попадают: они складываются
+    отдельно в `nonfinite`, и сумма равна ему, как у `np.sum` (inf, -inf
+    или nan, если встретились inf разных знаков или nan).
+    """
+
+    __slots__ = ('partials', 'nonfinite')
+
+    def __init__(self):
+        self.partials = []
+        self.nonfinite = 0.0
+
+    def add(self, x: float):
+        if not math.isfinite(x):
+            self.nonfinite += x
+            return
+        partials = []
+        for y in self.partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            high = x + y
+            low = y - (high - x)
+            if low:
+                partials.append(low)
+            x = high
+        partials.append(x)
+        self.partials = partials
+
+    def add_array(self, values: np.ndarray):
+        """
+        Добавление суммы массива.
+
+        Сумма и поправка считаются векторно (`two_sum_array`); в частичные
+        суммы без потерь добавляются только они и несколько непарных
+        элементов, а не каждый элемент массива.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        with np.errstate(invalid='ignore'):
+            total, error, extra = two_sum_array(values)
+        if not (math.isfinite(total) and math.isfinite(error)):
+            # Редкий случай: inf или nan в массиве (например, ошибка в
+            # процентах при нулевой цели) складываются отдельно, а каскад
+            # TwoSum пересчитывается по конечным значениям
+            finite = np.isfinite(values)
+            self.nonfinite += float(np.sum(values[~finite]))
+            total, error, extra = two_sum_array(values[finite])
+        self.add(total)
+        self.add(error)
+        for value in extra:
+            self.add(value)
+
+    def add_squares(self, values: np.ndarray):
+        """Добавление точной суммы квадратов массива."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        squares, errors = two_product(values, values)
+        finite = np.isfinite(squares)
+        if not finite.all():
+            self.nonfinite += float(np.sum(squares[~finite]))
+            squares, errors = squares[finite], errors[finite]
+        self.add_array(squares)
+        self.add_array(errors)
+
+    def add_quotient(self, x: float, divisor: float):
+        """Добавление x / divisor с остатком деления (точность ~2**-106)."""
+        quotient = x / divisor
+        product, error = two_product(quotient, divisor)
+        self.add(quotient)
+        self.add(((x - product) - error) / divisor)
+
+    def split(self) -> tuple:
+        """Сумма как пара (округленное значение, остаток)."""
+        high = self.value
+        if not math.isfinite(high):
+            return high, 0.0
+        return high, math.fsum(self.partials + [-high])
+
+    def merge(self, other: "ExactSum"):
+        for value in other.partials:
+            self.add(value)
+        self.nonfinite += other.nonfinite
+
+    @property
+    def value(self) -> float:
+        if self.nonfinite != 0.0 or math.isnan(self.nonfinite):
+            return self.nonfinite
+        return math.fsum(self.partials)
+
+
+class RegressionAccumulator:
+    """Метрики регрессии по блокам (y_true, y_pred)."""
+
+    _SUMS = ('squared_error', 'absolute_error', 'percentage_error',
+             'residual', 'target', 'target_squared')
+
+    def __init__(self):
+        self.count = 0
+        self.sums = {name: ExactSum() for name in self._SUMS}
+        self.residual_min = math.inf
+        self.residual_max = -math.inf
+
+    def update(self, y_true, y_pred):
+        y_true = np.asarray(y_true, dtype=np.float64)
+        if len(y_true) == 0:
+            return
+        residuals = y_true - np.asarray(y_pred, dtype=np.float64)
+        self.count += len(y_true)
+        self.sums['squared_error'].add_squares(residuals)
+        self.sums['absolute_error'].add_array(np.abs(residuals))
+        self.sums['percentage_error'].add_array(np.abs(residuals / y_true))
+        self.sums['residual'].add_array(residuals)
+        self.sums['target'].add_array(y_true)
+        self.sums['target_squared'].add_squares(y_true)
+        self.residual_min = min(self.residual_min, float(residuals.min()))
+        self.residual_max = max(self.residual_max, float(residuals.max()))
+
+    def merge(self, other: "RegressionAccumulator"):
+        self.count += other.count
+        for name in self._SUMS:
+            self.sums[name].merge(other.sums[name])
+        self.residual_min = min(self.residual_min, other.residual_min)
+        self.residual_max = max(self.residual_max, other.residual_max)
+
+    def _centered(self, total: str, squares: str) -> float:
+        """
+        Сумма квадратов отклонений от среднего: Σx² - (Σx)²/n.
+
+        Σx берется парой (значение, остаток), квадрат раскладывается
+        TwoProd, и каждое слагаемое делится на n с остатком, поэтому
+        вычитание близких больших чисел не теряет значащих разрядов.
+        """
+        centered = ExactSum()
+        centered.merge(self.sums[squares])
+        high, low = self.sums[total].split()
+        n = float(self.count)
+        for term in (*two_product(high, high), *two_product(2.0 * high, low), low * low):
+            centered.add_quotient(-term, n)
+        return max(centered.value, 0.0)
+
+    def metrics(self) -> dict:
+        """RMSE, MAE и R² (формат `train_model.evaluate_model`)."""
+        if self.count == 0:
+            raise ValueError("Нет строк для оценки")
+        sse = self.sums['squared_error'].value
+        sst = self._centered('target', 'target_squared')
+        return {
+            'rmse': math.sqrt(sse / self.count),
+            'mae': self.sums['absolute_error'].value / self.count,
+            'r2': 1 - sse / sst if sst > 0 else 0.0
+        }
+
+    def evaluation_metrics(self) -> dict:
+        """Метрики отчета об оценке: базовые, MAPE и статистика остатков."""
+        metrics = self.metrics()
+        metrics['mean_absolute_percentage_error'] = \
+            self.sums['percentage_error'].value / self.count * 100
+        metrics['residuals'] = {
+            'mean': self.sums['residual'].value / self.count,
+            'std': math.sqrt(self._centered('residual', 'squared_error') / self.count),
+            'min': self.residual_min,
+            'max': self.residual_max
+        }
+        return metrics
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Параллельный перебор гиперпараметров (sweep) для train_model.
+
+Кандидаты строятся из секции `sweep.grid` в `config/model_config.yaml`
+и обучаются в пуле процессов. Обучающая и тестовая выборки один раз
+копируются в общую память, воркеры читают их без сериализации. Победитель
+выбирается по порогам `thresholds` и основной метрике `metrics.primary`.
+"""
+
+import itertools
+import json
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from scripts.shared_arrays import SharedArrays, attach
+
+# Метрики, для которых большее значение лучше
+_MAXIMIZE = {'r2'}
+
+_WORKER = {}
+
+
+def expand_values(values) -> list:
+    """
+    Значения одного параметра сетки.
+
+    Поддерживаются список значений, диапазон `{min, max, step}`
+    (включительно) и одиночное значение.
+    """
+    if isinstance(values, dict):
+        start, stop, step = values['min'], values['max'], values.get('step', 1)
+        points = np.arange(start, stop + step / 2, step)
+        if all(isinstance(v, int) for v in (start, stop, step)):
+            return [int(v) for v in points]
+        return [round(float(v), 10) for v in points]
+    if isinstance(values, (list, tuple)):
+        return list(values)
+    return [values]
+
+
+def expand_grid(base_params: dict, grid: dict) -> list:
+    """Все комбинации параметров сетки поверх базовых параметров модели."""
+    names = list(grid)
+    candidates = []
+    for combo in itertools.product(*(expand_values(grid[name]) for name in names)):
+        params = dict(base_params)
+        params.update(zip(names, combo))
+        candidates.append(params)
+    return candidates
+
+
+def plan_workers(n_candidates: int, n_jobs_per_model: int, n_workers=None) -> int:
+    """
+    Размер пула процессов без переподписки ядер.
+
+    Произведение числа воркеров и `n_jobs` каждого леса не превышает
+    числа доступных ядер.
+    """
+    cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') \
+        else (os.cpu_count() or 1)
+    limit = max(1, cpu_count // max(1, n_jobs_per_model))
+    if n_workers:
+        limit = min(limit, int(n_workers))
+    return max(1, min(limit, n_candidates))
+
+
+def _init_worker(spec: dict, feature_names: list):
+    import pandas as pd
+
+    arrays = attach(spec)
+    _WORKER['X_train'] = pd.DataFrame(arrays['X_train'], columns=feature_names, copy=False)
+    _WORKER['X_test'] = pd.DataFrame(arrays['X_test'], columns=feature_names, copy=False)
+    _WORKER['y_train'] = arrays['y_train']
+    _WORKER['y_test'] = arrays['y_test']
+
+
+def _fit_candidate(task: tuple) -> dict:
+    from scripts.estimators import thread_budget
+    from scripts.train_model import build_model, check_quality, evaluate_model
+
+    index, params, config, output_dir = task
+    start = time.perf_counter()
+    model = build_model(config, params)
+    with thread_budget(model, params.get('n_jobs')):
+        model.fit(_WORKER['X_train'], _WORKER['y_train'])
+    fit_time = time.perf_counter() - start
+
+    metrics = evaluate_model(model, _WORKER['X_test'], _WORKER['y_test'])
+    model_path = Path(output_dir) / f"candidate_{index}.pkl"
+    with open(model_path, 'wb') as f:
+        pickle.dump(model, f)
+
+    return {
+        'candidate': index,
+        'params': params,
+        'metrics': metrics,
+        'quality_check_passed': check_quality(metrics, config.get('thresholds', {}))['passed'],
+        'fit_time_seconds': round(fit_time, 4),
+        'model_path': str(model_path)
+    }
+
+
+def rank_key(entry: dict, primary: str):
+    """Сортировка: сначала прошедшие пороги, затем по основной метрике."""
+    value = entry['metrics'][primary]
+    return (not entry['quality_check_passed'], -value if primary in _MAXIMIZE else value)
+
+
+def run_sweep(X_train, X_test, y_train, y_test, config: dict, leaderboard_path: str) -> tuple:
+    """
+    Перебор кандидатов и выбор победителя.
+
+    Returns:
+        (модель-победитель, ее параметры, таблица лидеров)
+    """
+    sweep_config = config.get('sweep', {})
+    candidates = expand_grid(config['model']['params'], sweep_config.get('grid', {}))
+    n_jobs_per_model = int(sweep_config.get('n_jobs_per_model', 1))
+    for params in candidates:
+        params['n_jobs'] = n_jobs_per_model
+    n_workers = plan_workers(len(candidates), n_jobs_per_model, sweep_config.get('n_workers'))
+    primary = config.get('metrics', {}).get('primary', 'rmse')
+
+    print(f"Перебор гиперпараметров: {len(candidates)} кандидатов, "
+          f"{n_workers} процессов x n_jobs={n_jobs_per_model}")
+
+    arrays = {
+        'X_train': X_train.to_numpy(dtype=np.float32),
+        'X_test': X_test.to_numpy(dtype=np.float32),
+        'y_train': np.asarray(y_train, dtype=np.float64),
+        'y_test': np.asarray(y_test, dtype=np.float64)
+    }
+
+    with SharedArrays(arrays) as shared, tempfile.TemporaryDirectory() as tmpdir:
+        del arrays
+        tasks = [(i, params, config, tmpdir) for i, params in enumerate(candidates)]
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(shared.spec, list(X_train.columns))
+        ) as pool:
+            leaderboard = list(pool.map(_fit_candidate, tasks))
+
+        leaderboard.sort(key=lambda entry: rank_key(entry, primary))
+        with open(leaderboard[0]['model_path'], 'rb') as f:
+            model = pickle.load(f)
+
+    for rank, entry in enumerate(leaderboard, start=1):
+        entry['rank'] = rank
+        del entry['model_path']
+
+    Path(leaderboard_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(leaderboard_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'primary_metric': primary,
+            'n_workers': n_workers,
+            'n_jobs_per_model': n_jobs_per_model,
+            'leaderboard': leaderboard
+        }, f, indent=2, ensure_ascii=False)
+    print(f"Таблица лидеров сохранена в {leaderboard_path}")
+
+    winner = leaderboard[0]
+    print(f"Лучший кандидат #{winner['candidate']}: "
+          f"{primary.upper()} = {winner['metrics'][primary]:.4f}")
+    return model, winner['params'], leaderboard
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Детерминированный генератор синтетических данных Boston Housing.
+
+Генератор строится по реальному `data/housing.csv` как гауссова копула:
+маргинальные распределения колонок — эмпирические квантили реальных
+данных в границах min/max из отчета `validate_data`, зависимости —
+корреляционная матрица нормальных меток рангов. Колонки, принимающие в
+реальных данных только целые значения (например, CHAS и RAD), округляются.
+Файл пишется в формате исходного датасета (разделитель — пробелы, то
+же число знаков после запятой), поэтому читается `load_data`.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+from scipy.special import ndtr, ndtri
+from scipy.stats import rankdata
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.dataset import COLUMN_NAMES, file_md5, load_dataframe
+
+# Строк в одном блоке генерации и записи
+GENERATE_CHUNK_ROWS = 1_000_000
+
+
+def _column_decimals(data_path: str) -> list:
+    """Наибольшее число знаков после запятой в каждой колонке исходного файла."""
+    decimals = [0] * len(COLUMN_NAMES)
+    with open(data_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            for i, token in enumerate(line.split()[:len(COLUMN_NAMES)]):
+                if '.' in token:
+                    decimals[i] = max(decimals[i], len(token) - token.index('.') - 1)
+    return decimals
+
+
+def fit_generator(data_path: str) -> dict:
+    """
+    Параметры генератора по реальным данным.
+
+    Returns:
+        Словарь, сериализуемый в JSON: квантили колонок, границы из
+        отчета валидации, матрица корреляций копулы и формат колонок
+    """
+    from scripts.validate_data import validate_dataframe
+
+    df = load_dataframe(data_path, use_cache=False)
+    statistics = validate_dataframe(df, checks=['statistics'])['summary']['statistics']
+    values = df[COLUMN_NAMES].to_numpy(dtype=np.float64)
+    n_rows = len(values)
+
+    # Нормальные метки рангов (van der Waerden) для корреляции копулы
+    # (одинаковые значения получают средний ранг)
+    ranks = rankdata(values, axis=0)
+    scores = ndtri(ranks / (n_rows + 1))
+    correlation = np.corrcoef(scores, rowvar=False)
+
+    return {
+        'columns': COLUMN_NAMES,
+        'quantiles': np.sort(values, axis=0).T.tolist(),
+        'min': [statistics['min'][name] for name in COLUMN_NAMES],
+        'max': [statistics['max'][name] for name in COLUMN_NAMES],
+        'integer': [bool(np.all(values[:, i] == np.round(values[:, i]))) for i in range(len(COLUMN_NAMES))],
+        'decimals': _column_decimals(data_path),
+        'correlation': correlation.tolist()
+    }
+
+
+def generate_rows(generator: dict, n_rows: int, seed: int = 0, chunk_rows: int = None):
+    """
+    Генерация синтетических строк блоками.
+
+    Каждый блок получает свой поток случайных чисел из `SeedSequence(seed)`,
+    поэтому результат зависит только от `seed` и размера блока.
+
+    Yields:
+        Массивы формы (строк в блоке, 14)
+    """
+    chunk_rows = chunk_rows or GENERATE_CHUNK_ROWS
+    quantiles = [np.asarray(q) for q in generator['quantiles']]
+    n_real = len(quantiles[0])
+    probabilities = (np.arange(n_real) + 0.5) / n_real
+    lower, upper = np.asarray(generator['min']), np.asarray(generator['max'])
+    integer = np.asarray(generator['integer'])
+    # Небольшая регуляризация, чтобы разложение Холецкого было устойчивым
+    correlation = np.asarray(generator['correlation']) + 1e-9 * np.eye(len(quantiles))
+    cholesky = np.linalg.cholesky(correlation)
+
+    n_chunks = max(1, -(-n_rows // chunk_rows))
+    for index, child in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+        size = min(chunk_rows, n_rows - index * chunk_rows)
+        rng = np.random.default_rng(child)
+        uniform = ndtr(rng.standard_normal((size, len(quantiles))) @ cholesky.T)
+        chunk = np.empty_like(uniform)
+        for i, column_quantiles in enumerate(quantiles):
+            chunk[:, i] = np.interp(uniform[:, i], probabilities, column_quantiles)
+        chunk[:, integer] = np.round(chunk[:, integer])
+        yield np.clip(chunk, lower, upper)
+
+
+def write_dataset(generator: dict, output_path: str, n_rows: int, seed: int = 0) -> Path:
+    """Запись синтетического датасета в формате `data/housing.csv`."""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    formats = [f"%.{decimals}f" for decimals in generator['decimals']]
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for chunk in generate_rows(generator, n_rows, seed):
+            np.savetxt(f, chunk, fmt=formats, delimiter=' ')
+    tmp_path.replace(output_path)
+    return output_path
+
+
+def ensure_dataset(data_path: str, output_dir: str, n_rows: int, seed: int = 0) -> Path:
+    """
+    Путь к синтетическому датасету, сгенерированному при необходимости.
+
+    Файл переиспользуется, если он сгенерирован с тем же `seed` по тем же
+    исходным данным (сверяется по сопроводительному `.json`).
+    """
+    output_path = Path(output_dir) / f"housing_{n_rows}.csv"
+    meta_path = output_path.with_suffix('.json')
+    meta = {'rows': n_rows, 'seed': seed, 'source_md5': file_md5(data_path)}
+    if output_path.exists() and meta_path.exists():
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == meta:
+                return output_path
+
+    print(f"Генерация синтетического датасета: {n_rows} строк -> {output_path}")
+    write_dataset(fit_generator(data_path), output_path, n_rows, seed)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    return output_path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных Boston Housing")
+    parser.add_argument('--rows', type=int, required=True, help="Число строк")
+    parser.add_argument('--output', required=True, help="Путь к выходному файлу")
+    parser.add_argument('--seed', type=int, default=0, help="Зерно генератора")
+    parser.add_argument('--data', default="data/housing.csv", help="Реальные данные")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    write_dataset(fit_generator(args.data), args.output, args.rows, args.seed)
+    print(f"Синтетический датасет сохранен в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,55 +3,90 @@
 Скрипт для обучения модели на данных Boston Housing.
 """
 
-import pandas as pd
 import numpy as np
 import json
-import pickle
 import sys
 from pathlib import Path
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import yaml
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts import perf
+from scripts.cross_validation import cross_validate
+from scripts.dataset import Schema, dataset_md5, load_data
+from scripts.early_stopping import train_early_stopping
+from scripts.estimators import build_estimator, thread_budget
+from scripts.fingerprint import forest_fingerprint
+from scripts.model_artifact import artifact_md5, is_tree_forest, load_model, save_model
+from scripts.model_cache import ModelCache, cache_key
+from scripts.model_registry import record_training
+from scripts.out_of_core import holdout_mask, rows_md5, train_out_of_core
+from scripts.sweep import run_sweep
+from scripts.warm_start import parent_split, train_warm_start
+
 def load_config(config_path: str) -> dict:
     """Загрузка конфигурации модели."""
     with open(config_path, 'r', encoding='utf-8') as f:
         return yaml.safe_load(f)
 
-def load_data(data_path: str) -> tuple:
-    """Загрузка и подготовка данных."""
-    print(f"Загрузка данных из {data_path}...")
+def build_model(config: dict, params: dict = None):
+    """Создание необученной модели `model.name` из реестра `scripts.estimators`."""
+    model_params = config['model']['params'] if params is None else params
+    return build_estimator(config['model']['name'], model_params)
+
+def train_model(X_train, y_train, config: dict):
+    """Обучение модели в пределах бюджета потоков `model.n_jobs`."""
+    model = build_model(config)
     
-    # Загрузка данных
-    df = pd.read_csv(data_path, sep=r'\s+', header=None)
+    with thread_budget(model, config['model'].get('n_jobs')) as n_threads:
+        print(f"Обучение модели {config['model']['name']} (потоков: {n_threads})...")
+        model.fit(X_train, y_train)
     
-    # Названия колонок
-    column_names = [
-        'CRIM', 'ZN', 'INDUS', 'CHAS', 'NOX', 'RM', 'AGE', 
-        'DIS', 'RAD', 'TAX', 'PTRATIO', 'B', 'LSTAT', 'MEDV'
-    ]
-    df.columns = column_names
+    print("Модель обучена успешно!")
+    return model
+
+def split_data(X, y, test_size: float, random_state: int, random_rows: int = None) -> tuple:
+    """
+    Разбиение на обучающую и тестовую выборки.
     
-    # Разделение на признаки и целевую переменную
-    X = df.drop('MEDV', axis=1)
-    y = df['MEDV']
+    Первые `random_rows` строк (по умолчанию все) делятся `train_test_split`,
+    остальные — хешем значений строки (`out_of_core.holdout_mask`). Так
+    строки, дописанные после обучения родительской модели, не меняют
+    отложенную выборку ее строк.
     
-    return X, y
-
-def train_model(X_train, y_train, config: dict) -> RandomForestRegressor:
-    """Обучение модели."""
-    print("Обучение модели...")
+    Returns:
+        (X_train, X_test, y_train, y_test)
+    """
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
     
-    model_params = config['model']['params']
-    model = RandomForestRegressor(**model_params)
-    model.fit(X_train, y_train)
+    if random_rows is None or random_rows >= len(X):
+        return train_test_split(X, y, test_size=test_size, random_state=random_state)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X.iloc[:random_rows], y.iloc[:random_rows], test_size=test_size, random_state=random_state
+    )
+    X_new, y_new = X.iloc[random_rows:], y.iloc[random_rows:]
+    in_test = holdout_mask(pd.concat([X_new, y_new], axis=1), test_size, random_state)
+    return (
+        pd.concat([X_train, X_new[~in_test]]), pd.concat([X_test, X_new[in_test]]),
+        pd.concat([y_train, y_new[~in_test]]), pd.concat([y_test, y_new[in_test]])
+    )
+
+def split_info(X, y, config: dict, random_rows: int = None) -> dict:
+    """Описание разбиения для отчета (по нему дообучение восстанавливает отложенную выборку)."""
+    import pandas as pd
     
-    print("Модель обучена успешно!")
-    return model
+    return {
+        'test_size': config['data']['test_size'],
+        'random_state': config['data']['random_state'],
+        'random_rows': len(X) if random_rows is None else min(int(random_rows), len(X)),
+        'rows_md5': rows_md5(pd.concat([X, y], axis=1))
+    }
 
 def evaluate_model(model, X_test, y_test) -> dict:
     """Оценка модели."""
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+    
     y_pred = model.predict(X_test)
     
     metrics = {
@@ -62,110 +97,340 @@ def evaluate_model(model, X_test, y_test) -> dict:
     
     return metrics
 
-def main():
+def check_quality(metrics: dict, thresholds: dict) -> dict:
+    """Проверка метрик на соответствие порогам качества."""
+    min_r2 = thresholds.get('min_r2', 0.0)
+    max_rmse = thresholds.get('max_rmse', float('inf'))
+    
+    return {
+        'passed': metrics['r2'] >= min_r2 and metrics['rmse'] <= max_rmse,
+        'r2_check': {
+            'passed': metrics['r2'] >= min_r2,
+            'value': metrics['r2'],
+            'threshold': min_r2
+        },
+        'rmse_check': {
+            'passed': metrics['rmse'] <= max_rmse,
+            'value': metrics['rmse'],
+            'threshold': max_rmse
+        }
+    }
+
+def parse_args(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Обучение модели Boston Housing")
+    parser.add_argument(
+        "--sweep", action="store_true",
+        help="Перебор гиперпараметров из секции sweep конфигурации"
+    )
+    parser.add_argument(
+        "--warm-start", action="store_true",
+        help="Дообучить существующую модель вместо обучения с нуля"
+    )
+    parser.add_argument(
+        "--early-stopping", action="store_true",
+        help="Добавлять деревья пачками до стабилизации OOB-ошибки"
+    )
+    parser.add_argument(
+        "--out-of-core", action="store_true",
+        help="Обучать по блокам файла, не загружая данные в память целиком"
+    )
+    parser.add_argument(
+        "--cross-validation", action="store_true",
+        help="Повторная k-блочная кросс-валидация и проверка порогов по ней"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Обучить модель, не используя кеш результатов обучения"
+    )
+    return parser.parse_args(argv)
+
+def training_mode(args, config: dict) -> str:
+    """
+    Режим обучения: 'out_of_core', 'sweep', 'warm_start', 'early_stopping'
+    или 'default'.
+    
+    Потоковое обучение проверяется первым: в этом режиме данные не
+    загружаются в память, и остальные режимы к нему не применимы.
+    """
+    if getattr(args, 'out_of_core', False) or (config.get('out_of_core') or {}).get('enabled', False):
+        return 'out_of_core'
+    if args.sweep or (config.get('sweep') or {}).get('enabled', False):
+        return 'sweep'
+    if args.warm_start or (config.get('warm_start') or {}).get('enabled', False):
+        return 'warm_start'
+    if args.early_stopping or (config.get('early_stopping') or {}).get('enabled', False):
+        return 'early_stopping'
+    return 'default'
+
+def with_cli_overrides(args, config: dict) -> dict:
+    """Конфигурация с секциями, включенными флагами командной строки."""
+    if getattr(args, 'cross_validation', False):
+        config = dict(config, cross_validation=dict(config.get('cross_validation') or {}, enabled=True))
+    return config
+
+def open_training_cache(args, config: dict, mode: str):
+    """
+    Кеш результатов обучения или None, если он выключен.
+    
+    Дообучение (warm_start) не кешируется: его результат зависит от
+    родительской модели, а не только от данных и конфигурации.
+    """
+    cache_config = config.get('training_cache') or {}
+    if getattr(args, 'no_cache', False) or not cache_config.get('enabled', False) \
+            or mode == 'warm_start':
+        return None
+    return ModelCache(cache_config.get('dir'), cache_config.get('max_size_mb', 512))
+
+def run_training(args, config: dict, X, y, data_md5: str, data_path: str = "data/housing.csv") -> tuple:
+    """
+    Обучение, оценка на тестовой выборке и запись артефактов этапа.
+    
+    Args:
+        args: Флаги режима обучения (`parse_args`)
+        config: Конфигурация модели
+        X, y: Загруженные данные (None в режиме 'out_of_core')
+        data_md5: md5 файла данных для отчета
+        data_path: Файл данных для потокового обучения
+        
+    Returns:
+        (обученная модель, отчет об обучении)
+    """
     # Пути
-    data_path = "data/housing.csv"
-    config_path = "config/model_config.yaml"
-    model_output_path = "models/model.pkl"
+    model_output_path = "models/model"
     metrics_output_path = "models/metrics.json"
     report_output_path = "reports/training_report.json"
+    leaderboard_output_path = "reports/sweep_leaderboard.json"
     
     # Создание директорий
     Path(model_output_path).parent.mkdir(parents=True, exist_ok=True)
     Path(metrics_output_path).parent.mkdir(parents=True, exist_ok=True)
     Path(report_output_path).parent.mkdir(parents=True, exist_ok=True)
     
-    # Загрузка конфигурации
-    print("Загрузка конфигурации...")
-    config = load_config(config_path)
+    # Режим обучения
+    config = with_cli_overrides(args, config)
+    mode = training_mode(args, config)
+    sweep = mode == 'sweep'
+    warm_start = mode == 'warm_start'
+    early_stopping = mode == 'early_stopping'
+    out_of_core = mode == 'out_of_core'
+    outputs = [model_output_path, metrics_output_path, report_output_path]
+    if sweep:
+        outputs.append(leaderboard_output_path)
     
-    # Загрузка данных
-    X, y = load_data(data_path)
+    # Кеш результатов обучения: при совпадении данных, конфигурации и
+    # кода артефакты восстанавливаются без обучения
+    cache = open_training_cache(args, config, mode)
+    key = None
+    if cache is not None:
+        with perf.phase("cache"):
+            key = cache_key(data_md5, config, mode)
+            restored = cache.restore(key, outputs)
+        if restored:
+            print(f"Результат обучения восстановлен из кеша ({key})")
+            with open(report_output_path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+            with perf.phase("load_model"):
+                model = load_model(model_output_path)
+            for metric_name, metric_value in report['metrics'].items():
+                print(f"  {metric_name.upper()}: {metric_value:.4f}")
+            with perf.phase("registry"):
+                record_training(config, mode, report, model_output_path, cached=True)
+            return model, report
     
-    # Разделение на train/test
-    test_size = config['data']['test_size']
-    random_state = config['data']['random_state']
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=random_state
-    )
-    
-    print(f"Размер обучающей выборки: {X_train.shape[0]}")
-    print(f"Размер тестовой выборки: {X_test.shape[0]}")
-    
-    # Обучение модели
-    model = train_model(X_train, y_train, config)
-    
-    # Оценка на тестовой выборке
-    print("Оценка модели на тестовой выборке...")
-    metrics = evaluate_model(model, X_test, y_test)
+    lineage = None
+    early_stopping_report = None
+    out_of_core_report = None
+    if out_of_core:
+        # Потоковое обучение: разбиение по хешу строк, подлеса по блокам
+        with perf.phase("fit"):
+            model, metrics, out_of_core_report = train_out_of_core(
+                data_path, config, Schema.from_config(config)
+            )
+        model_params = dict(config['model']['params'], n_estimators=model.n_estimators)
+        data_info = {
+            'train_size': out_of_core_report.pop('train_size'),
+            'test_size': out_of_core_report.pop('test_size'),
+            'features': list(model.feature_names_in_)
+        }
+        print(f"Размер обучающей выборки: {data_info['train_size']}")
+        print(f"Размер тестовой выборки: {data_info['test_size']}")
+    else:
+        # Разделение на train/test; при дообучении строки родительской
+        # модели остаются в той же выборке, что и при ее обучении
+        test_size = config['data']['test_size']
+        random_state = config['data']['random_state']
+        random_rows, split_issue = None, None
+        if warm_start:
+            random_rows, split_issue = parent_split(X, y, config, data_md5)
+        with perf.phase("split"):
+            X_train, X_test, y_train, y_test = split_data(
+                X, y, test_size, random_state, random_rows
+            )
+        
+        print(f"Размер обучающей выборки: {X_train.shape[0]}")
+        print(f"Размер тестовой выборки: {X_test.shape[0]}")
+        
+        # Обучение модели
+        with perf.phase("fit"):
+            if sweep:
+                model, model_params, leaderboard = run_sweep(
+                    X_train, X_test, y_train, y_test, config, leaderboard_output_path
+                )
+            elif warm_start:
+                model, lineage = train_warm_start(X_train, y_train, config, data_md5, split_issue)
+                model_params = dict(config['model']['params'], n_estimators=model.n_estimators)
+            elif early_stopping:
+                model, early_stopping_report = train_early_stopping(X_train, y_train, config)
+                model_params = dict(config['model']['params'], n_estimators=model.n_estimators)
+            else:
+                model = train_model(X_train, y_train, config)
+                model_params = config['model']['params']
+        
+        # Оценка на тестовой выборке
+        print("Оценка модели на тестовой выборке...")
+        with perf.phase("predict"):
+            metrics = evaluate_model(model, X_test, y_test)
+        
+        data_info = {
+            'train_size': int(X_train.shape[0]),
+            'test_size': int(X_test.shape[0]),
+            'features': list(X.columns),
+            'split': split_info(X, y, config, random_rows)
+        }
     
     print("\nМетрики модели:")
     for metric_name, metric_value in metrics.items():
         print(f"  {metric_name.upper()}: {metric_value:.4f}")
     
-    # Проверка порогов качества
+    # Кросс-валидация параметров модели на всех данных
+    cross_validation_report = None
+    if (config.get('cross_validation') or {}).get('enabled', False):
+        if out_of_core:
+            print("\nКросс-валидация недоступна при потоковом обучении, пропускается")
+        else:
+            with perf.phase("cross_validation"):
+                cross_validation_report = cross_validate(X, y, config, model_params)
+            print(f"Метрики кросс-валидации (среднее ± std, {cross_validation_report['confidence']:.0%} ДИ):")
+            for metric_name, stats in cross_validation_report['aggregate'].items():
+                print(f"  {metric_name.upper()}: {stats['mean']:.4f} ± {stats['std']:.4f} "
+                      f"[{stats['ci_low']:.4f}, {stats['ci_high']:.4f}]")
+    
+    # Проверка порогов качества: по отложенной выборке или, если задано,
+    # по средним либо пессимистичным границам кросс-валидации
+    gate_values = metrics
+    if cross_validation_report is not None and cross_validation_report['gate_metrics'] is not None:
+        gate_values = cross_validation_report['gate_metrics']
+        print(f"Проверка порогов по кросс-валидации ({cross_validation_report['gate']})")
     thresholds = config.get('thresholds', {})
     min_r2 = thresholds.get('min_r2', 0.0)
     max_rmse = thresholds.get('max_rmse', float('inf'))
-    
-    quality_check = {
-        'passed': metrics['r2'] >= min_r2 and metrics['rmse'] <= max_rmse,
-        'r2_check': {
-            'passed': metrics['r2'] >= min_r2,
-            'value': metrics['r2'],
-            'threshold': min_r2
-        },
-        'rmse_check': {
-            'passed': metrics['rmse'] <= max_rmse,
-            'value': metrics['rmse'],
-            'threshold': max_rmse
-        }
-    }
+    quality_check = check_quality(gate_values, thresholds)
     
     if not quality_check['passed']:
         print("\n⚠️  ВНИМАНИЕ: Модель не прошла проверку качества!")
         if not quality_check['r2_check']['passed']:
-            print(f"  R² = {metrics['r2']:.4f} < {min_r2}")
+            print(f"  R² = {gate_values['r2']:.4f} < {min_r2}")
         if not quality_check['rmse_check']['passed']:
-            print(f"  RMSE = {metrics['rmse']:.4f} > {max_rmse}")
+            print(f"  RMSE = {gate_values['rmse']:.4f} > {max_rmse}")
     else:
         print("\n✅ Модель прошла проверку качества!")
     
     # Сохранение модели
     print(f"\nСохранение модели в {model_output_path}...")
-    with open(model_output_path, 'wb') as f:
-        pickle.dump(model, f)
+    with perf.phase("save_model"):
+        save_model(model, model_output_path)
     
     # Сохранение метрик
     print(f"Сохранение метрик в {metrics_output_path}...")
-    with open(metrics_output_path, 'w', encoding='utf-8') as f:
+    with perf.phase("write_report"), open(metrics_output_path, 'w', encoding='utf-8') as f:
         json.dump(metrics, f, indent=2)
     
     # Создание отчета
     report = {
         'model_name': config['model']['name'],
-        'model_params': config['model']['params'],
+        'model_params': model_params,
         'metrics': metrics,
         'quality_check': quality_check,
-        'data_info': {
-            'train_size': int(X_train.shape[0]),
-            'test_size': int(X_test.shape[0]),
-            'features': list(X.columns)
-        }
+        'data_info': dict(data_info, data_md5=data_md5)
     }
     
-    with open(report_output_path, 'w', encoding='utf-8') as f:
+    if early_stopping_report is not None:
+        report['early_stopping'] = early_stopping_report
+    
+    if out_of_core_report is not None:
+        report['out_of_core'] = out_of_core_report
+    
+    if cross_validation_report is not None:
+        report['cross_validation'] = cross_validation_report
+    
+    if lineage is not None:
+        lineage['model_md5'] = artifact_md5(model_output_path)
+        report['lineage'] = lineage
+    
+    # Отпечаток леса для проверки воспроизводимости (scripts/fingerprint.py);
+    # деревья родительской модели при дообучении и подлеса потокового
+    # обучения (обучены на отдельных блоках) не переобучаются
+    if is_tree_forest(model):
+        first_retrainable = 0
+        if lineage is not None and lineage['mode'] == 'warm_start':
+            first_retrainable = lineage['parent_n_estimators']
+        if out_of_core:
+            first_retrainable = model.n_estimators
+        with perf.phase("fingerprint"):
+            report['fingerprint'] = forest_fingerprint(model, first_retrainable)
+    
+    if sweep:
+        report['sweep'] = {
+            'n_candidates': len(leaderboard),
+            'n_passed': sum(entry['quality_check_passed'] for entry in leaderboard),
+            'leaderboard_path': leaderboard_output_path
+        }
+    
+    with perf.phase("write_report"), open(report_output_path, 'w', encoding='utf-8') as f:
         json.dump(report, f, indent=2, ensure_ascii=False)
     
     print(f"Отчет сохранен в {report_output_path}")
     
+    if cache is not None:
+        with perf.phase("cache"):
+            cache.store(key, outputs)
+    
+    # Запись запуска в реестр моделей
+    with perf.phase("registry"):
+        record_training(config, mode, report, model_output_path)
+    
+    return model, report
+
+def main(argv=None):
+    args = parse_args(argv)
+    
+    # Пути
+    data_path = "data/housing.csv"
+    config_path = "config/model_config.yaml"
+    
+    # Загрузка конфигурации
+    print("Загрузка конфигурации...")
+    config = load_config(config_path)
+    
+    # Загрузка данных (в потоковом режиме файл читается блоками при обучении)
+    X = y = None
+    with perf.phase("load"):
+        if training_mode(args, config) != 'out_of_core':
+            X, y = load_data(data_path, schema=Schema.from_config(config))
+        data_md5 = dataset_md5(data_path)
+    
+    _, report = run_training(args, config, X, y, data_md5, data_path)
+    
     # Выход с кодом ошибки, если качество неудовлетворительное
-    if not quality_check['passed']:
+    if not report['quality_check']['passed']:
         sys.exit(1)
     
     print("\n✅ Обучение завершено успешно!")
     sys.exit(0)
 
 if __name__ == "__main__":
-    main()
+    with perf.stage("train_model"):
+        main()
 
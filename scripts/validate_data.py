@@ -5,142 +5,188 @@
 """
 
 import pandas as pd
-import numpy as np
 import json
+import os
 import sys
 from pathlib import Path
 
-def convert_numpy_types(obj):
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts import perf
+from scripts.dataset import (
+    CHUNK_SIZE, COLUMN_NAMES, block_hashes, iter_csv_chunks, load_dataframe
+)
+from scripts.validation_checks import required_statistics, run_checks
+from scripts.validation_stats import ValidationState, compute_profile, profile_from_state
+
+def validate_dataframe(df: pd.DataFrame, checks=None, max_workers: int = None) -> dict:
     """
-    Рекурсивно конвертирует NumPy типы в нативные Python типы для JSON сериализации.
+    Проверки данных, загруженных в память целиком.
+    
+    Статистики, нужные выбранным проверкам, считаются один раз векторно
+    по 2-D массиву с распараллеливанием по группам колонок.
+    
+    Args:
+        df: Датафрейм с именованными колонками
+        checks: Имена проверок из реестра (по умолчанию — все)
+        max_workers: Размер пула потоков для расчета статистик
+        
+    Returns:
+        Словарь с результатами проверок (без итогового статуса)
     """
-    if isinstance(obj, (np.integer, np.int64, np.int32, np.int16, np.int8)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float64, np.float32, np.float16)):
-        return float(obj)
-    elif isinstance(obj, (np.bool_, bool)):
-        return bool(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {key: convert_numpy_types(value) for key, value in obj.items()}
-    elif isinstance(obj, (list, tuple)):
-        return [convert_numpy_types(item) for item in obj]
-    elif isinstance(obj, pd.Series):
-        return {key: convert_numpy_types(value) for key, value in obj.items()}
-    else:
-        return obj
+    profile = compute_profile(df, required_statistics(checks), max_workers=max_workers)
+    return run_checks(profile, checks)
 
-def validate_data(data_path: str, output_path: str) -> dict:
+def state_path_for(output_path: str) -> Path:
+    """Путь к файлу состояния инкрементальной валидации рядом с отчетом."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.state.npz")
+
+def _resume_state(state_path: str, data_path: str) -> tuple:
     """
-    Валидация данных Boston Housing.
+    Загрузка сохраненного состояния, если файл данных был только дописан.
+    
+    Уже проверенный префикс файла сравнивается с сохраненными хешами всех
+    его блоков, поэтому правка любой строки в нем ведет к полной валидации.
+    
+    Returns:
+        (состояние, байтовое смещение начала необработанного хвоста) или
+        (None, 0), если нужна полная валидация
+    """
+    try:
+        state = ValidationState.load(state_path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Состояние валидации не загружено ({e}), полная валидация")
+        return None, 0
+    
+    source = state.source
+    validated_size = source.get('size', 0)
+    if (
+        state.columns == COLUMN_NAMES
+        and source.get('complete_lines')
+        and validated_size <= os.path.getsize(data_path)
+        and source.get('block_hashes') is not None
+        and block_hashes(data_path, validated_size) == source['block_hashes']
+    ):
+        return state, validated_size
+    
+    print("Файл данных изменен не только дописыванием строк, полная валидация")
+    return None, 0
+
+def validate_streaming(
+    data_path: str,
+    chunksize: int,
+    state_path: str = None,
+    checks=None
+) -> dict:
+    """
+    Однопроходная потоковая валидация блоками по `chunksize` строк.
+    
+    Все статистики копятся в сливаемых аккумуляторах, поэтому пиковая
+    память ограничена размером блока (плюс 8 байт на уникальную строку
+    для поиска дубликатов). Квартили для IQR оцениваются квантильным
+    скетчем и точны, пока число строк не превышает его емкость.
+    
+    Если задан `state_path`, состояние аккумуляторов сохраняется после
+    прохода, а при следующем запуске для дописанного файла читается
+    только новый хвост.
     
     Args:
         data_path: Путь к файлу данных
-        output_path: Путь для сохранения отчета валидации
+        chunksize: Число строк в одном блоке
+        state_path: Путь к файлу состояния для инкрементальной валидации
+        checks: Имена проверок из реестра (по умолчанию — все)
         
     Returns:
-        Словарь с результатами валидации
+        Словарь с результатами проверок той же структуры, что и
+        `validate_dataframe`
     """
-    print(f"Загрузка данных из {data_path}...")
+    state, offset = None, 0
+    if state_path and Path(state_path).exists():
+        state, offset = _resume_state(state_path, data_path)
     
-    # Загрузка данных
-    try:
-        # Boston Housing dataset имеет пробелы в качестве разделителей
-        df = pd.read_csv(data_path, sep=r'\s+', header=None)
-        
-        # Названия колонок согласно документации
-        column_names = [
-            'CRIM', 'ZN', 'INDUS', 'CHAS', 'NOX', 'RM', 'AGE', 
-            'DIS', 'RAD', 'TAX', 'PTRATIO', 'B', 'LSTAT', 'MEDV'
-        ]
-        df.columns = column_names
-        
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": f"Ошибка загрузки данных: {str(e)}"
+    size = os.path.getsize(data_path)
+    if state is not None:
+        print(f"Инкрементальная валидация: новых данных {size - offset} байт")
+    
+    for chunk in iter_csv_chunks(data_path, chunksize, offset=offset):
+        if state is None:
+            state = ValidationState(chunk.columns)
+        state.update(chunk)
+    
+    if state is None:
+        raise ValueError("Файл данных пуст")
+    
+    if state_path:
+        with open(data_path, 'rb') as f:
+            f.seek(max(size - 1, 0))
+            complete_lines = f.read(1) == b'\n'
+        # Хеши проверенного префикса не пересчитываются, хешируется только хвост
+        known = state.source.get('block_hashes') if offset else None
+        state.source = {
+            'size': size,
+            'block_hashes': block_hashes(data_path, size, known, offset),
+            'complete_lines': complete_lines
         }
+        state.save(state_path)
     
-    validation_results = {
-        "status": "success",
-        "checks": {},
-        "summary": {}
-    }
-    
-    # Проверка 1: Размерность данных
-    n_rows, n_cols = df.shape
-    validation_results["checks"]["shape"] = {
-        "passed": n_rows > 0 and n_cols == 14,
-        "rows": int(n_rows),
-        "columns": int(n_cols),
-        "expected_columns": 14
-    }
-    
-    # Проверка 2: Отсутствие пропусков
-    missing_values = df.isnull().sum()
-    has_missing = missing_values.sum() > 0
-    validation_results["checks"]["missing_values"] = {
-        "passed": not has_missing,
-        "missing_counts": missing_values[missing_values > 0].to_dict(),
-        "total_missing": int(missing_values.sum())
-    }
-    
-    # Проверка 3: Типы данных
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    validation_results["checks"]["data_types"] = {
-        "passed": len(numeric_cols) == len(df.columns),
-        "numeric_columns": len(numeric_cols),
-        "total_columns": len(df.columns)
-    }
-    
-    # Проверка 4: Диапазоны значений для целевой переменной
-    target_col = 'MEDV'
-    if target_col in df.columns:
-        medv_min = float(df[target_col].min())
-        medv_max = float(df[target_col].max())
-        medv_mean = float(df[target_col].mean())
-        medv_std = float(df[target_col].std())
+    return run_checks(profile_from_state(state), checks)
+
+def validate_data(
+    data_path: str,
+    output_path: str,
+    chunksize: int = None,
+    incremental: bool = False,
+    checks=None
+) -> dict:
+    """
+    Валидация данных Boston Housing.
+    
+    Args:
+        data_path: Путь к файлу данных
+        output_path: Путь для сохранения отчета валидации
+        chunksize: Если задан, данные проверяются потоково блоками
+            по `chunksize` строк вместо загрузки в память целиком
+        incremental: Потоковая валидация с сохранением состояния рядом
+            с отчетом; для дописанного файла обрабатывается только хвост
+        checks: Имена проверок из реестра `validation_checks` (по
+            умолчанию — все зарегистрированные)
         
-        validation_results["checks"]["target_range"] = {
-            "passed": medv_min >= 0 and medv_max <= 50,
-            "min": medv_min,
-            "max": medv_max,
-            "mean": medv_mean,
-            "std": medv_std
-        }
+    Returns:
+        Словарь с результатами валидации
+    """
+    if incremental and not chunksize:
+        chunksize = CHUNK_SIZE
     
-    # Проверка 5: Выбросы (outliers) - используем IQR метод
-    outliers_count = {}
-    for col in df.select_dtypes(include=[np.number]).columns:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        outliers = ((df[col] < lower_bound) | (df[col] > upper_bound)).sum()
-        outliers_count[col] = int(outliers)
-    
-    validation_results["checks"]["outliers"] = {
-        "passed": True,  # Выбросы допустимы, просто фиксируем
-        "outliers_count": outliers_count,
-        "total_outliers": sum(outliers_count.values())
-    }
-    
-    # Проверка 6: Дубликаты
-    duplicates = df.duplicated().sum()
-    validation_results["checks"]["duplicates"] = {
-        "passed": duplicates == 0,
-        "duplicate_rows": int(duplicates)
-    }
-    
-    # Проверка 7: Статистика по признакам
-    validation_results["summary"]["statistics"] = {
-        "mean": df.select_dtypes(include=[np.number]).mean().to_dict(),
-        "std": df.select_dtypes(include=[np.number]).std().to_dict(),
-        "min": df.select_dtypes(include=[np.number]).min().to_dict(),
-        "max": df.select_dtypes(include=[np.number]).max().to_dict()
-    }
+    if chunksize:
+        print(f"Потоковая валидация {data_path} блоками по {chunksize} строк...")
+        state_path = state_path_for(output_path) if incremental else None
+        try:
+            with perf.phase("stream"):
+                validation_results = validate_streaming(data_path, chunksize, state_path, checks)
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Ошибка загрузки данных: {str(e)}"
+            }
+    else:
+        print(f"Загрузка данных из {data_path}...")
+
+        # Загрузка данных
+        try:
+            # Boston Housing dataset имеет пробелы в качестве разделителей;
+            # повторные запуски читают бинарный кеш вместо текста
+            with perf.phase("load"):
+                df = load_dataframe(data_path)
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Ошибка загрузки данных: {str(e)}"
+            }
+
+        with perf.phase("checks"):
+            validation_results = validate_dataframe(df, checks)
     
     # Итоговый статус
     all_passed = all(
@@ -150,12 +196,9 @@ def validate_data(data_path: str, output_path: str) -> dict:
     
     validation_results["status"] = "success" if all_passed else "warning"
     
-    # Конвертируем NumPy типы в нативные Python типы для JSON сериализации
-    validation_results = convert_numpy_types(validation_results)
-    
     # Сохранение отчета
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
+    with perf.phase("write_report"), open(output_path, 'w', encoding='utf-8') as f:
         json.dump(validation_results, f, indent=2, ensure_ascii=False)
     
     print(f"Валидация завершена. Статус: {validation_results['status']}")
@@ -163,15 +206,11 @@ def validate_data(data_path: str, output_path: str) -> dict:
     
     return validation_results
 
-if __name__ == "__main__":
-    data_path = "data/housing.csv"
-    output_path = "reports/data_validation_report.json"
-    
-    results = validate_data(data_path, output_path)
-    
+def critical_checks_passed(results: dict) -> bool:
+    """Пройдены ли критические проверки (с выводом причины, если нет)."""
     if results["status"] == "error":
         print(f"ОШИБКА: {results.get('message', 'Неизвестная ошибка')}")
-        sys.exit(1)
+        return False
     
     # Проверяем критические проверки
     critical_checks = ["shape", "missing_values", "data_types"]
@@ -182,8 +221,37 @@ if __name__ == "__main__":
     
     if failed_checks:
         print(f"КРИТИЧЕСКИЕ ПРОВЕРКИ НЕ ПРОЙДЕНЫ: {', '.join(failed_checks)}")
-        sys.exit(1)
+        return False
     
     print("Все критические проверки пройдены успешно!")
-    sys.exit(0)
+    return True
+
+def parse_args(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Валидация данных Boston Housing")
+    parser.add_argument(
+        "--chunksize", type=int, default=None,
+        help="Потоковый режим: размер блока в строках (по умолчанию — загрузка целиком)"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Сохранять состояние и для дописанного файла проверять только новые строки"
+    )
+    return parser.parse_args(argv)
 
+def main(argv=None):
+    args = parse_args(argv)
+    
+    data_path = "data/housing.csv"
+    output_path = "reports/data_validation_report.json"
+    
+    with perf.stage("validate_data"):
+        results = validate_data(
+            data_path, output_path, chunksize=args.chunksize, incremental=args.incremental
+        )
+    
+    sys.exit(0 if critical_checks_passed(results) else 1)
+
+if __name__ == "__main__":
+    main()
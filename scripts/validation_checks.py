@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Реестр проверок качества данных.
+
+Каждая проверка объявляет статистики колонок, которые ей нужны
+(см. `validation_stats.STATISTICS`). Движок вычисляет объединение этих
+статистик один раз, после чего проверки только читают готовый профиль,
+поэтому новая проверка не добавляет нового прохода по данным.
+
+Пример собственной проверки:
+
+    @register_check("rm_range", requires=("min", "max"))
+    def check_rm_range(profile):
+        rm_min = profile.by_column("min")["RM"]
+        rm_max = profile.by_column("max")["RM"]
+        return {"passed": 3 <= rm_min and rm_max <= 9, "min": rm_min, "max": rm_max}
+
+Проверка возвращает словарь только с нативными типами Python (или None,
+если проверка неприменима к данным), поэтому отчет сериализуется в JSON
+без дополнительных преобразований.
+
+Ожидаемые колонки, целевая переменная и допустимые диапазоны берутся из
+секции `schema` конфигурации (`scripts.dataset.default_schema`).
+"""
+
+from scripts.dataset import default_schema
+
+SCHEMA = default_schema()
+
+CHECKS = {}
+
+
+class Check:
+    """Описание зарегистрированной проверки."""
+
+    def __init__(self, name: str, func, requires=(), section: str = "checks"):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.section = section
+
+    def __call__(self, profile):
+        return self.func(profile)
+
+
+def register_check(name: str, requires=(), section: str = "checks"):
+    """
+    Декоратор регистрации проверки.
+
+    Args:
+        name: Ключ результата в отчете
+        requires: Статистики колонок, которые нужны проверке
+        section: Раздел отчета ("checks" или "summary")
+    """
+    def decorator(func):
+        CHECKS[name] = Check(name, func, requires, section)
+        return func
+    return decorator
+
+
+def required_statistics(names=None) -> set:
+    """Объединение статистик, необходимых выбранным проверкам."""
+    return {
+        stat
+        for check in select_checks(names)
+        for stat in check.requires
+    }
+
+
+def select_checks(names=None) -> list:
+    if names is None:
+        return list(CHECKS.values())
+    return [CHECKS[name] for name in names]
+
+
+def run_checks(profile, names=None) -> dict:
+    """Выполнение проверок на готовом профиле датасета."""
+    validation_results = {
+        "status": "success",
+        "checks": {},
+        "summary": {}
+    }
+    for check in select_checks(names):
+        result = check(profile)
+        if result is not None:
+            validation_results[check.section][check.name] = result
+    return validation_results
+
+
+# Проверка 1: Размерность данных
+@register_check("shape")
+def check_shape(profile):
+    n_cols = len(profile.columns)
+    return {
+        "passed": profile.n_rows > 0 and profile.columns == SCHEMA.columns,
+        "rows": profile.n_rows,
+        "columns": n_cols,
+        "expected_columns": len(SCHEMA.columns)
+    }
+
+
+# Проверка 2: Отсутствие пропусков
+@register_check("missing_values", requires=("missing",))
+def check_missing_values(profile):
+    missing = profile.by_column("missing", profile.columns)
+    missing_counts = {col: count for col, count in missing.items() if count > 0}
+    return {
+        "passed": not missing_counts,
+        "missing_counts": missing_counts,
+        "total_missing": sum(missing_counts.values())
+    }
+
+
+# Проверка 3: Типы данных
+@register_check("data_types")
+def check_data_types(profile):
+    return {
+        "passed": len(profile.numeric_columns) == len(profile.columns),
+        "numeric_columns": len(profile.numeric_columns),
+        "total_columns": len(profile.columns)
+    }
+
+
+# Проверка 4: Диапазоны значений для целевой переменной
+@register_check("target_range", requires=("min", "max", "mean", "std"))
+def check_target_range(profile):
+    target = SCHEMA.target
+    if target not in profile.numeric_columns:
+        return None
+    columns = [target]
+    lower, upper = SCHEMA.ranges().get(target, (None, None))
+    medv_min = profile.by_column("min", columns)[target]
+    medv_max = profile.by_column("max", columns)[target]
+    return {
+        "passed": (lower is None or medv_min >= lower) and (upper is None or medv_max <= upper),
+        "min": medv_min,
+        "max": medv_max,
+        "mean": profile.by_column("mean", columns)[target],
+        "std": profile.by_column("std", columns)[target]
+    }
+
+
+# Проверка 4a: Диапазоны значений всех колонок из схемы
+@register_check("value_ranges", requires=("min", "max"))
+def check_value_ranges(profile):
+    ranges = {col: bounds for col, bounds in SCHEMA.ranges().items() if col in profile.numeric_columns}
+    columns = list(ranges)
+    col_min = profile.by_column("min", columns)
+    col_max = profile.by_column("max", columns)
+    violations = {}
+    for col, (lower, upper) in ranges.items():
+        if (lower is not None and col_min[col] < lower) or (upper is not None and col_max[col] > upper):
+            violations[col] = {"min": col_min[col], "max": col_max[col], "allowed": [lower, upper]}
+    return {
+        "passed": not violations,
+        "violations": violations,
+        "checked_columns": len(columns)
+    }
+
+
+# Проверка 5: Выбросы (outliers) - используем IQR метод
+@register_check("outliers", requires=("outliers",))
+def check_outliers(profile):
+    outliers_count = profile.by_column("outliers")
+    return {
+        "passed": True,  # Выбросы допустимы, просто фиксируем
+        "outliers_count": outliers_count,
+        "total_outliers": sum(outliers_count.values())
+    }
+
+
+# Проверка 6: Дубликаты
+@register_check("duplicates", requires=("duplicates",))
+def check_duplicates(profile):
+    duplicates = int(profile.stats["duplicates"])
+    return {
+        "passed": duplicates == 0,
+        "duplicate_rows": duplicates
+    }
+
+
+# Проверка 7: Статистика по признакам
+@register_check("statistics", requires=("mean", "std", "min", "max"), section="summary")
+def summary_statistics(profile):
+    return {
+        "mean": profile.by_column("mean"),
+        "std": profile.by_column("std"),
+        "min": profile.by_column("min"),
+        "max": profile.by_column("max")
+    }
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Сливаемые (mergeable) аккумуляторы статистик для потоковой валидации.
+
+Каждый аккумулятор обновляется блоком строк и может быть объединен с
+другим аккумулятором того же типа, поэтому статистики считаются за один
+проход по данным при памяти, ограниченной размером блока.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+class QuantileSketch:
+    """
+    Приближенный квантильный скетч (упрощенный KLL).
+
+    Элементы уровня h имеют вес 2**h. Переполненный уровень сортируется,
+    и каждый второй элемент переносится на следующий уровень. Пока в скетч
+    попало не больше `capacity` значений, квантили вычисляются точно
+    (линейная интерполяция, как в `pandas.Series.quantile`).
+    """
+
+    def __init__(self, capacity: int = 4096, seed: int = 0):
+        self.capacity = capacity
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def count(self) -> int:
+        return sum(len(level) << h for h, level in enumerate(self.levels))
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        for h, level in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self._compress()
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self.capacity:
+                level = np.sort(level)
+                # При нечетной длине один элемент остается на уровне
+                keep = level[-1:] if len(level) % 2 else level[:0]
+                paired = level[:len(level) - len(keep)]
+                offset = int(self._rng.integers(2))
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], paired[offset::2]])
+                self.levels[h] = keep
+            h += 1
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level), 1 << h, dtype=np.int64)
+            for h, level in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Квантиль(и) с линейной интерполяцией между соседними рангами."""
+        items, cum_weights = self._weighted()
+        if len(items) == 0:
+            return np.full(np.shape(q), np.nan)
+        rank = np.asarray(q, dtype=np.float64) * (cum_weights[-1] - 1)
+        lo = np.floor(rank)
+        hi = np.ceil(rank)
+        v_lo = items[np.searchsorted(cum_weights, lo, side='right')]
+        v_hi = items[np.searchsorted(cum_weights, hi, side='right')]
+        return v_lo + (rank - lo) * (v_hi - v_lo)
+
+    def count_outside(self, lower: float, upper: float) -> int:
+        """Оценка числа значений строго меньше `lower` или строго больше `upper`."""
+        items, cum_weights = self._weighted()
+        if len(items) == 0:
+            return 0
+        weights = np.diff(cum_weights, prepend=0)
+        return int(weights[(items < lower) | (items > upper)].sum())
+
+
+class ColumnStats:
+    """
+    Статистики по колонкам, обновляемые 2-D блоками float64.
+
+    Среднее и дисперсия считаются методом Уэлфорда в форме Чана (слияние
+    блоков), минимумы/максимумы и пропуски — векторно по всем колонкам.
+    """
+
+    def __init__(self, columns, sketch_capacity: int = 4096):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.count = np.zeros(k, dtype=np.int64)
+        self.missing = np.zeros(k, dtype=np.int64)
+        self.mean = np.zeros(k, dtype=np.float64)
+        self.m2 = np.zeros(k, dtype=np.float64)
+        self.min = np.full(k, np.nan)
+        self.max = np.full(k, np.nan)
+        self.sketches = [QuantileSketch(sketch_capacity, seed=i) for i in range(k)]
+
+    def update(self, block: np.ndarray):
+        block = np.asarray(block, dtype=np.float64)
+        present = ~np.isnan(block)
+        count = present.sum(axis=0)
+        total = np.where(present, block, 0.0).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, total / count, 0.0)
+        m2 = np.where(present, (block - mean) ** 2, 0.0).sum(axis=0)
+
+        self.missing += len(block) - count
+        self._merge_moments(count, mean, m2)
+        self.min = np.fmin(self.min, np.fmin.reduce(block, axis=0, initial=np.nan))
+        self.max = np.fmax(self.max, np.fmax.reduce(block, axis=0, initial=np.nan))
+        for i, sketch in enumerate(self.sketches):
+            sketch.update(block[:, i])
+
+    def merge(self, other: "ColumnStats"):
+        self.missing += other.missing
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+
+    def _merge_moments(self, count, mean, m2):
+        total = self.count + count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean - self.mean
+            weight = np.where(total > 0, count / total, 0.0)
+            self.mean = self.mean + delta * weight
+            self.m2 = self.m2 + m2 + delta ** 2 * self.count * weight
+        self.count = total
+
+    @property
+    def std(self) -> np.ndarray:
+        """Выборочное стандартное отклонение (ddof=1, как в pandas)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+    @property
+    def column_mean(self) -> np.ndarray:
+        return np.where(self.count > 0, self.mean, np.nan)
+
+
+class RowFingerprints:
+    """
+    Поиск дубликатов строк по 64-битным хешам.
+
+    Хранится только отсортированный массив уникальных хешей, поэтому
+    память растет с числом различных строк (8 байт на строку), а не с
+    размером самих данных.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.unique = np.empty(0, dtype=np.uint64)
+
+    @staticmethod
+    def hash_rows(block: np.ndarray) -> np.ndarray:
+        frame = pd.DataFrame(np.asarray(block, dtype=np.float64))
+        return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+    def update(self, block: np.ndarray):
+        self.update_hashes(self.hash_rows(block))
+
+    def update_hashes(self, hashes: np.ndarray):
+        self.rows += len(hashes)
+        self.unique = np.union1d(self.unique, hashes)
+
+    def merge(self, other: "RowFingerprints"):
+        self.rows += other.rows
+        self.unique = np.union1d(self.unique, other.unique)
+
+    @property
+    def duplicates(self) -> int:
+        return self.rows - len(self.unique)
+
+
+class ValidationState:
+    """
+    Полное сливаемое состояние потоковой валидации.
+
+    Хранит статистики по колонкам, индекс хешей строк и описание уже
+    обработанного префикса файла. Сохраняется в `.npz` рядом с отчетом,
+    чтобы при дописывании строк в файл обрабатывать только новый хвост.
+    """
+
+    VERSION = 2
+
+    def __init__(self, columns, sketch_capacity: int = 4096):
+        self.stats = ColumnStats(columns, sketch_capacity)
+        self.fingerprints = RowFingerprints()
+        self.non_numeric = set()
+        self.float32_columns = set()
+        self.source = {}
+
+    @property
+    def columns(self) -> list:
+        return self.stats.columns
+
+    def update(self, chunk: pd.DataFrame):
+        """Учет очередного блока строк."""
+        for col in chunk.columns:
+            if chunk[col].dtype == np.float32:
+                self.float32_columns.add(col)
+            if not pd.api.types.is_numeric_dtype(chunk[col]):
+                self.non_numeric.add(col)
+                chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+        block = chunk.to_numpy(dtype=np.float64)
+        self.stats.update(block)
+        self.fingerprints.update(block)
+
+    def save(self, path):
+        stats = self.stats
+        sketch_layout = np.zeros(
+            (len(stats.sketches), max(len(s.levels) for s in stats.sketches)),
+            dtype=np.int64
+        )
+        for i, sketch in enumerate(stats.sketches):
+            sketch_layout[i, :len(sketch.levels)] = [len(level) for level in sketch.levels]
+        meta = {
+            'version': self.VERSION,
+            'columns': stats.columns,
+            'non_numeric': sorted(self.non_numeric),
+            'float32_columns': sorted(self.float32_columns),
+            'sketch_capacity': stats.sketches[0].capacity,
+            'source': self.source
+        }
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                count=stats.count,
+                missing=stats.missing,
+                mean=stats.mean,
+                m2=stats.m2,
+                min=stats.min,
+                max=stats.max,
+                sketch_layout=sketch_layout,
+                sketch_values=np.concatenate(
+                    [level for s in stats.sketches for level in s.levels]
+                ),
+                rows=np.array(self.fingerprints.rows, dtype=np.int64),
+                row_hashes=self.fingerprints.unique
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path) -> "ValidationState":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('version') != cls.VERSION:
+                raise ValueError(f"Неподдерживаемая версия состояния: {meta.get('version')}")
+
+            state = cls(meta['columns'], meta['sketch_capacity'])
+            stats = state.stats
+            for name in ('count', 'missing', 'mean', 'm2', 'min', 'max'):
+                setattr(stats, name, data[name].copy())
+
+            values = data['sketch_values']
+            offset = 0
+            for sketch, lengths in zip(stats.sketches, data['sketch_layout']):
+                sketch.levels = []
+                for length in lengths[:np.max(np.nonzero(lengths)[0], initial=0) + 1]:
+                    sketch.levels.append(values[offset:offset + length].copy())
+                    offset += length
+
+            state.fingerprints.rows = int(data['rows'])
+            state.fingerprints.unique = data['row_hashes'].copy()
+            state.non_numeric = set(meta['non_numeric'])
+            state.float32_columns = set(meta['float32_columns'])
+            state.source = meta['source']
+        return state
+
+
+# Статистики, которые может запросить проверка. `n_rows` и список
+# числовых колонок доступны всегда.
+STATISTICS = (
+    'missing', 'mean', 'std', 'min', 'max', 'quartiles', 'outliers', 'duplicates'
+)
+
+
+class DatasetProfile:
+    """
+    Набор статистик датасета, на основе которых работают проверки.
+
+    Массивы в `stats` выровнены по `columns`; для нечисловых колонок
+    числовые статистики равны NaN. Статистики считаются в float64, но для
+    колонок, хранящихся в float32, отдаются с точностью float32:
+    кратчайшей десятичной записью, которая переводится в то же значение
+    float32 (12.1265, а не 12.126500129699707).
+    """
+
+    def __init__(self, columns, numeric_columns, n_rows: int, float32_columns=()):
+        self.columns = list(columns)
+        self.numeric_columns = list(numeric_columns)
+        self.float32_columns = set(float32_columns)
+        self.n_rows = int(n_rows)
+        self.stats = {}
+
+    def by_column(self, name: str, columns=None) -> dict:
+        """Статистика в виде {колонка: значение} с нативными типами Python."""
+        values = self.stats[name]
+        columns = self.numeric_columns if columns is None else columns
+        result = {}
+        for col in columns:
+            value = values[self.columns.index(col)].item()
+            if col in self.float32_columns and isinstance(value, float) and np.isfinite(value):
+                value = float(str(np.float32(value)))
+            result[col] = value
+        return result
+
+
+def _column_group_stats(block: np.ndarray, requires: set) -> dict:
+    """Векторный расчет статистик для группы колонок 2-D массива."""
+    result = {}
+    missing = np.isnan(block)
+    count = len(block) - missing.sum(axis=0)
+    result['missing'] = len(block) - count
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if requires & {'mean', 'std'}:
+            mean = np.where(missing, 0.0, block).sum(axis=0) / count
+            result['mean'] = mean
+            if 'std' in requires:
+                sq = np.where(missing, 0.0, (block - mean) ** 2).sum(axis=0)
+                result['std'] = np.where(count > 1, np.sqrt(sq / (count - 1)), np.nan)
+    if 'min' in requires:
+        result['min'] = np.fmin.reduce(block, axis=0, initial=np.nan)
+    if 'max' in requires:
+        result['max'] = np.fmax.reduce(block, axis=0, initial=np.nan)
+    if requires & {'quartiles', 'outliers'}:
+        if len(block):
+            q1, q3 = np.nanquantile(block, [0.25, 0.75], axis=0)
+        else:
+            q1 = q3 = np.full(block.shape[1], np.nan)
+        result['quartiles'] = np.stack([q1, q3], axis=1)
+        if 'outliers' in requires:
+            iqr = q3 - q1
+            outside = (block < q1 - 1.5 * iqr) | (block > q3 + 1.5 * iqr)
+            result['outliers'] = outside.sum(axis=0)
+    return result
+
+
+def compute_profile(df: pd.DataFrame, requires, max_workers: int = None) -> DatasetProfile:
+    """
+    Расчет запрошенных статистик за один проход по 2-D массиву float64.
+
+    Числовые колонки разбиваются на группы, которые обрабатываются в
+    пуле потоков (NumPy отпускает GIL на векторных операциях); поиск
+    дубликатов по хешам строк выполняется отдельной задачей.
+    """
+    requires = set(requires)
+    unknown = requires - set(STATISTICS)
+    if unknown:
+        raise ValueError(f"Неизвестные статистики: {sorted(unknown)}")
+
+    columns = list(df.columns)
+    numeric_columns = list(df.select_dtypes(include=[np.number]).columns)
+    float32_columns = [col for col in numeric_columns if df[col].dtype == np.float32]
+    profile = DatasetProfile(columns, numeric_columns, len(df), float32_columns)
+    matrix = np.asfortranarray(df[numeric_columns].to_numpy(dtype=np.float64))
+
+    max_workers = max_workers or min(os.cpu_count() or 1, 8)
+    n_groups = max(1, min(max_workers, len(numeric_columns)))
+    bounds = np.linspace(0, len(numeric_columns), n_groups + 1).astype(int)
+    groups = [(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        duplicates = None
+        if 'duplicates' in requires:
+            duplicates = pool.submit(_count_duplicates, df, matrix, numeric_columns)
+        parts = list(pool.map(
+            lambda bound: _column_group_stats(matrix[:, bound[0]:bound[1]], requires),
+            groups
+        ))
+
+    numeric_index = [columns.index(col) for col in numeric_columns]
+    for name in parts[0] if parts else ():
+        merged = np.concatenate([part[name] for part in parts])
+        values = np.full((len(columns),) + merged.shape[1:], np.nan)
+        values[numeric_index] = merged
+        profile.stats[name] = values
+
+    # Пропуски учитываются и в нечисловых колонках
+    missing = df.isnull().sum().to_numpy() if len(numeric_columns) < len(columns) \
+        else profile.stats.get('missing', np.zeros(len(columns)))
+    profile.stats['missing'] = np.asarray(missing, dtype=np.int64)
+    if 'outliers' in profile.stats:
+        profile.stats['outliers'] = np.nan_to_num(profile.stats['outliers']).astype(np.int64)
+    if duplicates is not None:
+        profile.stats['duplicates'] = duplicates.result()
+    return profile
+
+
+def _count_duplicates(df, matrix, numeric_columns) -> int:
+    if len(numeric_columns) == len(df.columns):
+        hashes = RowFingerprints.hash_rows(matrix)
+        return int(len(hashes) - len(np.unique(hashes)))
+    return int(df.duplicated().sum())
+
+
+def profile_from_state(state: "ValidationState") -> DatasetProfile:
+    """Профиль датасета из аккумуляторов потоковой валидации."""
+    stats = state.stats
+    columns = stats.columns
+    numeric_columns = [col for col in columns if col not in state.non_numeric]
+    numeric_mask = np.array([col not in state.non_numeric for col in columns])
+    profile = DatasetProfile(columns, numeric_columns, state.fingerprints.rows, state.float32_columns)
+
+    quartiles = np.array([sketch.quantile([0.25, 0.75]) for sketch in stats.sketches])
+    iqr = quartiles[:, 1] - quartiles[:, 0]
+    outliers = np.array([
+        sketch.count_outside(q1 - 1.5 * spread, q3 + 1.5 * spread)
+        for sketch, (q1, q3), spread in zip(stats.sketches, quartiles, iqr)
+    ], dtype=np.int64)
+
+    def numeric(values):
+        return np.where(numeric_mask if np.ndim(values) == 1 else numeric_mask[:, None],
+                        values, np.nan)
+
+    profile.stats = {
+        # Для нечисловых колонок число пропусков в потоковом режиме неизвестно
+        'missing': np.where(numeric_mask, stats.missing, 0),
+        'mean': numeric(stats.column_mean),
+        'std': numeric(stats.std),
+        'min': numeric(stats.min),
+        'max': numeric(stats.max),
+        'quartiles': numeric(quartiles),
+        'outliers': np.where(numeric_mask, outliers, 0),
+        'duplicates': state.fingerprints.duplicates
+    }
+    return profile
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Дообучение (warm start) существующего леса вместо обучения с нуля.
+
+Родительская модель загружается из `warm_start.parent_model`, и
+средствами scikit-learn (`warm_start=True`) к ней добавляются только
+новые деревья: либо недостающие до увеличенного `n_estimators`, либо
+`extra_estimators` деревьев на изменившихся данных (новые деревья
+обучаются на текущей обучающей выборке, включающей новые строки).
+Если дообучение некорректно (другой класс модели, другие гиперпараметры
+деревьев, другой набор признаков), выполняется полное обучение.
+
+Строки, на которых обучены деревья родителя, не должны попасть в
+тестовую выборку, иначе метрики проверки порогов завышены. Поэтому
+строки родителя делятся так же, как при его обучении (разбиение
+`data_info.split` из его отчета), а дописанные строки — хешем значений
+(`out_of_core.holdout_mask`). Что данные родителя — неизмененное начало
+текущих, проверяется по md5 хешей строк; если данные изменены иначе или
+разбиение родителя неизвестно, выполняется полное обучение.
+"""
+
+import json
+from pathlib import Path
+
+from scripts.model_artifact import artifact_md5, load_model
+from scripts.out_of_core import rows_md5
+
+# Параметры, изменение которых не мешает дообучению
+_GROWTH_PARAMS = {'n_estimators', 'n_jobs', 'verbose', 'warm_start'}
+
+
+def compatibility_issue(parent, model, feature_names) -> str:
+    """
+    Причина, по которой дообучение невозможно, или None.
+
+    Args:
+        parent: Родительская модель
+        model: Необученная модель с целевыми параметрами
+        feature_names: Признаки текущей обучающей выборки
+    """
+    if type(parent) is not type(model):
+        return f"класс модели изменился: {type(parent).__name__} -> {type(model).__name__}"
+    if not hasattr(model, 'warm_start') or not hasattr(parent, 'estimators_'):
+        return f"{type(model).__name__} не поддерживает дообучение"
+
+    parent_params = parent.get_params()
+    for name, value in model.get_params().items():
+        if name not in _GROWTH_PARAMS and parent_params.get(name) != value:
+            return f"параметр {name} изменился: {parent_params.get(name)!r} -> {value!r}"
+
+    parent_features = list(getattr(parent, 'feature_names_in_', []))
+    if parent_features != list(feature_names):
+        return "набор признаков изменился"
+    return None
+
+
+def _parent_data_info(parent_report_path) -> dict:
+    path = Path(parent_report_path)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('data_info', {})
+
+
+def _parent_report_path(config: dict) -> str:
+    return (config.get('warm_start') or {}).get('parent_report', 'reports/training_report.json')
+
+
+def parent_split(X, y, config: dict, data_md5: str) -> tuple:
+    """
+    Разбиение текущих данных, при котором отложенная выборка родителя
+    не меняется.
+
+    Returns:
+        (число первых строк для `train_test_split` — остальные делятся
+        хешем, как в `train_model.split_data`; причина, по которой
+        разбиение родителя не восстанавливается, или None)
+    """
+    import pandas as pd
+
+    info = _parent_data_info(_parent_report_path(config))
+    split = info.get('split')
+    if split is None:
+        # Отчет без описания разбиения: разбиение совпадает, только если
+        # данные не изменились
+        if info and info.get('data_md5') == data_md5:
+            return None, None
+        return None, "разбиение родительской модели на выборки неизвестно"
+
+    if (split['test_size'], split['random_state']) != (
+        config['data']['test_size'], config['data']['random_state']
+    ):
+        return None, "параметры разбиения на выборки изменились"
+    parent_rows = int(info['train_size']) + int(info['test_size'])
+    if len(X) < parent_rows or rows_md5(
+        pd.concat([X.iloc[:parent_rows], y.iloc[:parent_rows]], axis=1)
+    ) != split['rows_md5']:
+        return None, "данные родительской модели изменены не только дописыванием строк"
+    return int(split['random_rows']), None
+
+
+def train_warm_start(X_train, y_train, config: dict, data_md5: str, split_issue: str = None) -> tuple:
+    """
+    Дообучение родительской модели или полное обучение при невозможности.
+
+    Args:
+        X_train, y_train: Обучающая выборка (разбиение из `parent_split`)
+        config: Конфигурация модели
+        data_md5: md5 файла данных
+        split_issue: Причина из `parent_split`, по которой отложенная
+            выборка родителя не восстановлена (тогда — полное обучение)
+
+    Returns:
+        (модель, описание происхождения для training_report.json)
+    """
+    from scripts.estimators import thread_budget
+    from scripts.train_model import build_model, train_model
+
+    ws_config = config.get('warm_start') or {}
+    parent_path = Path(ws_config.get('parent_model', 'models/model'))
+    extra_estimators = int(ws_config.get('extra_estimators', 0))
+    model = build_model(config)
+
+    lineage = {'mode': 'full', 'parent_model': str(parent_path)}
+    if not parent_path.exists():
+        lineage['fallback_reason'] = "родительская модель не найдена"
+        print(f"Дообучение невозможно: {lineage['fallback_reason']}")
+        return train_model(X_train, y_train, config), lineage
+
+    parent = load_model(parent_path)
+    lineage['parent_model_md5'] = artifact_md5(parent_path)
+
+    issue = compatibility_issue(parent, model, X_train.columns) or split_issue
+    if issue is not None:
+        lineage['fallback_reason'] = issue
+        print(f"Дообучение невозможно ({issue}), полное обучение")
+        return train_model(X_train, y_train, config), lineage
+
+    # Лес не уменьшается: уже выращенные деревья сохраняются
+    parent_trees = len(parent.estimators_)
+    target = max(model.n_estimators, parent_trees)
+    data_changed = _parent_data_info(_parent_report_path(config)).get('data_md5') != data_md5
+    if target == parent_trees and data_changed:
+        target += extra_estimators
+
+    print(f"Дообучение: {parent_trees} -> {target} деревьев")
+    parent.set_params(warm_start=True, n_estimators=target, n_jobs=model.n_jobs)
+    if target > parent_trees:
+        with thread_budget(parent, config['model'].get('n_jobs')):
+            parent.fit(X_train, y_train)
+    parent.set_params(warm_start=False)
+
+    lineage.update({
+        'mode': 'warm_start',
+        'parent_n_estimators': parent_trees,
+        'added_estimators': target - parent_trees,
+        'data_changed': data_changed
+    })
+    return parent, lineage
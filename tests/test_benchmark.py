@@ -0,0 +1,66 @@
+"""
+Тесты генератора синтетических данных и бенчмарка.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts import perf
+from scripts.benchmark import compare_results, measure, run_benchmark
+from scripts.dataset import load_dataframe
+from scripts.synthetic_data import fit_generator, write_dataset
+
+def test_synthetic_data_is_deterministic_and_schema_faithful(tmp_path):
+    """Синтетика воспроизводима, читается load_data и проходит валидацию."""
+    from scripts.validate_data import validate_dataframe
+    generator = fit_generator("data/housing.csv")
+
+    write_dataset(generator, tmp_path / "a.csv", 2000, seed=1)
+    write_dataset(generator, tmp_path / "b.csv", 2000, seed=1)
+    real = load_dataframe("data/housing.csv", use_cache=False)
+    synthetic = load_dataframe(tmp_path / "a.csv", use_cache=False)
+    report = validate_dataframe(synthetic)
+
+    assert (tmp_path / "a.csv").read_bytes() == (tmp_path / "b.csv").read_bytes()
+    assert len(synthetic) == 2000
+    assert all(report['checks'][name]['passed'] for name in ('shape', 'missing_values', 'target_range'))
+    assert set(synthetic['CHAS'].unique()) <= {0, 1}
+    assert (synthetic.min() >= real.min()).all() and (synthetic.max() <= real.max()).all()
+    assert synthetic.corr().loc['RM', 'MEDV'] == pytest.approx(real.corr().loc['RM', 'MEDV'], abs=0.1)
+
+def test_benchmark_and_regression_check(tmp_path):
+    """Бенчмарк пишет замеры по этапам; замедление сверх допуска — регрессия."""
+    config = {'benchmark': {'data_dir': str(tmp_path), 'sizes': [1000]}}
+
+    report = run_benchmark(config, "data/housing.csv", stages=['load', 'validate'])
+    slower = {'results': [dict(entry, seconds=entry['seconds'] * 3 + 1) for entry in report['results']]}
+    comparison = compare_results(slower, report, time_tolerance=0.25, memory_tolerance=0.25)
+
+    assert [entry['stage'] for entry in report['results']] == ['load', 'validate']
+    assert all(entry['rows'] == 1000 and entry['peak_memory_mb'] > 0 for entry in report['results'])
+    assert all(entry['regression'] for entry in comparison)
+    assert not any(entry['regression'] for entry in compare_results(report, report, 0.25, 0.25))
+
+@pytest.mark.skipif(not perf.reset_peak_rss(), reason="сброс пика RSS недоступен")
+def test_measure_sees_memory_outside_python():
+    """Пик RSS учитывает память вне аллокатора Python и сбрасывается между замерами."""
+    import mmap
+    size = 64 * 2 ** 20
+
+    def touch_anonymous_pages():
+        buffer = mmap.mmap(-1, size)
+        for offset in range(0, size, mmap.PAGESIZE):
+            buffer[offset] = 1
+        buffer.close()
+
+    _, _, baseline_mb = measure(lambda: None)
+    _, _, peak_mb = measure(touch_anonymous_pages)
+    _, _, after_mb = measure(lambda: None)
+    assert peak_mb - baseline_mb >= 60
+    assert after_mb < peak_mb - 60
@@ -0,0 +1,73 @@
+"""
+Тесты единой командной строки, предсказаний для файла и бюджета холодного старта.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.cli import COMMANDS, main, measure_import, startup_check
+from scripts.dataset import load_data
+from scripts.model_artifact import save_model
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "housing.csv"
+
+@pytest.fixture(scope="module")
+def saved_model(tmp_path_factory):
+    from sklearn.ensemble import RandomForestRegressor
+    X, y = load_data(str(DATA_PATH))
+    model = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+    path = tmp_path_factory.mktemp("model") / "model"
+    save_model(model, str(path))
+    return model, X, str(path)
+
+@pytest.mark.parametrize("module", ['scripts.cli', *(module for module, _ in COMMANDS.values())])
+def test_heavy_libraries_are_not_imported_eagerly(module):
+    _, loaded = measure_import(module, runs=1)
+    assert loaded == []
+
+def test_startup_check_reports_budget():
+    report = startup_check({'runs': 1, 'startup_budget_ms': 60000, 'import_budget_ms': 60000})
+    assert report['passed']
+    assert set(report['imports']) == {'scripts.cli', *(module for module, _ in COMMANDS.values())}
+
+    report = startup_check({'runs': 1, 'startup_budget_ms': 0})
+    assert not report['passed']
+
+@pytest.mark.parametrize("n_columns", [13, 14])
+def test_predict_command(saved_model, tmp_path, n_columns):
+    model, X, model_path = saved_model
+    rows = np.loadtxt(DATA_PATH, max_rows=30)[:, :n_columns]
+    input_path = tmp_path / "rows.txt"
+    output_path = tmp_path / "predictions.txt"
+    np.savetxt(input_path, rows)
+
+    main(['predict', str(input_path), '--model', model_path, '--output', str(output_path)])
+
+    predictions = np.loadtxt(output_path)
+    np.testing.assert_allclose(predictions, model.predict(X.iloc[:30]), rtol=1e-9)
+
+def test_predict_runs_as_script(saved_model, tmp_path):
+    import subprocess
+    model, X, model_path = saved_model
+    input_path = tmp_path / "rows.txt"
+    np.savetxt(input_path, np.loadtxt(DATA_PATH, max_rows=5)[:, :13])
+    script = Path(__file__).parent.parent / "scripts" / "predict.py"
+
+    result = subprocess.run(
+        [sys.executable, str(script), str(input_path), '--model', model_path],
+        cwd=script.parent.parent, capture_output=True, text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    np.testing.assert_allclose(np.array(result.stdout.split(), dtype=float), model.predict(X.iloc[:5]), rtol=1e-9)
+
+def test_unknown_command_fails():
+    with pytest.raises(SystemExit) as exc:
+        main(['deploy'])
+    assert exc.value.code == 2
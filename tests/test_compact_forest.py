@@ -0,0 +1,119 @@
+"""
+Тесты компактного экспорта модели и проверки отклонения предсказаний.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.compact_forest import compact_forest, load_compact, write_compact
+from scripts.dataset import load_data
+from scripts.export_model import export_model
+from scripts.model_artifact import save_model
+from scripts.packed_forest import load_predictor
+from scripts.train_model import load_config
+
+ROOT = Path(__file__).parent.parent
+
+@pytest.fixture(scope="module")
+def data():
+    return load_data(str(ROOT / "data" / "housing.csv"))
+
+@pytest.fixture(scope="module")
+def model(data):
+    X, y = data
+    return RandomForestRegressor(n_estimators=10, max_depth=8, random_state=0).fit(X, y)
+
+def compact_predictions(model, X, tmp_path, **settings):
+    arrays, stats = compact_forest(model, **settings)
+    write_compact(tmp_path, arrays, stats, model)
+    return load_compact(tmp_path).predict(X), stats
+
+def test_lossless_layout_matches_model(model, data, tmp_path):
+    X, _ = data
+    predictions, stats = compact_predictions(model, X, tmp_path)
+    # Пороги округлены вниз до float32, значения листьев — float32
+    np.testing.assert_allclose(predictions, model.predict(X), rtol=1e-6)
+    assert stats['nodes_after'] <= stats['nodes_before'] and stats['truncated_nodes'] == 0
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) < 0.3 * 72 * stats['nodes_before']
+
+def test_rounded_leaves_collapse_without_changing_predictions(model, data, tmp_path):
+    X, _ = data
+    predictions, stats = compact_predictions(model, X, tmp_path, leaf_decimals=0)
+
+    # Эталон: среднее по деревьям округленных значений листьев
+    expected = np.mean([
+        np.round(est.tree_.value[est.apply(X.to_numpy(dtype=np.float32)), 0, 0])
+        for est in model.estimators_
+    ], axis=0)
+    np.testing.assert_allclose(predictions, expected, rtol=1e-6)
+    assert stats['collapsed_nodes'] > 0
+
+def test_depth_truncation(model, data, tmp_path):
+    X, _ = data
+    predictions, stats = compact_predictions(model, X, tmp_path, max_depth=3)
+    assert stats['max_depth'] == 3 and stats['truncated_nodes'] > 0
+    assert stats['leaves_after'] <= 8 * stats['n_trees']
+    assert np.abs(predictions - model.predict(X)).mean() > 0
+
+def test_export_guard_refuses_drifting_model(model, data, tmp_path):
+    X, y = data
+    model_path = str(tmp_path / "model")
+    save_model(model, model_path)
+    config = load_config(ROOT / "config" / "model_config.yaml")
+    output = tmp_path / "model_compact"
+
+    config['export'] = {'output': str(output), 'max_depth': 2, 'max_abs_drift': 0.5}
+    report = export_model(model, model_path, X, y, config)
+    assert not report['published'] and not report['drift']['passed']
+    assert not output.exists() and not (tmp_path / "model_compact.tmp").exists()
+
+    config['export'] = {'output': str(output), 'leaf_decimals': 2}
+    report = export_model(model, model_path, X, y, config)
+    assert report['published'] and report['size']['ratio'] < 0.5
+    assert report['drift']['max_abs'] <= 0.005
+    assert report['metrics']['compact']['rmse'] == pytest.approx(report['metrics']['full']['rmse'], abs=1e-3)
+
+    predictor = load_predictor(model, model_path, {'engine': 'compact', 'compact_path': str(output)})
+    np.testing.assert_allclose(predictor.predict(X), model.predict(X), atol=0.005)
+
+    # Компактная модель другой модели не подменяет текущую
+    save_model(RandomForestRegressor(n_estimators=2, random_state=1).fit(X, y), model_path)
+    with pytest.raises(ValueError):
+        load_predictor(model, model_path, {'engine': 'compact', 'compact_path': str(output)})
+
+def test_export_skips_non_forest_model(model, data, tmp_path):
+    """Модель без деревьев не экспортируется, но этап оставляет отчет и выход."""
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    X, y = data
+    model_path = str(tmp_path / "model")
+    boosting = HistGradientBoostingRegressor(max_iter=10).fit(X, y)
+    save_model(boosting, model_path)
+    config = load_config(ROOT / "config" / "model_config.yaml")
+    output = tmp_path / "model_compact"
+    config['export'] = {'output': str(output)}
+
+    report = export_model(boosting, model_path, X, y, config)
+    assert report['skipped'] and not report['published']
+    assert 'HistGradientBoostingRegressor' in report['reason']
+    assert [p.name for p in output.iterdir()] == ["meta.json"]
+    with pytest.raises(ValueError):
+        load_predictor(boosting, model_path, {'engine': 'compact', 'compact_path': str(output)})
+
+def test_inference_artifact_must_match_engine(model, data, tmp_path):
+    """inference.artifact (зависимость этапа в dvc.yaml) сверяется с движком."""
+    from scripts.evaluate_model import run_evaluation
+    X, y = data
+    model_path = str(tmp_path / "model")
+    save_model(model, model_path)
+
+    with pytest.raises(ValueError, match="inference.artifact"):
+        run_evaluation(model, X, y, model_path,
+                       {'engine': 'compact', 'compact_path': str(tmp_path / "model_compact"),
+                        'artifact': model_path}, plots=False)
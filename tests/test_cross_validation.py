@@ -0,0 +1,66 @@
+"""
+Тесты повторной k-блочной кросс-валидации и проверки порогов по ней.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.cross_validation import aggregate, cross_validate, fold_assignments, gate_metrics
+from scripts.dataset import load_data
+
+ROOT = Path(__file__).parent.parent
+
+@pytest.fixture(scope="module")
+def data():
+    return load_data(str(ROOT / "data" / "housing.csv"))
+
+@pytest.fixture(scope="module")
+def config():
+    with open(ROOT / "config" / "model_config.yaml", 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    config['model']['params'] = dict(config['model']['params'], n_estimators=10)
+    return config
+
+def test_fold_assignments_cover_every_row_once_per_repeat():
+    folds = fold_assignments(506, k=5, repeats=3, random_state=0)
+    assert folds.shape == (3, 506)
+    for repeat in folds:
+        sizes = np.bincount(repeat, minlength=5)
+        assert sizes.sum() == 506 and sizes.max() - sizes.min() <= 1
+    assert not np.array_equal(folds[0], folds[1])
+    assert np.array_equal(folds, fold_assignments(506, k=5, repeats=3, random_state=0))
+
+def test_pool_matches_single_worker(data, config):
+    X, y = data
+    settings = {'k': 3, 'repeats': 2, 'random_state': 1}
+    single = cross_validate(X, y, dict(config, cross_validation=dict(settings, n_workers=1)))
+    pooled = cross_validate(X, y, dict(config, cross_validation=dict(settings, n_workers=2)))
+    assert single == pooled
+    assert len(single['folds']) == 6
+    assert sum(entry['test_size'] for entry in single['folds']) == 2 * len(X)
+
+def test_lower_bound_gate_is_pessimistic(data, config):
+    X, y = data
+    report = cross_validate(X, y, dict(config, cross_validation={'k': 3, 'repeats': 1, 'n_workers': 1}))
+    summary = report['aggregate']
+    assert report['gate'] == 'lower_bound'
+    assert report['gate_metrics']['r2'] == summary['r2']['ci_low'] < summary['r2']['mean']
+    assert report['gate_metrics']['rmse'] == summary['rmse']['ci_high'] > summary['rmse']['mean']
+    assert gate_metrics(summary, 'mean')['rmse'] == summary['rmse']['mean']
+    assert gate_metrics(summary, 'holdout') is None
+    with pytest.raises(ValueError):
+        gate_metrics(summary, 'median')
+
+def test_corrected_interval_is_wider_than_naive():
+    folds = [{'metrics': {'rmse': value}} for value in (3.0, 3.5, 2.8, 3.2, 3.1)]
+    summary = aggregate(folds, k=5, confidence=0.95)['rmse']
+    from scipy import stats
+    naive = stats.t.ppf(0.975, 4) * summary['std'] / np.sqrt(5)
+    assert summary['ci_high'] - summary['mean'] > naive
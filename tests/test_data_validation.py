@@ -49,3 +49,121 @@ def test_data_validation_checks(tmp_path):
     # Проверка типов данных
     assert "data_types" in result["checks"]
 
+
+def test_streaming_validation_matches_in_memory(tmp_path):
+    """Потоковый режим дает тот же отчет, что и загрузка целиком."""
+    data_path = "data/housing.csv"
+    
+    full = validate_data(data_path, str(tmp_path / "full.json"))
+    streamed = validate_data(data_path, str(tmp_path / "streamed.json"), chunksize=64)
+    
+    assert streamed["status"] == full["status"]
+    assert streamed["checks"].keys() == full["checks"].keys()
+    assert streamed["checks"]["shape"] == full["checks"]["shape"]
+    assert streamed["checks"]["duplicates"] == full["checks"]["duplicates"]
+    assert streamed["checks"]["outliers"] == full["checks"]["outliers"]
+    for stat, values in full["summary"]["statistics"].items():
+        assert streamed["summary"]["statistics"][stat] == pytest.approx(values)
+
+def test_incremental_validation_processes_appended_rows(tmp_path):
+    """Инкрементальная валидация дописанного файла совпадает с полной."""
+    lines = Path("data/housing.csv").read_text().splitlines(keepends=True)
+    data_path = tmp_path / "housing.csv"
+    output_path = str(tmp_path / "report.json")
+    
+    data_path.write_text("".join(lines[:300]))
+    validate_data(str(data_path), output_path, incremental=True)
+    
+    with open(data_path, 'a') as f:
+        f.writelines(lines[300:] + lines[:2])
+    incremental = validate_data(str(data_path), output_path, incremental=True)
+    full = validate_data(str(data_path), str(tmp_path / "full.json"))
+    
+    assert incremental["checks"]["shape"]["rows"] == len(lines) + 2
+    assert incremental["checks"]["duplicates"] == full["checks"]["duplicates"]
+    assert incremental["checks"]["outliers"] == full["checks"]["outliers"]
+    for stat, values in full["summary"]["statistics"].items():
+        assert incremental["summary"]["statistics"][stat] == pytest.approx(values)
+
+def test_incremental_validation_detects_edited_prefix(tmp_path, capsys, monkeypatch):
+    """Правка строки в уже проверенной части файла ведет к полной валидации."""
+    # Мелкие блоки: префикс из многих блоков, правка не в первом и не в последнем
+    monkeypatch.setattr("scripts.dataset._HASH_BLOCK_SIZE", 1024)
+    lines = Path("data/housing.csv").read_text().splitlines(keepends=True)
+    data_path = tmp_path / "housing.csv"
+    output_path = str(tmp_path / "report.json")
+    
+    data_path.write_text("".join(lines[:300]))
+    validate_data(str(data_path), output_path, incremental=True)
+    with open(data_path, 'a') as f:
+        f.writelines(lines[300:400])
+    validate_data(str(data_path), output_path, incremental=True)
+    assert "Инкрементальная валидация" in capsys.readouterr().out
+    
+    # Та же длина файла, изменено значение в середине префикса
+    edited = lines[150].replace("1.65660", "9.65660")
+    assert edited != lines[150]
+    data_path.write_text("".join(lines[:150] + [edited] + lines[151:400]))
+    incremental = validate_data(str(data_path), output_path, incremental=True)
+    full = validate_data(str(data_path), str(tmp_path / "full.json"))
+    
+    assert "полная валидация" in capsys.readouterr().out
+    for stat, values in full["summary"]["statistics"].items():
+        assert incremental["summary"]["statistics"][stat] == pytest.approx(values)
+
+def test_custom_check_uses_shared_profile(tmp_path):
+    """Собственная проверка из реестра попадает в отчет в нативных типах."""
+    from scripts.validation_checks import CHECKS, register_check
+    
+    @register_check("rm_range", requires=("min", "max"))
+    def check_rm_range(profile):
+        rm_min = profile.by_column("min")["RM"]
+        rm_max = profile.by_column("max")["RM"]
+        return {"passed": 3 <= rm_min and rm_max <= 9, "min": rm_min, "max": rm_max}
+    
+    try:
+        result = validate_data(
+            "data/housing.csv", str(tmp_path / "report.json"),
+            checks=["shape", "rm_range"]
+        )
+    finally:
+        CHECKS.pop("rm_range")
+    
+    assert set(result["checks"]) == {"shape", "rm_range"}
+    assert type(result["checks"]["rm_range"]["min"]) is float
+    assert result["checks"]["rm_range"]["passed"]
+
+def test_schema_ranges_and_types(tmp_path):
+    """Выход за диапазон схемы — предупреждение, нарушение типа — ошибка загрузки."""
+    lines = Path("data/housing.csv").read_text().splitlines()[:50]
+    tokens = lines[0].split()
+    tokens[4] = "1.5"  # NOX > 1
+    data_path = tmp_path / "housing.csv"
+    data_path.write_text("\n".join([" ".join(tokens)] + lines[1:]) + "\n")
+    
+    result = validate_data(str(data_path), str(tmp_path / "report.json"))
+    assert result["status"] == "warning"
+    assert list(result["checks"]["value_ranges"]["violations"]) == ["NOX"]
+    
+    tokens[3] = "0.5"  # CHAS: int8
+    data_path.write_text("\n".join([" ".join(tokens)] + lines[1:]) + "\n")
+    for chunksize in (None, 16):
+        result = validate_data(str(data_path), str(tmp_path / "report.json"), chunksize=chunksize)
+        assert result["status"] == "error"
+        assert "CHAS" in result["message"]
+
+def test_summary_keeps_source_precision_for_float32_columns(tmp_path):
+    """min/max колонок float32 в отчете совпадают с записью в файле данных."""
+    import numpy as np
+    from scripts.dataset import COLUMN_NAMES
+    data_path = "data/housing.csv"
+    source = np.loadtxt(data_path)
+    expected_min = dict(zip(COLUMN_NAMES, source.min(axis=0).tolist()))
+    expected_max = dict(zip(COLUMN_NAMES, source.max(axis=0).tolist()))
+
+    full = validate_data(data_path, str(tmp_path / "full.json"))
+    streamed = validate_data(data_path, str(tmp_path / "streamed.json"), chunksize=64, incremental=True)
+
+    for result in (full, streamed):
+        assert result["summary"]["statistics"]["min"] == expected_min
+        assert result["summary"]["statistics"]["max"] == expected_max
@@ -0,0 +1,85 @@
+"""
+Тесты общего загрузчика данных и бинарного кеша.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.dataset import (
+    COLUMN_NAMES, Schema, SchemaError, default_schema, load_dataframe, read_csv_text
+)
+
+ROWS = [
+    "0.00632 18.00 2.310 0 0.5380 6.5750 65.20 4.0900 1 296.0 15.30 396.90 4.98 24.00",
+    "0.02731 0.00 7.070 0 0.4690 6.4210 78.90 4.9671 2 242.0 17.80 396.90 9.14 21.60",
+    "0.02729 0.00 7.070 0 0.4690 7.1850 61.10 4.9671 2 242.0 17.80 392.83 4.03 34.70",
+]
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "housing.csv"
+    path.write_text("\n".join(ROWS) + "\n")
+    return path
+
+def test_cache_matches_text_parse(data_file, tmp_path):
+    """Данные из кеша совпадают с разбором текста, включая типы колонок."""
+    cache_dir = tmp_path / "cache"
+    expected = read_csv_text(data_file)
+
+    first = load_dataframe(str(data_file), cache_dir=cache_dir)
+    second = load_dataframe(str(data_file), cache_dir=cache_dir)
+
+    assert list(first.columns) == COLUMN_NAMES
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second, expected)
+    assert len(list(cache_dir.glob("*/meta.json"))) == 1
+
+def test_cache_invalidated_on_change(data_file, tmp_path):
+    """Новая версия файла получает новый ключ кеша."""
+    cache_dir = tmp_path / "cache"
+    load_dataframe(str(data_file), cache_dir=cache_dir)
+
+    data_file.write_text("\n".join(ROWS[:2]) + "\n")
+    df = load_dataframe(str(data_file), cache_dir=cache_dir)
+
+    assert len(df) == 2
+    assert len(list(cache_dir.glob("*/meta.json"))) == 2
+
+def test_schema_dtypes_and_memory(data_file, tmp_path):
+    """Колонки загружаются в типах схемы, память примерно вдвое меньше float64."""
+    df = load_dataframe(str(data_file), cache_dir=tmp_path / "cache")
+    schema = default_schema()
+
+    assert {col: str(dtype) for col, dtype in df.dtypes.items()} == \
+        {col: schema.specs[col]['dtype'] for col in COLUMN_NAMES}
+    assert df.memory_usage(index=False).sum() <= 0.55 * 8 * len(COLUMN_NAMES) * len(df)
+
+@pytest.mark.parametrize("column, value", [("CHAS", "0.5"), ("RAD", "300"), ("CRIM", "abc")])
+def test_type_violation_fails_fast(data_file, tmp_path, column, value):
+    """Значения, не представимые в типе схемы, — ошибка загрузки."""
+    tokens = ROWS[1].split()
+    tokens[COLUMN_NAMES.index(column)] = value
+    data_file.write_text("\n".join([ROWS[0], " ".join(tokens)]) + "\n")
+
+    with pytest.raises(SchemaError, match=column):
+        load_dataframe(str(data_file), cache_dir=tmp_path / "cache")
+    with pytest.raises(SchemaError, match=column):
+        read_csv_text(data_file)
+
+def test_schema_from_config():
+    schema = Schema.from_config({'schema': {'columns': [
+        {'name': 'a', 'dtype': 'float32'}, {'name': 'y', 'dtype': 'float64', 'role': 'target', 'min': 0}
+    ]}})
+    assert schema.features == ['a'] and schema.target == 'y'
+    assert schema.ranges() == {'y': (0, None)}
+
+    with pytest.raises(SchemaError):
+        Schema([{'name': 'a', 'dtype': 'category', 'role': 'target'}])
+    with pytest.raises(SchemaError):
+        Schema([{'name': 'a', 'dtype': 'float32'}])
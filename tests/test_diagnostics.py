@@ -0,0 +1,108 @@
+"""
+Тесты гистограмм остатков и графика диагностики.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.dataset import load_data
+from scripts.diagnostics import DiagnosticsHistogram, axis_ranges, build_histogram, main, render
+from scripts.evaluate_model import evaluate_chunks, iter_frame_chunks, run_evaluation
+
+ROOT = Path(__file__).parent.parent
+
+@pytest.fixture(scope="module")
+def data():
+    return load_data(str(ROOT / "data" / "housing.csv"))
+
+@pytest.fixture(scope="module")
+def model(data):
+    X, y = data
+    return RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+
+def empty_histogram(X, y, **settings):
+    columns = list(X.columns) + [y.name]
+    ranges = axis_ranges(columns, chunks=[X.assign(**{y.name: y})])
+    return build_histogram(list(X.columns), y.name, ranges, settings)
+
+def test_bins_match_numpy_histogram(data, model):
+    X, y = data
+    hist = empty_histogram(X, y, bins=16, residual_bins=32)
+    predictions = model.predict(X)
+    hist.update(X, y, predictions)
+    edges = hist.edges()
+
+    expected, _, _ = np.histogram2d(y, predictions, bins=[edges['target'], edges['target']])
+    np.testing.assert_array_equal(hist.actual_predicted, expected)
+    residual = y.to_numpy() - predictions
+    expected, _, _ = np.histogram2d(X['LSTAT'], residual, bins=[edges['features'][12], edges['residual']])
+    np.testing.assert_array_equal(hist.residual_feature[12], expected)
+    assert hist.count == len(X) and hist.residual_distribution().sum() == len(X)
+    assert hist.clipped['residual'] == 0 and not hist.clipped['features'].any()
+
+def test_independent_of_chunks_and_workers(data, model):
+    X, y = data
+    results = []
+    for chunksize, n_workers in [(len(X), 1), (37, 1), (100, 3)]:
+        hist = empty_histogram(X, y)
+        evaluate_chunks(model, iter_frame_chunks(X, y, chunksize), n_workers, hist)
+        results.append(hist)
+    for hist in results[1:]:
+        for name in DiagnosticsHistogram.COUNTS:
+            np.testing.assert_array_equal(getattr(hist, name), getattr(results[0], name))
+
+def test_out_of_range_values_go_to_edge_bins(data):
+    X, y = data
+    hist = empty_histogram(X, y, residual_range=1.0)
+    shifted = X.iloc[:10] + X.max() - X.min() + 1
+    hist.update(shifted, y.iloc[:10] + 100, y.iloc[:10])
+    assert hist.clipped['actual'] == hist.clipped['residual'] == 10 and hist.clipped['predicted'] == 0
+    assert (hist.clipped['features'] == 10).all()
+    assert hist.actual_predicted[-1].sum() == 10 and hist.residual_predicted[:, -1].sum() == 10
+    assert (hist.residual_feature[:, -1, -1] == 10).all()
+
+    other = build_histogram(list(X.columns), y.name, axis_ranges(
+        list(X.columns) + [y.name], chunks=[X.assign(**{y.name: y})]
+    ), {'bins': 8})
+    with pytest.raises(ValueError):
+        hist.merge(other)
+
+def test_render_size_independent_of_rows(data, tmp_path):
+    X, y = data
+    rng = np.random.default_rng(0)
+    sizes = {}
+    for n_rows in (1000, 500000):
+        rows = rng.integers(0, len(X), n_rows)
+        X_rows = X.iloc[rows].reset_index(drop=True)
+        y_rows = y.iloc[rows].reset_index(drop=True)
+        hist = empty_histogram(X, y)
+        hist.update(X_rows, y_rows, y_rows + rng.normal(0, 2, n_rows))
+        hist.save(tmp_path / f"{n_rows}.npz")
+        render(hist, tmp_path / f"{n_rows}.png")
+        sizes[n_rows] = ((tmp_path / f"{n_rows}.npz").stat().st_size, (tmp_path / f"{n_rows}.png").stat().st_size)
+    # Размер гистограмм и графика ограничен числом ячеек, а не строк
+    cells_bytes = sum(getattr(hist, name).nbytes for name in DiagnosticsHistogram.COUNTS)
+    assert sizes[1000][0] < sizes[500000][0] < cells_bytes / 10
+    assert sizes[500000][1] < 1.5 * sizes[1000][1]
+
+def test_evaluation_saves_histograms_for_rerender(data, model, tmp_path, monkeypatch):
+    X, y = data
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "model_config.yaml").write_text("diagnostics:\n  bins: 32\n")
+    run_evaluation(model, X, y, "models/model", {}, plots=False, diagnostics_config={'bins': 32})
+
+    hist = DiagnosticsHistogram.load("reports/diagnostics.npz")
+    assert hist.count == len(X) and hist.actual_predicted.shape == (32, 32)
+    assert hist.feature_names == list(X.columns) and hist.target == y.name
+    assert hist.feature_range[5].tolist() == [X['RM'].min(), X['RM'].max()]
+
+    main([])
+    assert Path("reports/diagnostics.png").stat().st_size > 0
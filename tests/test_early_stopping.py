@@ -0,0 +1,55 @@
+"""
+Тесты ранней остановки по OOB-ошибке.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.early_stopping import train_early_stopping
+
+@pytest.fixture
+def training_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 4)), columns=['a', 'b', 'c', 'd'])
+    y = X['a'] * 3 - X['b'] + rng.normal(scale=0.5, size=300)
+    return X, y
+
+def make_config(**early_stopping):
+    return {
+        'model': {'name': 'RandomForestRegressor',
+                  'params': {'n_estimators': 100, 'max_depth': 6, 'random_state': 0}},
+        'thresholds': {'min_r2': 0.5, 'max_rmse': 5.0},
+        'early_stopping': dict({'batch_size': 10, 'max_estimators': 60}, **early_stopping)
+    }
+
+def test_incremental_oob_matches_sklearn(training_data):
+    """Инкрементальная OOB-ошибка совпадает с oob_prediction_ scikit-learn."""
+    from sklearn.ensemble import RandomForestRegressor
+    X, y = training_data
+
+    model, report = train_early_stopping(X, y, make_config(tol=-1.0, comfortable_cap=1000))
+    reference = RandomForestRegressor(
+        n_estimators=report['n_estimators'], max_depth=6, random_state=0, oob_score=True
+    ).fit(X, y)
+    expected_rmse = np.sqrt(np.mean((y - reference.oob_prediction_) ** 2))
+
+    assert report['stop_reason'] == 'max_estimators'
+    assert report['n_estimators'] == 60
+    assert [point['n_estimators'] for point in report['curve']] == [10, 20, 30, 40, 50, 60]
+    assert report['curve'][-1]['oob_rmse'] == pytest.approx(expected_rmse)
+
+def test_stops_when_thresholds_comfortably_met(training_data):
+    """При выполненных с запасом порогах рост леса ограничен comfortable_cap."""
+    X, y = training_data
+
+    model, report = train_early_stopping(X, y, make_config(tol=-1.0, comfortable_cap=20))
+
+    assert report['stop_reason'] == 'thresholds_met'
+    assert len(model.estimators_) == 20
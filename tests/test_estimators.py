@@ -0,0 +1,55 @@
+"""
+Тесты реестра моделей и бюджета потоков.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).parent.parent
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(ROOT))
+
+from scripts.dataset import load_data
+from scripts.estimators import ESTIMATORS, build_estimator, resolve_n_jobs, thread_budget
+
+def test_registry_and_thread_budget():
+    with pytest.raises(ValueError, match="Неизвестная модель"):
+        build_estimator("LinearRegression")
+
+    # n_jobs передается только моделям с таким параметром
+    hgb = build_estimator("HistGradientBoostingRegressor", {'max_iter': 5, 'n_jobs': 2})
+    forest = build_estimator("ExtraTreesRegressor", {'n_estimators': 5})
+    assert 'n_jobs' not in hgb.get_params()
+
+    with thread_budget(forest, -1) as n_threads:
+        assert forest.n_jobs == n_threads == resolve_n_jobs(-1)
+    assert forest.n_jobs is None
+    assert resolve_n_jobs(None) == 1
+
+@pytest.mark.parametrize("name", sorted(ESTIMATORS))
+def test_pipeline_runs_for_every_backend(name, tmp_path, monkeypatch):
+    """Обучение и оценка (включая график важности) работают для каждой модели."""
+    from scripts.evaluate_model import run_evaluation
+    from scripts.train_model import parse_args, run_training
+
+    with open(ROOT / "config" / "model_config.yaml", encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    params = {'max_iter': 20, 'random_state': 0} if name == "HistGradientBoostingRegressor" \
+        else {'n_estimators': 10, 'random_state': 0}
+    config['model'] = {'name': name, 'n_jobs': -1, 'params': params}
+    config['training_cache']['enabled'] = False
+    X, y = load_data(ROOT / "data" / "housing.csv")
+    monkeypatch.chdir(tmp_path)
+
+    model, report = run_training(parse_args([]), config, X, y, "md5")
+    evaluation = run_evaluation(model, X, y, "models/model", {'engine': 'packed'})
+
+    assert type(model).__name__ == name
+    assert report['quality_check']['passed']
+    assert evaluation['metrics']['r2'] > 0.7
+    assert Path("reports/feature_importance.png").stat().st_size > 0
+    assert ('fingerprint' in report) == (name != "HistGradientBoostingRegressor")
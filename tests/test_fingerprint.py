@@ -0,0 +1,54 @@
+"""
+Тесты отпечатка модели и проверки воспроизводимости по выборке деревьев.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import train_test_split
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.dataset import load_data
+from scripts.fingerprint import forest_fingerprint, verify_trees
+from scripts.model_artifact import load_model, save_model
+
+@pytest.fixture(scope="module")
+def split():
+    X, y = load_data(Path(__file__).parent.parent / "data" / "housing.csv")
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+    return X_train, y_train
+
+def fit_forest(X_train, y_train, **params):
+    params = dict({'n_estimators': 12, 'max_depth': 8, 'random_state': 42}, **params)
+    return RandomForestRegressor(**params).fit(X_train, y_train)
+
+def test_fingerprint_is_stable_and_seed_sensitive(split, tmp_path):
+    model = fit_forest(*split)
+    fingerprint = forest_fingerprint(model)
+
+    save_model(model, tmp_path / "model")
+    assert forest_fingerprint(load_model(tmp_path / "model")) == fingerprint
+    assert forest_fingerprint(fit_forest(*split))['forest'] == fingerprint['forest']
+    assert forest_fingerprint(fit_forest(*split, random_state=0))['forest'] != fingerprint['forest']
+
+@pytest.mark.parametrize("params", [{}, {'max_samples': 0.5, 'max_features': 0.5}, {'bootstrap': False}])
+def test_sampled_trees_retrain_bit_identical(split, params):
+    model = fit_forest(*split, **params)
+    result = verify_trees(model, forest_fingerprint(model), *split, n_trees=4)
+
+    assert result['passed']
+    assert len(result['checked_trees']) == 4
+
+def test_verify_detects_modified_tree(split):
+    model = fit_forest(*split)
+    fingerprint = forest_fingerprint(model)
+    model.estimators_[3].tree_.value[-1, 0, 0] += 1e-12
+    tampered = forest_fingerprint(model)
+
+    assert tampered['forest'] != fingerprint['forest']
+    result = verify_trees(model, tampered, *split, n_trees=len(model.estimators_))
+    assert result['mismatched_trees'] == [3]
@@ -0,0 +1,54 @@
+"""
+Тесты формата артефакта модели.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.model_artifact import artifact_md5, load_model, open_forest_arrays, save_model
+
+@pytest.fixture
+def training_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, 3)), columns=['a', 'b', 'c'])
+    y = X['a'] * 2 + rng.normal(size=200)
+    return X, y
+
+@pytest.mark.parametrize("estimator", ["RandomForestRegressor", "ExtraTreesRegressor"])
+def test_forest_round_trip(tmp_path, training_data, estimator):
+    """Лес восстанавливается из отображенных в память массивов без потерь."""
+    import sklearn.ensemble
+    X, y = training_data
+    model = getattr(sklearn.ensemble, estimator)(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+
+    save_model(model, tmp_path / "model")
+    loaded = load_model(tmp_path / "model")
+    _, nodes, values = open_forest_arrays(tmp_path / "model")
+
+    assert type(loaded) is type(model)
+    assert isinstance(nodes, np.memmap) and isinstance(values, np.memmap)
+    assert list(loaded.feature_names_in_) == ['a', 'b', 'c']
+    assert [est.random_state for est in loaded.estimators_] == \
+        [est.random_state for est in model.estimators_]
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+    np.testing.assert_array_equal(loaded.feature_importances_, model.feature_importances_)
+
+def test_non_forest_model_and_md5(tmp_path, training_data):
+    """Модели без деревьев сохраняются через pickle; md5 не зависит от перезаписи."""
+    from sklearn.linear_model import LinearRegression
+    X, y = training_data
+    model = LinearRegression().fit(X, y)
+
+    save_model(model, tmp_path / "model")
+    first_md5 = artifact_md5(tmp_path / "model")
+    save_model(model, tmp_path / "model")
+
+    assert artifact_md5(tmp_path / "model") == first_md5
+    np.testing.assert_allclose(load_model(tmp_path / "model").predict(X), model.predict(X))
@@ -0,0 +1,85 @@
+"""
+Тесты кеша результатов обучения.
+"""
+
+import pytest
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts import train_model
+from scripts.dataset import load_data
+from scripts.model_cache import ModelCache, cache_key, code_modules
+from scripts.train_model import load_config, parse_args, run_training
+
+ROOT = Path(__file__).parent.parent
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    config = load_config(ROOT / "config" / "model_config.yaml")
+    config['model']['params']['n_estimators'] = 10
+    config['training_cache'] = {'enabled': True, 'dir': str(tmp_path / "cache"), 'max_size_mb': 64}
+    monkeypatch.chdir(tmp_path)
+    return config
+
+def test_cache_hit_restores_outputs_without_fitting(config, monkeypatch):
+    """Повторный запуск восстанавливает модель, метрики и отчет без обучения."""
+    X, y = load_data(ROOT / "data" / "housing.csv")
+    model, report = run_training(parse_args([]), config, X, y, "md5")
+    metrics_bytes = Path("models/metrics.json").read_bytes()
+    Path("models/metrics.json").unlink()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("модель не должна обучаться при попадании в кеш")
+
+    monkeypatch.setattr(train_model, 'train_model', fail)
+    cached_model, cached_report = run_training(parse_args([]), config, X, y, "md5")
+
+    assert cached_report == report
+    assert Path("models/metrics.json").read_bytes() == metrics_bytes
+    np.testing.assert_array_equal(cached_model.predict(X), model.predict(X))
+
+    # Другие данные или --no-cache — обучение
+    with pytest.raises(AssertionError):
+        run_training(parse_args([]), config, X, y, "other-md5")
+    with pytest.raises(AssertionError):
+        run_training(parse_args(["--no-cache"]), config, X, y, "md5")
+
+def test_cache_key_depends_on_model_params(config):
+    key = cache_key("md5", config, 'default')
+    assert cache_key("md5", json.loads(json.dumps(config)), 'default') == key
+
+    changed = json.loads(json.dumps(config))
+    changed['model']['params']['max_depth'] = 3
+    assert cache_key("md5", changed, 'default') != key
+    assert cache_key("md5", config, 'early_stopping') != key
+
+def test_code_version_covers_transitive_imports():
+    """Версия кода включает модули, которые train_model импортирует косвенно."""
+    modules = code_modules()
+    # packed_forest — через model_artifact, validation_stats — через out_of_core
+    assert {"train_model.py", "model_artifact.py", "packed_forest.py",
+            "out_of_core.py", "validation_stats.py", "warm_start.py"} <= set(modules)
+    assert "evaluate_model.py" not in modules
+
+def test_lru_eviction(tmp_path, monkeypatch):
+    """При превышении лимита удаляются давно не использованные записи."""
+    monkeypatch.chdir(tmp_path)
+    cache = ModelCache(tmp_path / "cache", max_size_mb=2.5)
+    for key in ('a', 'b'):
+        Path("out.bin").write_bytes(os.urandom(2 ** 20))
+        cache.store(key, ["out.bin"])
+    assert cache.restore('a', ["out.bin"])
+
+    Path("out.bin").write_bytes(os.urandom(2 ** 20))
+    cache.store('c', ["out.bin"])
+
+    assert not cache.restore('b', ["out.bin"])
+    assert cache.restore('a', ["out.bin"])
+    assert cache.restore('c', ["out.bin"])
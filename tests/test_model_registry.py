@@ -0,0 +1,103 @@
+"""
+Тесты реестра моделей в SQLite.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts import perf
+from scripts.dataset import load_data
+from scripts.evaluate_model import run_evaluation
+from scripts.model_registry import ModelRegistry, main
+from scripts.train_model import load_config, parse_args, run_training
+
+ROOT = Path(__file__).parent.parent
+
+@pytest.fixture
+def registry(tmp_path):
+    with ModelRegistry(tmp_path / "registry.sqlite") as registry:
+        yield registry
+
+def add_run(registry, model_md5, rmse, r2, data_md5="data-a", passed=True):
+    return registry.record(
+        'train', model_md5, "models/model", {'rmse': rmse, 'mae': rmse / 2, 'r2': r2},
+        data_md5=data_md5, config_md5=f"config-{model_md5}", quality_passed=passed
+    )
+
+def test_best_latest_and_filters(registry):
+    first = add_run(registry, "m1", rmse=3.0, r2=0.85)
+    second = add_run(registry, "m2", rmse=2.5, r2=0.80)
+    add_run(registry, "m3", rmse=1.0, r2=0.99, passed=False)
+    add_run(registry, "m4", rmse=2.0, r2=0.90, data_md5="data-b")
+
+    assert registry.best('rmse', data_md5="data-a")['id'] == second
+    assert registry.best('r2', data_md5="data-a")['id'] == first
+    assert registry.best('rmse', data_md5="data-a", passed_only=False)['model_md5'] == "m3"
+    assert registry.best('rmse')['model_md5'] == "m4"
+    assert registry.latest()['model_md5'] == "m4"
+    assert registry.latest(data_md5="data-a")['model_md5'] == "m3"
+    assert registry.best('rmse', data_md5="data-c") is None
+    with pytest.raises(ValueError):
+        registry.best('mape')
+
+def test_promote_and_compare_with_champion(registry):
+    champion = add_run(registry, "m1", rmse=3.0, r2=0.85)
+    failed = add_run(registry, "m2", rmse=3.5, r2=0.70, passed=False)
+    assert registry.compare()['champion'] is None
+
+    registry.promote(champion, note="первый релиз")
+    with pytest.raises(ValueError):
+        registry.promote(failed)
+    assert registry.champion()['id'] == champion
+
+    result = registry.compare()
+    assert result['run']['id'] == failed and result['same_data']
+    assert result['deltas']['rmse']['delta'] == pytest.approx(0.5)
+    assert not result['deltas']['rmse']['better'] and not result['deltas']['r2']['better']
+
+    better = add_run(registry, "m3", rmse=2.0, r2=0.9)
+    assert registry.compare(better)['deltas']['r2']['better']
+    registry.promote(better)
+    assert registry.champion()['model_md5'] == "m3"
+
+def test_cli_queries(registry, capsys):
+    path = str(registry.path)
+    add_run(registry, "m1", rmse=3.0, r2=0.85)
+    add_run(registry, "m2", rmse=3.5, r2=0.80)
+
+    main(['--registry', path, 'promote', '1'])
+    main(['--registry', path, 'list'])
+    assert "№2" in capsys.readouterr().out
+
+    with pytest.raises(SystemExit) as exc:
+        main(['--registry', path, 'compare', '--fail-if-worse'])
+    assert exc.value.code == 1
+    main(['--registry', path, 'compare', '--run', '1', '--fail-if-worse'])
+
+def test_training_and_evaluation_are_recorded(tmp_path, monkeypatch):
+    config = load_config(ROOT / "config" / "model_config.yaml")
+    config['model']['params']['n_estimators'] = 10
+    config['training_cache'] = {'enabled': False}
+    config['registry'] = {'enabled': True, 'path': str(tmp_path / "registry.sqlite")}
+    X, y = load_data(ROOT / "data" / "housing.csv")
+    monkeypatch.chdir(tmp_path)
+
+    with perf.stage("train_model", output_dir=tmp_path):
+        model, report = run_training(parse_args([]), config, X, y, "md5")
+    evaluation = run_evaluation(model, X, y, "models/model", {}, plots=False,
+                                registry_config=config['registry'])
+
+    with ModelRegistry(config['registry']['path']) as registry:
+        train, evaluate = reversed(registry.runs())
+    assert train['stage'] == 'train' and evaluate['stage'] == 'evaluate'
+    assert train['model_md5'] == evaluate['model_md5']
+    assert evaluate['config_md5'] == train['config_md5'] is not None
+    assert train['data_md5'] == "md5" and train['mode'] == 'default'
+    assert train['rmse'] == report['metrics']['rmse'] and train['quality_passed']
+    assert evaluate['r2'] == evaluation['metrics']['r2']
+    assert 'fit' in train['timings']['phases'] and train['wall_seconds'] > 0
+    assert train['config']['model']['params']['n_estimators'] == 10
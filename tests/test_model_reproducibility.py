@@ -37,9 +37,10 @@ def test_model_reproducibility():
         with open(metrics_path1, 'r') as f:
             metrics1 = json.load(f)
         
-        # Второй запуск
+        # Второй запуск — обучение заново, без кеша результатов
+        # (первый мог быть восстановлен из кеша)
         result2 = subprocess.run(
-            ["python", "scripts/train_model.py"],
+            ["python", "scripts/train_model.py", "--no-cache"],
             capture_output=True,
             text=True,
             cwd=Path(__file__).parent.parent
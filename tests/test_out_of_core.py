@@ -0,0 +1,55 @@
+"""
+Тесты потокового обучения: разбиение по хешу строк, объединение лесов и порог качества.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.dataset import load_dataframe
+from scripts.out_of_core import count_rows, holdout_mask, train_out_of_core
+from scripts.train_model import check_quality
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "housing.csv"
+CONFIG_PATH = Path(__file__).parent.parent / "config" / "model_config.yaml"
+
+@pytest.fixture(scope="module")
+def config():
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+def test_hash_split_ignores_row_order_and_chunking():
+    df = load_dataframe(str(DATA_PATH))
+    mask = holdout_mask(df, 0.2, seed=42)
+    assert 0.1 < mask.mean() < 0.3
+
+    shuffled = df.sample(frac=1.0, random_state=0)
+    assert np.array_equal(holdout_mask(shuffled, 0.2, seed=42), mask[shuffled.index])
+    halves = np.concatenate([holdout_mask(df.iloc[:100], 0.2, 42), holdout_mask(df.iloc[100:], 0.2, 42)])
+    assert np.array_equal(halves, mask)
+    assert not np.array_equal(holdout_mask(df, 0.2, seed=0), mask)
+
+@pytest.mark.parametrize("chunksize", [100, 1000])
+def test_merged_forest_passes_quality_gate(config, chunksize):
+    config = dict(config, out_of_core={'chunksize': chunksize, 'trees_per_shard': 10})
+    model, metrics, report = train_out_of_core(str(DATA_PATH), config)
+
+    assert report['train_size'] + report['test_size'] == count_rows(DATA_PATH)
+    assert model.n_estimators == len(model.estimators_) == 10 * report['n_shards']
+    assert report['n_shards'] == (5 if chunksize == 100 else 1)
+    assert check_quality(metrics, config['thresholds'])['passed']
+
+    # Повторное обучение дает тот же лес
+    again, again_metrics, _ = train_out_of_core(str(DATA_PATH), config)
+    assert again_metrics == metrics
+
+def test_non_forest_rejected(config):
+    config = dict(config, model={'name': 'HistGradientBoostingRegressor', 'params': {'max_iter': 10}})
+    with pytest.raises(ValueError, match="только леса"):
+        train_out_of_core(str(DATA_PATH), config)
@@ -0,0 +1,62 @@
+"""
+Тесты упакованного леса для инференса.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.model_artifact import save_model
+from scripts.packed_forest import PackedForest
+
+@pytest.fixture
+def fitted_forest():
+    from sklearn.ensemble import RandomForestRegressor
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 5)), columns=list('abcde'))
+    y = X['a'] * 3 + np.sin(X['b']) + rng.normal(scale=0.3, size=300)
+    model = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0).fit(X, y)
+    return model, X
+
+@pytest.mark.parametrize("float32_thresholds", [False, True])
+def test_predictions_match_sklearn(tmp_path, fitted_forest, float32_thresholds):
+    """Предсказания упакованного леса совпадают с model.predict."""
+    model, X = fitted_forest
+    save_model(model, tmp_path / "model")
+    expected = model.predict(X)
+
+    for packed in (PackedForest.from_estimator(model, float32_thresholds=float32_thresholds),
+                   PackedForest.from_artifact(tmp_path / "model", float32_thresholds=float32_thresholds)):
+        np.testing.assert_allclose(packed.predict(X), expected, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(packed.predict(X.iloc[:1]), expected[:1], rtol=1e-9, atol=1e-9)
+
+def test_block_boundaries_and_feature_check(fitted_forest, monkeypatch):
+    """Разбиение на блоки строк не влияет на результат; чужие признаки отклоняются."""
+    model, X = fitted_forest
+    packed = PackedForest.from_estimator(model)
+    monkeypatch.setattr("scripts.packed_forest.PREDICT_BLOCK_ROWS", 7)
+
+    np.testing.assert_allclose(packed.predict(X.to_numpy()), model.predict(X), rtol=1e-9, atol=1e-9)
+    with pytest.raises(ValueError):
+        packed.predict(X[list('edcba')])
+
+def test_artifact_predictor_is_memory_mapped(tmp_path, fitted_forest, monkeypatch):
+    """Движок packed читает массивы артефакта без копирования и без сборки модели."""
+    from scripts.packed_forest import open_predictor
+    model, X = fitted_forest
+    save_model(model, tmp_path / "model")
+
+    def no_sklearn_model(path):
+        raise AssertionError("load_model не должен вызываться для engine: packed")
+    monkeypatch.setattr("scripts.model_artifact.load_model", no_sklearn_model)
+    packed = open_predictor(str(tmp_path / "model"), {'engine': 'packed'})
+
+    for name in ('feature', 'threshold', 'children', 'value'):
+        assert isinstance(getattr(packed, name), np.memmap), name
+    np.testing.assert_allclose(packed.predict(X), model.predict(X), rtol=1e-9, atol=1e-9)
@@ -0,0 +1,44 @@
+"""
+Тесты замеров этапов pipeline.
+"""
+
+import pytest
+import json
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts import perf
+
+def test_stage_records_phases_even_on_exit(tmp_path, monkeypatch):
+    """Фазы этапа сохраняются в perf_<этап>.json, в том числе при sys.exit."""
+    monkeypatch.setenv(perf.PROFILE_ENV, "1")
+
+    with pytest.raises(SystemExit):
+        with perf.stage("demo", output_dir=tmp_path):
+            with perf.phase("parse"):
+                sum(range(10000))
+            with perf.phase("parse"):
+                pass
+            with perf.phase("fit"):
+                data = bytearray(20 * 2 ** 20)
+            sys.exit(1)
+
+    with open(tmp_path / "perf_demo.json") as f:
+        summary = json.load(f)
+    assert summary['stage'] == "demo"
+    assert list(summary['phases']) == ["parse", "fit"]
+    for entry in summary['phases'].values():
+        assert set(entry) == {'wall_seconds', 'cpu_seconds', 'peak_rss_mb'}
+    assert summary['total']['peak_rss_mb'] >= summary['phases']['fit']['peak_rss_mb'] > 0
+    assert (tmp_path / "perf_demo.prof").exists()
+
+def test_phase_is_noop_outside_stage(tmp_path):
+    """Без активного этапа phase ничего не записывает."""
+    with perf.phase("load"):
+        pass
+
+    assert not list(tmp_path.iterdir())
+    assert perf._ACTIVE == []
@@ -0,0 +1,47 @@
+"""
+Тесты перестановочной важности признаков в пуле процессов.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+from sklearn.ensemble import RandomForestRegressor
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.dataset import load_data
+from scripts.permutation_importance import permutation_importance
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "housing.csv"
+
+@pytest.fixture(scope="module")
+def fitted():
+    X, y = load_data(str(DATA_PATH))
+    model = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=42).fit(X, y)
+    return model, X, y
+
+def test_result_independent_of_workers_and_batching(fitted):
+    model, X, y = fitted
+    settings = {'n_repeats': 4, 'random_state': 0}
+    single = permutation_importance(model, X, y, dict(settings, n_workers=1, batch_rows=len(X)))
+    pooled = permutation_importance(model, X, y, dict(settings, n_workers=2, batch_rows=10 * len(X)))
+    assert single == pooled
+
+def test_confidence_intervals_and_ranking(fitted):
+    model, X, y = fitted
+    result = permutation_importance(model, X, y, {'n_repeats': 5, 'n_workers': 1})
+
+    assert result['metric'] == 'rmse' and result['n_rows'] == len(X)
+    assert set(result['features']) == set(X.columns)
+    for stats in result['features'].values():
+        assert stats['ci_low'] <= stats['mean'] <= stats['ci_high']
+    # RM и LSTAT — самые сильные признаки Boston Housing
+    top = sorted(result['features'], key=lambda name: result['features'][name]['mean'])[-2:]
+    assert set(top) == {'RM', 'LSTAT'}
+
+def test_max_rows_samples_rows(fitted):
+    model, X, y = fitted
+    result = permutation_importance(model, X, y, {'n_repeats': 2, 'n_workers': 1, 'max_rows': 100})
+    assert result['n_rows'] == 100
@@ -0,0 +1,52 @@
+"""
+Тесты запуска pipeline в одном процессе (main.py).
+"""
+
+import pytest
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).parent.parent
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(ROOT))
+
+from main import run_pipeline
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "config").mkdir()
+    shutil.copy(ROOT / "data" / "housing.csv", tmp_path / "data" / "housing.csv")
+    with open(ROOT / "config" / "model_config.yaml", encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    config['model']['params']['n_estimators'] = 10
+    with open(tmp_path / "config" / "model_config.yaml", 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def test_runner_writes_every_dvc_artifact(workdir):
+    """Все выходы и метрики из dvc.yaml создаются; оценка совпадает с отдельным этапом."""
+    from scripts.evaluate_model import run_evaluation
+    from scripts.dataset import load_data
+    from scripts.model_artifact import load_model
+
+    assert run_pipeline([]) == 0
+
+    with open(ROOT / "dvc.yaml", encoding='utf-8') as f:
+        stages = yaml.safe_load(f)['stages']
+    for stage in stages.values():
+        for entry in stage.get('outs', []) + stage.get('metrics', []):
+            path = entry if isinstance(entry, str) else next(iter(entry))
+            assert (workdir / path).exists(), path
+
+    with open(workdir / "reports" / "evaluation_report.json") as f:
+        in_process = json.load(f)
+    X, y = load_data("data/housing.csv")
+    standalone = run_evaluation(load_model("models/model"), X, y, "models/model", {})
+    assert in_process == standalone
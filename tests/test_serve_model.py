@@ -0,0 +1,132 @@
+"""
+Тесты сервера пакетного инференса.
+"""
+
+import pytest
+import json
+import sys
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.dataset import FEATURE_COLUMNS, SchemaError, default_schema, load_data
+from scripts.model_artifact import save_model
+from scripts.serve_model import MicroBatcher, ServingStats, create_server, parse_csv_rows, parse_json_rows, validate_rows
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "housing.csv"
+
+@pytest.fixture
+def features():
+    X, _ = load_data(str(DATA_PATH))
+    return X.iloc[:50].reset_index(drop=True)
+
+def fit_model(X, seed):
+    from sklearn.ensemble import RandomForestRegressor
+    y = X['RM'] * 2 + X['LSTAT']
+    return RandomForestRegressor(n_estimators=5, max_depth=4, random_state=seed).fit(X, y)
+
+def test_schema_validation(features):
+    """JSON и CSV разбираются по схеме из 13 признаков."""
+    records = features.iloc[:2].to_dict('records')
+
+    np.testing.assert_array_equal(parse_json_rows(json.dumps(records).encode()), features.iloc[:2].to_numpy())
+    np.testing.assert_array_equal(parse_json_rows(json.dumps({'rows': records}).encode()),
+                                  features.iloc[:2].to_numpy())
+    shuffled = features.iloc[:2][FEATURE_COLUMNS[::-1]].to_csv(index=False).encode()
+    pd.testing.assert_frame_equal(validate_rows(parse_csv_rows(shuffled)), features.iloc[:2])
+    with pytest.raises(SchemaError, match="отсутствуют"):
+        parse_json_rows(json.dumps([{'CRIM': 1.0}]).encode())
+    with pytest.raises(SchemaError):
+        validate_rows(parse_json_rows(json.dumps([[float('nan')] * 13]).encode()))
+
+def test_rows_are_typed_and_checked_like_training(features):
+    """Типы и диапазоны проверяются по схеме, как при обучении и в predict."""
+    records = features.iloc[:3].to_dict('records')
+    X = validate_rows(parse_json_rows(json.dumps(records).encode()))
+
+    assert dict(X.dtypes) == {name: default_schema().dtypes[name] for name in FEATURE_COLUMNS}
+    pd.testing.assert_frame_equal(X, features.iloc[:3])
+
+    fractional = dict(records[0], CHAS=0.5)
+    with pytest.raises(SchemaError, match="CHAS"):
+        validate_rows(parse_json_rows(json.dumps([fractional]).encode()))
+    out_of_range = dict(records[0], NOX=2.0)
+    with pytest.raises(SchemaError, match="NOX"):
+        validate_rows(parse_json_rows(json.dumps([records[1], out_of_range]).encode()))
+
+def test_batch_histogram_has_overflow_bucket():
+    """Пакеты больше max_batch_size считаются в отдельной корзине."""
+    stats = ServingStats(max_batch_size=100, latency_window=10)
+    for size in (1, 3, 64, 65, 100, 101, 5000):
+        stats.record_batch(size)
+
+    histogram = stats.snapshot()['batch_size_histogram']
+    assert list(histogram)[-3:] == ['33-64', '65-100', '>100']
+    assert histogram['1'] == histogram['3-4'] == histogram['33-64'] == 1
+    assert histogram['65-100'] == 2 and histogram['>100'] == 2
+
+def test_requests_are_not_merged_past_max_batch_size(features):
+    """Запрос, с которым пакет превысил бы max_batch_size, уходит следующим пакетом."""
+    class Holder:
+        sizes = []
+        def maybe_reload(self):
+            return False
+        def predict(self, X):
+            self.sizes.append(len(X))
+            return np.zeros(len(X)), 'md5'
+
+    holder = Holder()
+    batcher = MicroBatcher(holder, ServingStats(16, 10), max_batch_size=16, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(features.iloc[:n]) for n in (10, 10, 4, 20)]
+        assert [len(f.result()[0]) for f in futures] == [10, 10, 4, 20]
+    finally:
+        batcher.stop()
+    assert holder.sizes == [10, 14, 20]
+
+def test_server_batches_and_hot_reloads(tmp_path, features):
+    """Одновременные запросы объединяются в пакеты; смена модели подхватывается."""
+    model_path = tmp_path / "model"
+    first = fit_model(features, seed=0)
+    save_model(first, model_path)
+    config = {'serving': {'max_wait_ms': 50, 'max_batch_size': 64, 'reload_check_seconds': 0}}
+    server, batcher = create_server(str(model_path), config, host='127.0.0.1', port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def post(rows):
+        request = urllib.request.Request(url + '/predict', data=json.dumps(rows).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        return json.loads(urllib.request.urlopen(request).read())
+
+    try:
+        results = [None] * 20
+        def call(i):
+            results[i] = post(features.iloc[[i]].to_dict('records'))['predictions'][0]
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(20)]
+        [t.start() for t in threads]
+        [t.join() for t in threads]
+        stats = json.loads(urllib.request.urlopen(url + '/stats').read())
+
+        np.testing.assert_allclose(results, first.predict(features.iloc[:20]))
+        assert stats['requests'] == 20 and stats['batches'] < 20
+        assert set(stats['latency_ms']) >= {'p50', 'p99'}
+
+        second = fit_model(features, seed=1)
+        save_model(second, model_path)
+        assert post(features.iloc[:1].to_dict('records'))['predictions'] == \
+            pytest.approx(second.predict(features.iloc[:1]).tolist())
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post([{'CRIM': 1.0}])
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+        batcher.stop()
@@ -0,0 +1,142 @@
+"""
+Тесты сливаемых аккумуляторов метрик и оценки модели по блокам.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.dataset import load_data
+from scripts.evaluate_model import evaluate_model, iter_file_chunks, evaluate_stream
+from scripts.streaming_metrics import ExactSum, RegressionAccumulator, two_sum_array
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "housing.csv"
+
+@pytest.fixture(scope="module")
+def fitted():
+    X, y = load_data(str(DATA_PATH))
+    model = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=42).fit(X, y)
+    return model, X, y
+
+def reference_metrics(y, y_pred) -> dict:
+    """Метрики прежним расчетом по полным массивам."""
+    residuals = y - y_pred
+    return {
+        'rmse': np.sqrt(mean_squared_error(y, y_pred)),
+        'mae': mean_absolute_error(y, y_pred),
+        'r2': r2_score(y, y_pred),
+        'mean_absolute_percentage_error': np.mean(np.abs((y - y_pred) / y)) * 100,
+        'residuals': {
+            'mean': np.mean(residuals), 'std': np.std(residuals),
+            'min': np.min(residuals), 'max': np.max(residuals)
+        }
+    }
+
+def test_exact_sum_is_order_independent():
+    values = np.array([1e16, 1.0, -1e16, 3.0, 1e-8] * 100)
+    total = ExactSum()
+    total.add_array(values)
+    assert total.value == pytest.approx(400.000001, rel=1e-15)
+
+    rng = np.random.default_rng(0)
+    parts = []
+    for block in np.array_split(rng.permutation(values), 7):
+        part = ExactSum()
+        part.add_array(block)
+        parts.append(part)
+    merged = ExactSum()
+    for part in reversed(parts):
+        merged.merge(part)
+    assert merged.value == total.value
+
+@pytest.mark.parametrize("n", [0, 1, 8191, 3 * 8192 + 5, 100003])
+def test_two_sum_array_matches_fsum(n):
+    """Векторная сумма с поправкой совпадает с math.fsum и на плохо обусловленных данных."""
+    import math
+    rng = np.random.default_rng(n)
+    values = rng.normal(size=n) * 10.0 ** rng.integers(-8, 16, size=n)
+    values[1::2] = -values[::2][:n // 2] + rng.normal(size=n // 2)
+
+    total, error, extra = two_sum_array(values)
+    assert math.fsum([total, error] + extra) == math.fsum(values)
+
+def test_accumulator_matches_full_array_metrics(fitted):
+    model, X, y = fitted
+    y_pred = model.predict(X)
+    expected = reference_metrics(y.to_numpy(), y_pred)
+
+    results = []
+    for chunksize in (len(y), 100, 7):
+        accumulator = RegressionAccumulator()
+        for start in range(0, len(y), chunksize):
+            accumulator.update(y.iloc[start:start + chunksize], y_pred[start:start + chunksize])
+        results.append(accumulator.evaluation_metrics())
+
+    # Результат не зависит от размера блоков и совпадает с расчетом по
+    # полным массивам с точностью до последнего знака
+    assert results[0] == results[1] == results[2]
+    for name in ('rmse', 'mae', 'r2', 'mean_absolute_percentage_error'):
+        assert results[0][name] == pytest.approx(expected[name], rel=1e-15, abs=1e-15)
+    for name, value in expected['residuals'].items():
+        assert results[0]['residuals'][name] == pytest.approx(value, rel=1e-15, abs=1e-15)
+
+def test_large_target_offset_keeps_r2_precision():
+    """Цель с большим смещением: Σy² - (Σy)²/n не теряет разряды."""
+    rng = np.random.default_rng(0)
+    y = 1e8 + rng.normal(size=10000)
+    y_pred = y + rng.normal(scale=0.1, size=10000)
+    expected = reference_metrics(y, y_pred)
+
+    results = []
+    for chunksize in (len(y), 333):
+        accumulator = RegressionAccumulator()
+        for start in range(0, len(y), chunksize):
+            accumulator.update(y[start:start + chunksize], y_pred[start:start + chunksize])
+        results.append(accumulator.evaluation_metrics())
+
+    assert results[0] == results[1]
+    assert results[0]['r2'] == pytest.approx(expected['r2'], rel=1e-14)
+    assert results[0]['residuals']['std'] == pytest.approx(expected['residuals']['std'], rel=1e-14)
+
+def test_zero_target_gives_infinite_mape():
+    """Нулевая цель дает MAPE inf, как np.mean, а не nan; остальные метрики конечны."""
+    import warnings
+    y = np.array([0.0, 1.0, 2.0, 3.0] * 5000)
+    y_pred = y + np.tile([0.5, 0.1, 0.0, -0.5], 5000)
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        accumulator = RegressionAccumulator()
+        accumulator.update(y, y_pred)
+    metrics = accumulator.evaluation_metrics()
+
+    assert metrics['mean_absolute_percentage_error'] == np.inf
+    assert [str(w.message) for w in caught] == ["divide by zero encountered in divide"]
+    assert metrics['rmse'] == pytest.approx(np.sqrt(np.mean((y - y_pred) ** 2)), rel=1e-15)
+
+    total = ExactSum()
+    total.add_array(np.array([1.0, np.inf, 2.0]))
+    total.add_array(np.array([-np.inf]))
+    assert np.isnan(total.value)
+
+def test_chunked_evaluation_independent_of_workers(fitted):
+    model, X, y = fitted
+    single = evaluate_model(model, X, y, chunksize=len(X), n_workers=1)
+    pooled = evaluate_model(model, X, y, chunksize=37, n_workers=4)
+    assert single == pooled
+    assert set(single['feature_importance']) == set(X.columns)
+
+def test_file_stream_matches_loaded_data(fitted):
+    model, X, y = fitted
+    streamed, n_samples = evaluate_stream(
+        model, iter_file_chunks(str(DATA_PATH), chunksize=50), list(X.columns), n_workers=2
+    )
+    assert n_samples == len(X)
+    assert streamed == evaluate_model(model, X, y)
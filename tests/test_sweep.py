@@ -0,0 +1,59 @@
+"""
+Тесты перебора гиперпараметров.
+"""
+
+import pytest
+import json
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.sweep import expand_grid, expand_values, plan_workers, run_sweep
+
+def test_expand_grid_lists_and_ranges():
+    """Сетка из списков и диапазонов раскрывается поверх базовых параметров."""
+    candidates = expand_grid(
+        {'random_state': 42, 'max_depth': 10},
+        {'n_estimators': [10, 20], 'max_depth': {'min': 4, 'max': 8, 'step': 2}}
+    )
+
+    assert len(candidates) == 6
+    assert all(c['random_state'] == 42 for c in candidates)
+    assert {c['max_depth'] for c in candidates} == {4, 6, 8}
+    assert expand_values({'min': 0.1, 'max': 0.3, 'step': 0.1}) == [0.1, 0.2, 0.3]
+
+def test_plan_workers_does_not_oversubscribe(monkeypatch):
+    """Воркеры x n_jobs не превышают числа ядер."""
+    monkeypatch.setattr("os.sched_getaffinity", lambda pid: set(range(8)), raising=False)
+
+    assert plan_workers(n_candidates=20, n_jobs_per_model=2) == 4
+    assert plan_workers(n_candidates=2, n_jobs_per_model=1) == 2
+    assert plan_workers(n_candidates=20, n_jobs_per_model=16) == 1
+    assert plan_workers(n_candidates=20, n_jobs_per_model=1, n_workers=3) == 3
+
+def test_run_sweep_picks_best_candidate(tmp_path):
+    """Победитель — лучший по основной метрике среди прошедших пороги."""
+    from sklearn.model_selection import train_test_split
+    from scripts.dataset import load_data
+
+    X, y = load_data("data/housing.csv")
+    splits = train_test_split(X, y, test_size=0.2, random_state=42)
+    config = {
+        'model': {'name': 'RandomForestRegressor',
+                  'params': {'n_estimators': 10, 'random_state': 42}},
+        'metrics': {'primary': 'rmse'},
+        'thresholds': {'min_r2': 0.5, 'max_rmse': 10.0},
+        'sweep': {'grid': {'max_depth': [2, 8]}}
+    }
+    leaderboard_path = tmp_path / "leaderboard.json"
+
+    model, params, leaderboard = run_sweep(*splits, config, str(leaderboard_path))
+
+    assert params['max_depth'] == 8
+    assert model.max_depth == 8
+    assert [entry['rank'] for entry in leaderboard] == [1, 2]
+    assert leaderboard[0]['metrics']['rmse'] <= leaderboard[1]['metrics']['rmse']
+    with open(leaderboard_path) as f:
+        assert len(json.load(f)['leaderboard']) == 2
@@ -0,0 +1,100 @@
+"""
+Тесты дообучения (warm start) леса.
+"""
+
+import pytest
+import json
+import pickle
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.warm_start import parent_split, train_warm_start
+
+def make_config(tmp_path, **params):
+    model_params = {'n_estimators': 10, 'max_depth': 4, 'random_state': 0}
+    model_params.update(params)
+    return {
+        'model': {'name': 'RandomForestRegressor', 'params': model_params},
+        'data': {'test_size': 0.2, 'random_state': 42},
+        'warm_start': {
+            'parent_model': str(tmp_path / "parent.pkl"),
+            'parent_report': str(tmp_path / "missing_report.json"),
+            'extra_estimators': 5
+        }
+    }
+
+@pytest.fixture
+def training_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, 3)), columns=['a', 'b', 'c'])
+    y = X['a'] * 2 + rng.normal(size=200)
+    return X, y
+
+def save_parent(tmp_path, X, y, config):
+    from scripts.train_model import build_model
+    parent = build_model(config).fit(X, y)
+    with open(tmp_path / "parent.pkl", 'wb') as f:
+        pickle.dump(parent, f)
+
+def test_growth_matches_full_fit(tmp_path, training_data):
+    """Дообучение до n_estimators дает тот же лес, что и обучение с нуля."""
+    from scripts.train_model import build_model
+    X, y = training_data
+    save_parent(tmp_path, X, y, make_config(tmp_path))
+    config = make_config(tmp_path, n_estimators=15)
+
+    model, lineage = train_warm_start(X, y, config, data_md5="same")
+    full = build_model(config).fit(X, y)
+
+    assert lineage['mode'] == 'warm_start'
+    assert lineage['added_estimators'] == 5
+    np.testing.assert_array_equal(model.predict(X), full.predict(X))
+
+def test_incompatible_params_fall_back_to_full_fit(tmp_path, training_data):
+    """Изменение max_depth делает дообучение некорректным."""
+    X, y = training_data
+    save_parent(tmp_path, X, y, make_config(tmp_path))
+
+    model, lineage = train_warm_start(X, y, make_config(tmp_path, max_depth=6), data_md5="x")
+
+    assert lineage['mode'] == 'full'
+    assert 'max_depth' in lineage['fallback_reason']
+    assert model.max_depth == 6
+
+def test_parent_holdout_is_kept_for_appended_rows(tmp_path, training_data):
+    """Строки, на которых обучен родитель, не попадают в тестовую выборку дообучения."""
+    from scripts.train_model import split_data, split_info
+    X, y = training_data
+    config = make_config(tmp_path)
+    config['warm_start']['parent_report'] = str(tmp_path / "parent_report.json")
+
+    # Родитель обучен на первых 150 строках
+    X_old, y_old = X.iloc[:150], y.iloc[:150]
+    parent_train, parent_test, _, _ = split_data(X_old, y_old, 0.2, 42)
+    with open(tmp_path / "parent_report.json", 'w') as f:
+        json.dump({'data_info': {
+            'train_size': len(parent_train), 'test_size': len(parent_test), 'data_md5': "old",
+            'split': split_info(X_old, y_old, config)
+        }}, f)
+
+    random_rows, issue = parent_split(X, y, config, data_md5="new")
+    assert (random_rows, issue) == (150, None)
+    X_train, X_test, _, _ = split_data(X, y, 0.2, 42, random_rows)
+    assert set(parent_test.index) <= set(X_test.index)
+    assert not set(parent_train.index) & set(X_test.index)
+    assert len(X_train) + len(X_test) == len(X) and set(X_test.index) - set(parent_test.index)
+
+    # Правка строки родителя: отложенная выборка не восстанавливается
+    edited = X.copy()
+    edited.iloc[10, 0] += 1
+    _, issue = parent_split(edited, y, config, data_md5="edited")
+    assert issue is not None
+    save_parent(tmp_path, X_old, y_old, config)
+    _, lineage = train_warm_start(X_train, y.loc[X_train.index], config, "edited", issue)
+    assert lineage['mode'] == 'full' and lineage['fallback_reason'] == issue